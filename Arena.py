@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import random
+from Grid import Grid
+from Match import Match
+from PieceQueue import PieceQueue
+
+class Targeting:
+    ''' Decides which grid of an arena receives the lines a grid sends. Subclasses are told about every update, attack and elimination so that they can answer in constant time
+
+    Attributes:
+        - arena : The arena the targeting is used in
+    '''
+
+    def attach(self, arena):
+        '''Starts targeting the grids of *arena*, forgetting anything known about a previous game'''
+
+        self.arena = arena
+
+    def chooseTarget(self, sender):
+        '''Returns the grid receiving the lines sent by *sender*, or None if there is no other grid left'''
+
+        raise NotImplementedError
+
+    def onUpdate(self, grid):
+        '''Called after *grid* was acted on or ticked'''
+
+    def onAttack(self, sender, target, lines):
+        '''Called after *sender* sent *lines* lines to *target*'''
+
+    def onEliminated(self, grid):
+        '''Called after *grid* was eliminated'''
+
+    def __repr__(self):
+        '''repr override'''
+        return f'{type(self).__name__}()'
+
+class RandomTargeting(Targeting):
+    ''' Sends lines to a random grid still playing'''
+
+    def chooseTarget(self, sender):
+        '''Returns a random grid still playing other than *sender*'''
+
+        alive = self.arena.getAliveGrids()
+
+        if len(alive) < 2:
+            return None
+
+        # Picking among every grid but the last, standing the last in for the sender
+        target = alive[self.arena.target_random.randrange(len(alive) - 1)]
+
+        return alive[-1] if target is sender else target
+
+class AttackerTargeting(RandomTargeting):
+    ''' Sends lines back to the grid that last sent lines to the sender, if it is still playing, or to a random grid otherwise
+
+    Attributes:
+        - __attackers : A dictionary mapping each grid to the grid that last sent it lines
+    '''
+
+    def attach(self, arena):
+        '''Starts targeting the grids of *arena*, forgetting every attack of a previous game'''
+
+        super().attach(arena)
+        self.__attackers = {}
+
+    def chooseTarget(self, sender):
+        '''Returns the grid that last attacked *sender*, or a random grid still playing if there is none'''
+
+        attacker = self.__attackers.get(sender)
+
+        if attacker is not None and self.arena.isAlive(attacker):
+            return attacker
+
+        return super().chooseTarget(sender)
+
+    def onAttack(self, sender, target, lines):
+        '''Remembers that *sender* attacked *target*'''
+
+        self.__attackers[target] = sender
+
+class MostLinesTargeting(Targeting):
+    ''' Sends lines to the grid still playing that has cleared the most lines, keeping track of the two leaders so that the leader itself sends to the runner-up
+
+    Attributes:
+        - __leaders : The grid still playing with the most lines cleared and the one with the second most, either of which may be None
+    '''
+
+    def attach(self, arena):
+        '''Starts targeting the grids of *arena*, finding the two leaders'''
+
+        super().attach(arena)
+        self.__findLeaders()
+
+    def chooseTarget(self, sender):
+        '''Returns the leader, or the runner-up if *sender* is the leader'''
+
+        leader, runner_up = self.__leaders
+
+        return runner_up if leader is sender else leader
+
+    def onUpdate(self, grid):
+        '''Moves *grid* up the leaders if it has overtaken either of them'''
+
+        leader, runner_up = self.__leaders
+
+        if grid is leader:
+            return
+
+        lines = grid.getLinesCleared()
+
+        if leader is None or lines > leader.getLinesCleared():
+            self.__leaders = [grid, leader]
+        elif grid is not runner_up and (runner_up is None or lines > runner_up.getLinesCleared()):
+            self.__leaders[1] = grid
+
+    def onEliminated(self, grid):
+        '''Finds the leaders again if *grid* was one of them'''
+
+        if grid in self.__leaders:
+            self.__findLeaders()
+
+    def __findLeaders(self):
+        '''Finds the two grids still playing with the most lines cleared'''
+
+        ranked = sorted(self.arena.getAliveGrids(), key=lambda grid: -grid.getLinesCleared())[:2]
+
+        self.__leaders = ranked + [None] * (2 - len(ranked))
+
+class Arena:
+    ''' A battle between any number of grids sharing one block queue, in which the lines a grid sends go to the grid chosen by a pluggable targeting and the last grid standing wins. Like Match, it never draws anything. Eliminated grids are dropped from the list of grids still playing in constant time and are no longer ticked
+
+    Static Attributes:
+        - TARGETINGS : A dictionary mapping the name of each targeting to its class
+
+    Attributes:
+        - grids : The grid of each player, indexed by player
+        - ticks : The number of ticks simulated since the arena was last reset
+        - seed : The seed of the arena's random generators
+        - random : The random generator used by the grids to generate blocks and garbage
+        - target_random : The random generator used by the targeting
+        - queue : The queue of blocks shared by the grids
+        - targeting : The targeting choosing which grid receives sent lines
+        - eliminated : The eliminated grids, in the order they were eliminated
+        - __alive : The grids still playing, in no particular order
+        - __alive_indices : A dictionary mapping each grid still playing to its index in __alive
+        - __actions : A list, indexed by player, of dictionaries mapping each action name to the method performing it
+    '''
+
+    TARGETINGS = {
+        'random' : RandomTargeting,
+        'attackers' : AttackerTargeting,
+        'most-lines' : MostLinesTargeting
+    }
+
+    def __init__(self, size, seed=None, targeting=None):
+        '''Constructs an Arena object of *size* fresh grids, discarding the grids and block queue of any previous match from Grid's static attributes
+
+        Parameters:
+            - size : The quantity of grids
+            - seed : The seed of the arena's random generators, or None to pick one at random
+            - targeting : The Targeting deciding where sent lines go, or None for random targeting
+        '''
+
+        if seed is None:
+            seed = random.getrandbits(64)
+
+        self.seed = seed
+        self.ticks = 0
+        self.random = random.Random(seed)
+        self.target_random = random.Random(self.random.getrandbits(64))
+        self.targeting = targeting if targeting is not None else RandomTargeting()
+
+        Grid.GRIDS = []
+        Grid.RANDOM = self.random
+        Grid.QUEUE = self.queue = PieceQueue(Grid.BLOCKS, self.random)
+
+        self.grids = [Grid() for _ in range(size)]
+
+        for g in self.grids:
+            g.arena = self
+
+        self.__actions = [
+            {action : getattr(grid, action) if action == 'swapHold' else getattr(grid.block, action) for action in Match.ACTIONS}
+            for grid in self.grids
+        ]
+
+        self.__startGame()
+
+    def act(self, player, action):
+        '''Performs the action named *action* on the grid of *player*, unless they have been eliminated or the arena is over
+
+        Parameters:
+            - player : The index of the player performing the action
+            - action : The name of the action, one of Match.ACTIONS
+        '''
+
+        grid = self.grids[player]
+
+        if grid in self.__alive_indices and not self.isOver():
+            self.__actions[player][action]()
+            self.targeting.onUpdate(grid)
+
+    def tick(self):
+        '''Advances the arena by one tick: continues the timers of every grid still playing, draws their blocks, eliminates the grids that lost, in player order, and makes the last grid standing the winner'''
+
+        if not self.isOver():
+            for g in self.__alive:
+                g.tick()
+                self.targeting.onUpdate(g)
+
+        for g in self.__alive:
+            g.drawBlock()
+
+        # Eliminating the grids that lost, never eliminating the last grid standing
+        if not self.isOver():
+            for g in [g for g in self.__alive if g.lose]:
+                if len(self.__alive) == 1:
+                    break
+
+                self.__eliminate(g)
+
+            if len(self.__alive) == 1:
+                self.__alive[0].win = True
+
+        self.ticks += 1
+
+    def sendLines(self, grid, lines):
+        '''Sends *lines* lines from *grid* to the grid chosen by the targeting, as called by Grid when it clears enough lines'''
+
+        target = self.targeting.chooseTarget(grid)
+
+        if target is not None:
+            target.lines_received += lines
+            self.targeting.onAttack(grid, target, lines)
+
+    def getAliveGrids(self):
+        '''Returns the grids still playing, in no particular order. The list is kept up to date by the arena, so it must not be modified'''
+
+        return self.__alive
+
+    def isAlive(self, grid):
+        '''Returns whether *grid* is still playing'''
+
+        return grid in self.__alive_indices
+
+    def isOver(self):
+        '''Returns whether a player has won the arena
+
+        Returns:
+            bool : True if the arena is over, False otherwise
+        '''
+
+        return len(self.__alive) == 1 and self.__alive[0].win
+
+    def reset(self):
+        '''Resets every grid so that a new game can begin'''
+
+        for g in self.grids:
+            g.resetGrid()
+
+        self.ticks = 0
+        self.__startGame()
+
+    def __startGame(self):
+        '''Marks every grid as playing and attaches the targeting'''
+
+        self.eliminated = []
+        self.__alive = list(self.grids)
+        self.__alive_indices = {g : i for i, g in enumerate(self.__alive)}
+
+        self.targeting.attach(self)
+
+    def __eliminate(self, grid):
+        '''Removes *grid* from the grids still playing by moving the last grid still playing into its place, and stops it reading the block queue'''
+
+        index = self.__alive_indices.pop(grid)
+        last = self.__alive.pop()
+
+        if last is not grid:
+            self.__alive[index] = last
+            self.__alive_indices[last] = index
+
+        self.eliminated.append(grid)
+        self.queue.removePlayer(grid.getIndex())
+        self.targeting.onEliminated(grid)
+
+    def __repr__(self):
+        '''repr override'''
+        return f'Arena({len(self.grids)}, seed={self.seed}, targeting={self.targeting!r})'
@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import numpy as np
+from Block import Block
+from Grid import Grid
+
+class BatchSimulator:
+    ''' Many independent grids advanced together, with the collision detection, placement, line clearing and garbage receiving of every grid vectorized with NumPy. The rules are the same as those of Grid and Block: a placement performs a single rotation with the same SRS offsets as Block, then moves the block one column at a time and hard drops it, exactly like the equivalent key presses would. Unlike Grid, each grid generates its own block queue
+
+    Static Attributes:
+        - TYPES : The block types, in the order used to index them
+        - GARBAGE : The cell value of a garbage cell, Block.GARBAGE
+        - PALETTE : The colour of each cell value, Block.PALETTE, since cell values are the codes of Block.CODES that grids use
+        - SPAWN_COL : The column offset blocks spawn at
+        - __CODES : The cell value of each block type, indexed as in TYPES
+        - __SHAPE_ROWS : The row of each cell of each block type and rotational state
+        - __SHAPE_COLS : The column of each cell of each block type and rotational state
+        - __ROT_COUNTS : The quantity of rotational states of each block type
+        - __KICKS : The (column, row) rotation offsets of each block type, old rotational state and new rotational state, padded to the longest list of offsets
+        - __KICK_COUNTS : The quantity of rotation offsets in each list of __KICKS
+        - __SCORE : The scoring increment values based on the quantity of lines immediately cleared
+
+    Attributes:
+        - size : The quantity of grids
+        - boards : The (size, ROWS, COLS) uint8 array of cell values
+        - block_types : The index in TYPES of each grid's current block
+        - rot_states : The rotational state of each grid's current block
+        - row_offsets : The row offset of each grid's current block
+        - col_offsets : The column offset of each grid's current block
+        - holds : The index in TYPES of each grid's held block, or -1 if nothing is held
+        - lines_cleared : The quantity of lines cleared on each grid
+        - lines_received : The quantity of lines awaiting receival into each grid
+        - scores : The score of each grid
+        - lose : Whether each grid has lost
+        - __rng : The NumPy random generator used to generate blocks and garbage
+        - __generated : The quantity of blocks each grid has generated
+        - __last_blocks : The index in TYPES of the block each grid generated last
+        - __run_lengths : The quantity of identical blocks at the end of each grid's generated blocks
+        - __since_i : The quantity of blocks each grid has generated since its last I-block
+        - __indices : An array of each grid's index, used for fancy indexing
+        - __column_bits : The (size, COLS) array of column bitmasks, kept in sync with boards, in which bit r is set if row r of the column is filled
+    '''
+
+    TYPES = Grid.BLOCKS
+    GARBAGE = Block.GARBAGE
+    PALETTE = Block.PALETTE
+    SPAWN_COL = 3
+
+    __CODES = np.array([Block.CODES[block_type] for block_type in TYPES], dtype=np.uint8)
+    __SHAPE_ROWS = np.array([[[cell[0] for cell in Block.getShape(t, r % Block.getRotationCount(t))] for r in range(4)] for t in TYPES], dtype=np.int64)
+    __SHAPE_COLS = np.array([[[cell[1] for cell in Block.getShape(t, r % Block.getRotationCount(t))] for r in range(4)] for t in TYPES], dtype=np.int64)
+    __ROT_COUNTS = np.array([Block.getRotationCount(t) for t in TYPES], dtype=np.int64)
+
+    __KICKS = np.zeros((len(TYPES), 4, 4, 6, 2), dtype=np.int64)
+    __KICK_COUNTS = np.zeros((len(TYPES), 4, 4), dtype=np.int64)
+
+    for __t, __block_type in enumerate(TYPES):
+        for __old in range(Block.getRotationCount(__block_type)):
+            for __new in range(Block.getRotationCount(__block_type)):
+                __offsets = Block.getKicks(__block_type, __old, __new)
+                __KICKS[__t, __old, __new, :len(__offsets)] = __offsets
+                __KICK_COUNTS[__t, __old, __new] = len(__offsets)
+
+    del __t, __block_type, __old, __new, __offsets
+
+    __SCORE = np.array([0, 40, 100, 300, 1200], dtype=np.int64)
+
+    def __init__(self, size, seed=None):
+        '''Constructs a BatchSimulator object of *size* empty grids, whose random generator is seeded with *seed*'''
+
+        self.size = size
+        self.__rng = np.random.default_rng(seed)
+        self.__indices = np.arange(size)
+
+        self.boards = np.zeros((size, Grid.ROWS, Grid.COLS), dtype=np.uint8)
+        self.__column_bits = np.zeros((size, Grid.COLS), dtype=np.int64)
+        self.block_types = np.zeros(size, dtype=np.int64)
+        self.rot_states = np.zeros(size, dtype=np.int64)
+        self.row_offsets = np.zeros(size, dtype=np.int64)
+        self.col_offsets = np.zeros(size, dtype=np.int64)
+        self.holds = np.zeros(size, dtype=np.int64)
+        self.lines_cleared = np.zeros(size, dtype=np.int64)
+        self.lines_received = np.zeros(size, dtype=np.int64)
+        self.scores = np.zeros(size, dtype=np.int64)
+        self.lose = np.zeros(size, dtype=bool)
+        self.__generated = np.zeros(size, dtype=np.int64)
+        self.__last_blocks = np.zeros(size, dtype=np.int64)
+        self.__run_lengths = np.zeros(size, dtype=np.int64)
+        self.__since_i = np.zeros(size, dtype=np.int64)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        '''Resets the grids selected by the boolean array *mask*, or every grid if it is None, and spawns their first block'''
+
+        if mask is None:
+            mask = np.ones(self.size, dtype=bool)
+
+        self.boards[mask] = 0
+        self.__column_bits[mask] = 0
+        self.holds[mask] = -1
+        self.lines_cleared[mask] = 0
+        self.lines_received[mask] = 0
+        self.scores[mask] = 0
+        self.lose[mask] = False
+        self.__generated[mask] = 0
+        self.__run_lengths[mask] = 0
+        self.__since_i[mask] = 0
+
+        self.__spawn(mask, self.__generateBlocks(mask))
+
+    def collisionDetect(self, block_types, rot_states, row_offsets, col_offsets):
+        '''Checks, for every grid, whether a block of the given type, rotational state and offsets lies within the grid without overlapping any filled cell, like Block.collisionDetect
+
+        Returns:
+            numpy.ndarray : A boolean array which is True for the grids where the block fits
+        '''
+
+        return self.__fits(self.__indices, block_types, rot_states, row_offsets, col_offsets)
+
+    def __fits(self, indices, block_types, rot_states, row_offsets, col_offsets):
+        '''Checks, for the grids at *indices* only, whether a block of the given type, rotational state and offsets lies within the grid without overlapping any filled cell
+
+        Returns:
+            numpy.ndarray : A boolean array which is True for the grids where the block fits
+        '''
+
+        rows = row_offsets[:, None] + BatchSimulator.__SHAPE_ROWS[block_types, rot_states]
+        cols = col_offsets[:, None] + BatchSimulator.__SHAPE_COLS[block_types, rot_states]
+
+        inside = (rows >= 0) & (rows < Grid.ROWS) & (cols >= 0) & (cols < Grid.COLS)
+        filled = (self.__column_bits[indices[:, None], np.where(inside, cols, 0)] >> np.where(inside, rows, 0)) & 1
+
+        return (inside & (filled == 0)).all(axis=1)
+
+    def place(self, rot_changes, col_offsets, hold=None):
+        '''Places the current block of every grid that hasn't lost: optionally holds it first, rotates it once by *rot_changes* using the SRS offsets, moves it one column at a time towards *col_offsets* until blocked, hard drops it and locks it, clearing lines, sending lines and receiving garbage like Grid does
+
+        Parameters:
+            - rot_changes : The quantity by which to increment each block's rotational state; 1 is clockwise, 2 is 180 degrees and 3 is counter clockwise
+            - col_offsets : The column offset to move each block towards
+            - hold : A boolean array which is True for the grids that swap their block with their held block first, or None to hold on no grid
+
+        Returns:
+            tuple : The arrays of the quantity of lines each grid cleared and sent
+        '''
+
+        active = ~self.lose
+
+        if hold is not None:
+            self.__swapHold(active & hold)
+            active &= ~self.lose
+
+        self.__rotate(active, np.asarray(rot_changes, dtype=np.int64))
+        self.__shift(active, np.asarray(col_offsets, dtype=np.int64))
+        self.__drop(active)
+
+        return self.__lock(active)
+
+    def receiveLines(self, counts):
+        '''Adds *counts* to the quantity of lines awaiting receival into each grid'''
+
+        self.lines_received += counts
+
+    def getColours(self, index):
+        '''Returns the matrix of cell colours of the grid at *index*, in the same form as Grid's colours'''
+
+        return [[BatchSimulator.PALETTE[value] for value in row] for row in self.boards[index].tolist()]
+
+    def setBoards(self, indices, boards):
+        '''Replaces the boards of the grids at *indices* with *boards*, and recomputes their column bitmasks. Boards must only be modified through this method
+
+        Parameters:
+            - indices : The indices of the grids to replace the boards of
+            - boards : The array of new boards, of shape (len(indices), ROWS, COLS)
+        '''
+
+        self.boards[indices] = boards
+        self.__column_bits[indices] = ((boards != 0).astype(np.int64) << np.arange(Grid.ROWS)[None, :, None]).sum(axis=1)
+
+    def __generateBlocks(self, mask):
+        '''Generates the next block of the grids selected by *mask*, forbidding 5 identical blocks in a row and forcing at least one I-block within 12 blocks, like Grid does
+
+        Returns:
+            numpy.ndarray : The index in TYPES of each generated block, for the selected grids
+        '''
+
+        last = self.__last_blocks[mask]
+        generated = self.__generated[mask]
+
+        # Allowing no 5 same blocks to be queued consecutively
+        no_repeat = (generated >= 4) & (self.__run_lengths[mask] >= 4)
+
+        # Forcing at least one I-block within 12 queues of one another
+        force_i = (generated >= 11) & (self.__since_i[mask] >= 11)
+
+        choices = self.__rng.integers(0, len(BatchSimulator.TYPES) - no_repeat)
+        blocks = np.where(no_repeat & (choices >= last), choices + 1, choices)
+        blocks = np.where(force_i, BatchSimulator.TYPES.index('i'), blocks)
+
+        # Updating the generation history
+        self.__run_lengths[mask] = np.where((generated > 0) & (blocks == last), self.__run_lengths[mask] + 1, 1)
+        self.__since_i[mask] = np.where(blocks == BatchSimulator.TYPES.index('i'), 0, self.__since_i[mask] + 1)
+        self.__last_blocks[mask] = blocks
+        self.__generated[mask] = generated + 1
+
+        return blocks
+
+    def __spawn(self, mask, block_types):
+        '''Replaces the current block of the grids selected by *mask* with a new block of type *block_types* at the spawn position. Those whose new block overlaps a filled cell lose'''
+
+        self.block_types[mask] = block_types
+        self.rot_states[mask] = 0
+        self.row_offsets[mask] = 0
+        self.col_offsets[mask] = BatchSimulator.SPAWN_COL
+
+        fits = self.collisionDetect(self.block_types, self.rot_states, self.row_offsets, self.col_offsets)
+        self.lose |= mask & ~fits
+
+    def __swapHold(self, mask):
+        '''Swaps the current block of the grids selected by *mask* with their held block, generating a new block for those holding nothing, like Grid.swapHold'''
+
+        empty = mask & (self.holds < 0)
+        swap = mask & (self.holds >= 0)
+
+        held = self.holds.copy()
+        self.holds[mask] = self.block_types[mask]
+
+        # Swapping in the held block; its position isn't checked, as in Grid.swapHold
+        self.block_types[swap] = held[swap]
+        self.rot_states[swap] = 0
+        self.row_offsets[swap] = 0
+        self.col_offsets[swap] = BatchSimulator.SPAWN_COL
+
+        if empty.any():
+            self.__spawn(empty, self.__generateBlocks(empty))
+
+    def __rotate(self, mask, rot_changes):
+        '''Rotates the current block of the grids selected by *mask* by *rot_changes*, trying each SRS offset in order like Block.__rotate'''
+
+        pending = np.flatnonzero(mask & ~self.lose)
+
+        block_types = self.block_types[pending]
+        old_states = self.rot_states[pending]
+        new_states = (old_states + rot_changes[pending]) % BatchSimulator.__ROT_COUNTS[block_types]
+        kicks = BatchSimulator.__KICKS[block_types, old_states, new_states]
+        kick_counts = BatchSimulator.__KICK_COUNTS[block_types, old_states, new_states]
+
+        for k in range(kicks.shape[1]):
+            trying = k < kick_counts
+
+            if not trying.any():
+                break
+
+            # Narrowing down to the grids still trying offsets
+            pending, block_types, new_states, kicks, kick_counts = pending[trying], block_types[trying], new_states[trying], kicks[trying], kick_counts[trying]
+
+            rows = self.row_offsets[pending] - kicks[:, k, 1]
+            cols = self.col_offsets[pending] + kicks[:, k, 0]
+            success = self.__fits(pending, block_types, new_states, rows, cols)
+
+            self.rot_states[pending[success]] = new_states[success]
+            self.row_offsets[pending[success]] = rows[success]
+            self.col_offsets[pending[success]] = cols[success]
+
+            failure = ~success
+            pending, block_types, new_states, kicks, kick_counts = pending[failure], block_types[failure], new_states[failure], kicks[failure], kick_counts[failure]
+
+    def __shift(self, mask, col_offsets):
+        '''Moves the current block of the grids selected by *mask* one column at a time towards *col_offsets*, stopping where blocked like repeated Block.moveLeft or Block.moveRight calls'''
+
+        directions = np.sign(col_offsets - self.col_offsets)
+        moving = np.flatnonzero(mask & ~self.lose & (directions != 0))
+
+        while moving.size:
+            cols = self.col_offsets[moving] + directions[moving]
+            success = self.__fits(moving, self.block_types[moving], self.rot_states[moving], self.row_offsets[moving], cols)
+
+            moving = moving[success]
+            self.col_offsets[moving] = cols[success]
+            moving = moving[self.col_offsets[moving] != col_offsets[moving]]
+
+    def __drop(self, mask):
+        '''Moves the current block of the grids selected by *mask* down until blocked, like Block.hardDrop, by finding the nearest filled cell below each of the block's cells with the column bitmasks'''
+
+        falling = np.flatnonzero(mask & ~self.lose)
+
+        rows = self.row_offsets[falling, None] + BatchSimulator.__SHAPE_ROWS[self.block_types[falling], self.rot_states[falling]]
+        cols = self.col_offsets[falling, None] + BatchSimulator.__SHAPE_COLS[self.block_types[falling], self.rot_states[falling]]
+
+        # Isolating the lowest set bit below each cell, which is the nearest filled cell below it
+        below = self.__column_bits[falling[:, None], cols] >> (rows + 1)
+        distances = np.where(below == 0, Grid.ROWS - 1 - rows, BatchSimulator.__lowestBit(below))
+
+        self.row_offsets[falling] += distances.min(axis=1)
+
+    def __lock(self, mask):
+        '''Locks the current block of the grids selected by *mask* onto their boards and spawns their next block, then clears lines, sends lines and receives garbage like Grid.instantLock
+
+        Returns:
+            tuple : The arrays of the quantity of lines each grid cleared and sent
+        '''
+
+        indices = np.flatnonzero(mask)
+        rows = self.row_offsets[indices, None] + BatchSimulator.__SHAPE_ROWS[self.block_types[indices], self.rot_states[indices]]
+        cols = self.col_offsets[indices, None] + BatchSimulator.__SHAPE_COLS[self.block_types[indices], self.rot_states[indices]]
+
+        self.boards[indices[:, None], rows, cols] = BatchSimulator.__CODES[self.block_types[indices, None]]
+        np.bitwise_or.at(self.__column_bits, (indices[:, None], cols), 1 << rows)
+
+        # Spawning the next block before clearing lines, as Grid does
+        self.__spawn(mask, self.__generateBlocks(mask))
+
+        cleared = self.__clearLines(indices)
+        sent = np.zeros(self.size, dtype=np.int64)
+
+        # Reducing incoming lines, and sending the excess to other grids
+        clearing = cleared > 0
+        remaining = self.lines_received - cleared
+        sending = clearing & (remaining < -1)
+        sent[sending] = -remaining[sending]
+
+        receiving = mask & ~clearing & (self.lines_received > 0)
+        self.__receiveLines(np.flatnonzero(receiving))
+
+        self.lines_received[clearing | receiving] = 0
+
+        return cleared, sent
+
+    def __clearLines(self, indices):
+        '''Clears the full rows of the grids at *indices*, removing them and adding as many empty rows at the top exactly as Grid.__clearLines does, and updates their lines cleared and score
+
+        Returns:
+            numpy.ndarray : The quantity of lines each grid cleared
+        '''
+
+        cleared = np.zeros(self.size, dtype=np.int64)
+
+        # Bit r is set if every column has row r filled
+        full = np.bitwise_and.reduce(self.__column_bits[indices], axis=1)
+        indices, full = indices[full != 0], full[full != 0]
+
+        if not indices.size:
+            return cleared
+
+        counts = np.bitwise_count(full).astype(np.int64)
+        rows = np.arange(Grid.ROWS)[None, :]
+
+        # Ordering the full rows first, then the kept rows from top to bottom, and emptying the full rows
+        kept = (full[:, None] >> rows.astype(full.dtype)) & 1 == 0
+        sources = np.argsort(kept, axis=1, kind='stable')
+        emptied = rows < counts[:, None]
+
+        boards = np.take_along_axis(self.boards[indices], sources[:, :, None], axis=1)
+        boards[emptied] = 0
+        self.setBoards(indices, boards)
+
+        # Changing scoring attributes
+        cleared[indices] = counts
+        self.lines_cleared[indices] += counts
+        self.scores[indices] += (counts // 5) * BatchSimulator.__SCORE[4] + BatchSimulator.__SCORE[counts % 5]
+
+        return cleared
+
+    def __receiveLines(self, indices):
+        '''Moves the rows of the grids at *indices* up by their quantity of lines received and fills the bottom with garbage rows sharing one random empty column, like Grid.__receiveLines. Grids with no filled cells receive nothing, and grids receiving more lines than there are empty rows above their stack lose'''
+
+        # Bit r is set if any column has row r filled
+        filled = np.bitwise_or.reduce(self.__column_bits[indices], axis=1)
+        indices, filled = indices[filled != 0], filled[filled != 0]
+
+        top_rows = BatchSimulator.__lowestBit(filled)
+        counts = self.lines_received[indices]
+
+        overflow = counts > top_rows
+        self.lose[indices[overflow]] = True
+        indices, counts = indices[~overflow], counts[~overflow]
+
+        if not indices.size:
+            return
+
+        holes = self.__rng.integers(0, Grid.COLS, indices.size)
+        rows = np.arange(Grid.ROWS)[None, :]
+
+        sources = np.minimum(rows + counts[:, None], Grid.ROWS - 1)
+        garbage = rows >= Grid.ROWS - counts[:, None]
+
+        boards = np.take_along_axis(self.boards[indices], sources[:, :, None], axis=1)
+        garbage_rows = np.where(np.arange(Grid.COLS)[None, :] == holes[:, None], 0, BatchSimulator.GARBAGE).astype(np.uint8)
+
+        self.setBoards(indices, np.where(garbage[:, :, None], garbage_rows[:, None, :], boards))
+
+    @staticmethod
+    def __lowestBit(bits):
+        '''Returns the index of the lowest set bit of each non-zero integer in the array *bits*'''
+
+        return np.bitwise_count((bits & -bits) - 1).astype(np.int64)
+
+    def __repr__(self):
+        '''repr override'''
+        return f'BatchSimulator({self.size})'
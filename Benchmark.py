@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# Measures how quickly the game logic and renderer run
+
+# Rendering benchmarks run without a window
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', 'hide')
+
+# import necessary modules
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+from Match import Match
+from Grid import Grid
+from Block import Block
+from PieceQueue import PieceQueue
+
+FIXTURES = ('empty', 'mid-stack', 'near top-out', 'heavy garbage')
+
+def makeFixture(name, seed=0):
+    '''Returns a headless match whose first grid holds the representative board *name*, one of FIXTURES, built deterministically from *seed*. The grid's block is a T-block at its spawn position
+
+    Parameters:
+        - name : The name of the board
+        - seed : The seed used to fill the board
+    '''
+
+    match = Match(seed)
+    grid = match.grids[0]
+    rng = random.Random(seed)
+
+    grid.block.eraseBlock()
+
+    if name == 'mid-stack':
+        filled_rows, garbage = 8, False
+    elif name == 'near top-out':
+        filled_rows, garbage = 16, False
+    elif name == 'heavy garbage':
+        filled_rows, garbage = 12, True
+        grid.lines_received = 4
+    else:
+        filled_rows, garbage = 0, False
+
+    for row in range(Grid.ROWS - filled_rows, Grid.ROWS):
+        hole = rng.randrange(Grid.COLS)
+
+        for col in range(Grid.COLS):
+            if col == hole:
+                continue
+
+            # Garbage rows are full but for their hole, stacks are patchier
+            if garbage:
+                grid.setCell(row, col, Block.GARBAGE)
+            elif rng.random() < 0.8:
+                grid.setCell(row, col, Block.CODES[rng.choice(Grid.BLOCKS)])
+
+    grid.block.resetBlock('t')
+
+    return match
+
+def fillRows(grid, count):
+    '''Fills the bottom *count* rows of *grid* completely, so that they can be cleared'''
+
+    for row in range(Grid.ROWS - count, Grid.ROWS):
+        for col in range(Grid.COLS):
+            grid.setCell(row, col, Block.GARBAGE)
+
+def measure(prepare, samples=200, batch=1):
+    '''Times an operation, returning its rate and the percentiles of its duration
+
+    Parameters:
+        - prepare : A function called before each sample, untimed, which returns the operation to time
+        - samples : The quantity of samples to take
+        - batch : The quantity of times the operation is called per sample; each sample's duration is divided by it
+
+    Returns:
+        dict : The operations per second, the 50th, 90th and 99th percentile durations in microseconds and the quantity of samples
+    '''
+
+    durations = []
+
+    for _ in range(samples):
+        operation = prepare()
+
+        start = time.perf_counter_ns()
+
+        for _ in range(batch):
+            operation()
+
+        durations.append((time.perf_counter_ns() - start) / batch / 1000)
+
+    durations.sort()
+
+    def percentile(p):
+        return durations[min(len(durations) - 1, int(p / 100 * len(durations)))]
+
+    return {
+        'ops_per_sec' : 1e6 * len(durations) / sum(durations),
+        'p50_us' : percentile(50),
+        'p90_us' : percentile(90),
+        'p99_us' : percentile(99),
+        'samples' : len(durations)
+    }
+
+def logicBenchmarks(fixture):
+    '''Returns the (name, prepare function, batch) of each game logic benchmark on the board *fixture*'''
+
+    shared = makeFixture(fixture)
+    shared_grid = shared.grids[0]
+
+    def fresh():
+        return makeFixture(fixture).grids[0]
+
+    def collisionDetect():
+        return shared_grid.block.collisionDetect
+
+    def rotate():
+        return shared_grid.block.rotCW
+
+    def hardDrop():
+        return fresh().block.hardDrop
+
+    def clearLines():
+        grid = fresh()
+        fillRows(grid, 4)
+
+        return grid._Grid__clearLines
+
+    def receiveLines():
+        grid = fresh()
+        grid.lines_received = 2
+
+        return grid._Grid__receiveLines
+
+    def generateBlock():
+        return PieceQueue(Grid.BLOCKS, random.Random(0)).generate
+
+    return [
+        ('collisionDetect', collisionDetect, 1000),
+        ('rotate', rotate, 1000),
+        ('hardDrop', hardDrop, 1),
+        ('clearLines', clearLines, 1),
+        ('receiveLines', receiveLines, 1),
+        ('generateBlock', generateBlock, 100)
+    ]
+
+def renderBenchmarks(fixture):
+    '''Returns the (name, prepare function, batch) of each rendering benchmark on the board *fixture*, or an empty list if pygame isn't installed'''
+
+    try:
+        import pygame
+        from GridView import GridView
+    except ImportError:
+        return []
+
+    pygame.init()
+    display = pygame.display.get_surface() or pygame.display.set_mode((750, 500))
+
+    match = makeFixture(fixture)
+    view = GridView(match.grids[0], 100, 100, 400, display)
+    view.drawGrid()
+
+    def fullFrame():
+        # Moving the view in place forces the whole grid to be redrawn
+        view.setX(view.getX())
+
+        return view.drawGrid
+
+    def moveFrame():
+        block = match.grids[0].block
+
+        def frame():
+            block.moveRight() or block.moveLeft()
+            match.tick()
+            pygame.display.update(view.drawGrid())
+
+        return frame
+
+    return [
+        ('drawGrid full', fullFrame, 1),
+        ('drawGrid move', moveFrame, 1)
+    ]
+
+def runBenchmarks(samples=200, names=None):
+    '''Runs every benchmark on every fixture
+
+    Parameters:
+        - samples : The quantity of samples to take of each benchmark
+        - names : The names of the benchmarks to run, or None to run them all
+
+    Returns:
+        list : The result of each benchmark, as returned by measure along with its name and fixture
+    '''
+
+    results = []
+
+    for fixture in FIXTURES:
+        for name, prepare, batch in logicBenchmarks(fixture) + renderBenchmarks(fixture):
+            if names is None or name in names:
+                results.append({'name' : name, 'fixture' : fixture, **measure(prepare, samples, batch)})
+
+    return results
+
+def gitCommit():
+    '''Returns the hash of the checked out git commit, or None if it can't be found'''
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == '__main__':
+    '''Runs the benchmarks, printing a table of their results and optionally writing them to, or comparing them with, a JSON file'''
+
+    parser = argparse.ArgumentParser(description='Benchmarks the game logic and renderer')
+    parser.add_argument('--samples', type=int, default=200, help='the quantity of samples per benchmark')
+    parser.add_argument('--only', nargs='+', default=None, help='the names of the benchmarks to run')
+    parser.add_argument('--output', default=None, help='the JSON file to write the results to')
+    parser.add_argument('--compare', default=None, help='a JSON file of earlier results to compare with')
+    args = parser.parse_args()
+
+    report = {
+        'commit' : gitCommit(),
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'time' : time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results' : runBenchmarks(args.samples, args.only)
+    }
+
+    baseline = {}
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = {(result['name'], result['fixture']) : result for result in json.load(file)['results']}
+
+    for result in report['results']:
+        line = f"{result['name']:<16} {result['fixture']:<14} {result['ops_per_sec']:>12.0f} ops/s  p50 {result['p50_us']:>9.2f}us  p90 {result['p90_us']:>9.2f}us  p99 {result['p99_us']:>9.2f}us"
+        old = baseline.get((result['name'], result['fixture']))
+
+        if old is not None:
+            line += f"  {result['ops_per_sec'] / old['ops_per_sec']:>6.2f}x"
+
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
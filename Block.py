@@ -3,6 +3,68 @@
 # Bootleg Tetris
 # To create a multiplayer Tetris experience
 
+def _buildPieces(shapes, cols):
+    '''Precomputes, for every block type, rotational state and column offset at which the block fits between the grid's side walls, the cells and row occupancy bitmasks the block covers and the bottom profile of the block
+
+    Parameters:
+        - shapes : A dictionary mapping each block type to its respectively ordered rotational states
+        - cols : The number of columns in a grid
+
+    Returns:
+        dict : A dictionary mapping each block type to a list, indexed by rotational state, of dictionaries mapping each column offset to a tuple of the cells, as (row, column) pairs relative to the row offset, followed by a tuple of (row, mask) pairs relative to the row offset and a tuple of the (column, row) of the lowest cell in each column, relative to the row offset
+    '''
+
+    pieces = {}
+
+    for block_type, rot_states in shapes.items():
+        pieces[block_type] = []
+
+        for base_coords in rot_states:
+            by_col = {}
+
+            for col_offset in range(-cols, cols):
+                cells = tuple((coords[0], coords[1] + col_offset) for coords in base_coords)
+
+                # Skipping column offsets that leave the grid's side walls
+                if not all(0 <= cell[1] < cols for cell in cells):
+                    continue
+
+                masks = {}
+                bottoms = {}
+
+                for cell in cells:
+                    masks[cell[0]] = masks.get(cell[0], 0) | 1 << cell[1]
+                    bottoms[cell[1]] = max(bottoms.get(cell[1], cell[0]), cell[0])
+
+                by_col[col_offset] = (cells, tuple(sorted(masks.items())), tuple(sorted(bottoms.items())))
+
+            pieces[block_type].append(by_col)
+
+    return pieces
+
+def _flattenKicks(shapes, std_offsets, i_offsets):
+    '''Flattens the offsets tried when rotating each block type into a single dictionary
+
+    Parameters:
+        - shapes : A dictionary mapping each block type to its respectively ordered rotational states
+        - std_offsets : The offsets of the general block, indexed by old and then new rotational state
+        - i_offsets : The offsets of the I-block, indexed by old and then new rotational state
+
+    Returns:
+        dict : A dictionary mapping each (block type, old rotational state, new rotational state) to its tuple of (column, row) offsets
+    '''
+
+    kicks = {}
+
+    for block_type, rot_states in shapes.items():
+        offsets = i_offsets if block_type == 'i' else std_offsets
+
+        for old_state in range(len(rot_states)):
+            for new_state in range(len(rot_states)):
+                kicks[block_type, old_state, new_state] = tuple(offsets[old_state][new_state])
+
+    return kicks
+
 class Block:
     ''' A collection of cells on a grid in the form of various tetrominoes in which the player can manipulate and control
     
@@ -20,9 +82,15 @@ class Block:
         - WHITE : The rgb value for white
         - BLACK : The rgb value for cyan
         - COLOURS : A dictionary matching various block types with their respective colours
+        - EMPTY : The code of an empty cell
+        - GARBAGE : The code of a garbage cell, which is also that of the "?" block
+        - CODES : A dictionary matching each block type with the code of its cells, 1 to 7 following the order of Grid.BLOCKS, the same values as BatchSimulator's
+        - PALETTE : The colour of each cell code, only looked up when cells are drawn
         - __SHAPES : A dictionary mapping each block type to its respectively ordered rotational states
         - __STD_OFFSETS : A dictionary of block offsets used to find a valid block position near its current position immediately following the mapping of the old rotational state of the general block to its new rotation
         - __I_OFFSETS : A dictionary of block offsets used to find a valid block position near its current position immediately following the mapping of the old rotational state of the I-block to its new rotation
+        - __PIECES : A table, generated once at import, mapping each block type, rotational state and column offset to the cells and row occupancy bitmasks the block covers and the lowest cell of each of its columns
+        - __KICKS : A table, generated once at import, mapping each (block type, old rotational state, new rotational state) to the offsets tried when rotating
 
     Attributes:
         - __grid : The grid object that the block will be drawn on
@@ -31,7 +99,10 @@ class Block:
         - __row_offset : The number of rows the block is from its original starting row
         - __col_offset : The number of columns the block is from its original starting column
         - colour : The colour of the block
+        - code : The code of the block's cells, as drawn on a grid
     '''
+
+    __slots__ = ('__grid', '__block_type', '__rot_state', '__row_offset', '__col_offset', 'colour', 'code')
     
     ROWS = 20
     COLS = 10
@@ -58,6 +129,12 @@ class Block:
         '?' : GRAY
     }
 
+    EMPTY = 0
+    GARBAGE = 8
+
+    CODES = {'i' : 1, 'j' : 2, 'l' : 3, 's' : 4, 'z' : 5, 't' : 6, 'o' : 7, '?' : GARBAGE}
+    PALETTE = (BLACK, CYAN, BLUE, ORANGE, GREEN, RED, MAGENTA, YELLOW, GRAY)
+
     __SHAPES = {
         'i': [
             [[1, 0], [1, 1], [1, 2], [1, 3]],
@@ -160,6 +237,9 @@ class Block:
         }
     }
 
+    __PIECES = _buildPieces(__SHAPES, COLS)
+    __KICKS = _flattenKicks(__SHAPES, __STD_OFFSETS, __I_OFFSETS)
+
     def __init__(self, block_type, grid, rot_state=0):
         '''Constructs a Block object whose grid is *grid*, block type is *block_type*, rotation state is *rot_state*, is offset by 3 columns and whose colour is determined by its block type'''
 
@@ -218,10 +298,27 @@ class Block:
         return self.__move(col=1)
     
     def hardDrop(self):
-        '''Continuously moves the block down with the moveDown method until the block cannot move down anymore and locks the block in place'''
+        '''Moves the block straight down to where it lands, found with the dropDistance method rather than by moving it down a row at a time, and locks the block in place. Restarts the lock countdown timer and turns it off if the block moved, like moveDown. If the block doesn't fit where it is, it is locked in place without moving'''
+
+        self.eraseBlock()
 
-        while self.moveDown():
-            pass
+        # Locking the block where it is if it overlaps the stack, as moveDown does, since dropDistance assumes it fits
+        if not self.collisionDetect():
+            self.__grid.instantLock()
+
+            return
+
+        distance = Block.dropDistance(self.__grid.getColumnBits(), self.__block_type, self.__rot_state, self.__row_offset, self.__col_offset)
+
+        if distance:
+            self.__row_offset += distance
+
+            # Resetting auto-lock timers
+            self.__grid.drop_counter = 0
+            self.__grid.timer_running = False
+            self.__grid.timer = 0
+
+        self.__grid.instantLock()
     
     def rotCW(self):
         '''Rotates the block clockwise by 90 degrees if the block can rotate using the rotate method'''
@@ -253,15 +350,13 @@ class Block:
         self.__rot_state += rot_state_change
         self.__rot_state %= len(Block.__SHAPES[self.__block_type])
 
-        # Getting block-type dependant offsets
-        offsets = Block.__I_OFFSETS if self.__block_type == 'i' else Block.__STD_OFFSETS
-
-        # Performing collision detections
-        for offset in offsets[old_state][self.__rot_state]:
+        # Performing collision detections with the block-type dependant offsets
+        for offset in Block.__KICKS[self.__block_type, old_state, self.__rot_state]:
             if self.collisionDetect(r_off=offset[1], c_off=offset[0]):
                 
                 # Rotation successful; shifting block
-                self.__move(row=offset[1], col=offset[0])
+                self.__row_offset -= offset[1]
+                self.__col_offset += offset[0]
 
                 self.__grid.drawBlock()
                 
@@ -286,32 +381,72 @@ class Block:
         return True
     
     def collisionDetect(self, r_off=0, c_off=0):
-        '''Temporarily offsets the block by the *r_off* and *c_off* to get the coordinates at that position and checks if the coordinates of that possition are within the grid and if they overlap with existing blocks. If they overlap or are not in the grid, it returns False, otherwise it returns True'''
+        '''Temporarily offsets the block by the *r_off* and *c_off* and checks if the block at that possition is within the grid and if it overlaps with existing blocks, using the fits method with the grid's row occupancy bitmasks. If they overlap or are not in the grid, it returns False, otherwise it returns True'''
 
-        # Temporarily offsetting block
-        self.__row_offset -= r_off
-        self.__col_offset += c_off
+        return Block.fits(self.__grid.getOccupancy(), self.__block_type, self.__rot_state, self.__row_offset - r_off, self.__col_offset + c_off)
 
-        # Getting new offset cell coordinates
-        coordinates = self.getCoords()
+    @staticmethod
+    def fits(occupancy, block_type, rot_state, row_offset, col_offset):
+        '''Checks if a block of type *block_type* in rotational state *rot_state* at *row_offset* and *col_offset* is within the grid and doesn't overlap any filled cell, by masking the row occupancy bitmasks *occupancy* with the block's precomputed row bitmasks
 
-        # Resetting block offset
-        self.__row_offset += r_off
-        self.__col_offset -= c_off
-        
-        # Performing collision detection with new cell coordinates
-        for coords in coordinates:
+        Returns:
+            bool : True if the block fits, False otherwise
+        '''
+
+        piece = Block.__PIECES[block_type][rot_state].get(col_offset)
+
+        # Checking if block position is within the grid's side walls
+        if piece is None:
+            return False
+
+        for row, mask in piece[1]:
+            row += row_offset
 
-            # Checking if block position is in grid boundaries
-            if not (0 <= coords[0] < Block.ROWS and 0 <= coords[1] < Block.COLS):
+            # Checking if block position is within the grid's floor and ceiling
+            if not 0 <= row < Block.ROWS:
                 return False
             
             # Searching for non-empty spaces
-            elif self.__grid.getCell(coords[0], coords[1])[1] != Block.BLACK:
+            elif occupancy[row] & mask:
                 return False
 
         return True
     
+    @staticmethod
+    def dropDistance(column_bits, block_type, rot_state, row_offset, col_offset):
+        '''Returns how many rows a block of type *block_type* in rotational state *rot_state* at *row_offset* and *col_offset* can fall before landing, by finding the first filled cell below the lowest cell of each of the block's columns in the column occupancy bitmasks *column_bits*. Since every column of a block is unbroken, only the lowest cells can land on anything. The block must fit where it is
+
+        Returns:
+            int : The quantity of rows the block can fall
+        '''
+
+        distance = Block.ROWS
+
+        for col, row in Block.__PIECES[block_type][rot_state][col_offset][2]:
+            row += row_offset
+            below = column_bits[col] >> (row + 1)
+
+            # Falling to the first filled cell below, or to the floor
+            if below:
+                distance = min(distance, (below & -below).bit_length() - 1)
+            else:
+                distance = min(distance, Block.ROWS - 1 - row)
+
+        return distance
+
+    @staticmethod
+    def toColumnBits(occupancy):
+        '''Returns the column occupancy bitmasks of a grid with the row occupancy bitmasks *occupancy*, in which bit r of column c is set if the cell at (r, c) is filled'''
+
+        column_bits = [0] * Block.COLS
+
+        for row, mask in enumerate(occupancy):
+            while mask:
+                column_bits[(mask & -mask).bit_length() - 1] |= 1 << row
+                mask &= mask - 1
+
+        return column_bits
+
     def getBlockType(self):
         '''Returns the block type
         
@@ -322,15 +457,60 @@ class Block:
         return self.__block_type
 
     def eraseBlock(self):
-        '''Removes the block from the grid by changing all the cells back to black'''
+        '''Removes the block from the grid by emptying all the cells'''
 
-        for coords in self.getCoords():
-            self.__grid.setCell(coords[0], coords[1], Block.BLACK)
+        self.fillBlock(Block.EMPTY)
+
+    def fillBlock(self, code):
+        '''Sets every cell of the grid the block currently covers to *code*, using the block's precomputed cells
+        
+        Parameters:
+            - code : The code the cells are to be set to
+        '''
+
+        row_offset = self.__row_offset
+
+        for row, col in Block.__PIECES[self.__block_type][self.__rot_state][self.__col_offset][0]:
+            self.__grid.setCell(row + row_offset, col, code)
 
     def getCoords(self):
         '''Returns the current coordinates of the block'''
 
-        return [[base_coords[0] + self.__row_offset, base_coords[1] + self.__col_offset] for base_coords in Block.__SHAPES[self.__block_type][self.__rot_state]]
+        return [[cell[0] + self.__row_offset, cell[1]] for cell in Block.__PIECES[self.__block_type][self.__rot_state][self.__col_offset][0]]
+
+    @staticmethod
+    def getShape(block_type, rot_state):
+        '''Returns the cells of a block of type *block_type* in rotational state *rot_state*, as (row, column) pairs relative to the block's row and column offsets'''
+
+        return tuple(tuple(coords) for coords in Block.__SHAPES[block_type][rot_state])
+
+    @staticmethod
+    def getRotationCount(block_type):
+        '''Returns the quantity of rotational states of a block of type *block_type*'''
+
+        return len(Block.__SHAPES[block_type])
+
+    @staticmethod
+    def getKicks(block_type, old_state, new_state):
+        '''Returns the (column, row) offsets tried, in order, when rotating a block of type *block_type* from rotational state *old_state* to *new_state*. A positive row offset moves the block up'''
+
+        return Block.__KICKS[block_type, old_state, new_state]
+
+    def getState(self):
+        '''Returns the block's type, rotational state and offsets, which setState restores
+        
+        Returns:
+            tuple : The (block type, rotational state, row offset, column offset) of the block
+        '''
+
+        return (self.__block_type, self.__rot_state, self.__row_offset, self.__col_offset)
+
+    def setState(self, state):
+        '''Restores the block's type, rotational state and offsets from *state*, as returned by getState, without drawing it'''
+
+        self.__block_type, self.__rot_state, self.__row_offset, self.__col_offset = state
+        self.colour = Block.COLOURS[self.__block_type]
+        self.code = Block.CODES[self.__block_type]
 
     def resetBlock(self, block_type, rot_state=0):
         '''Resets the block by changing block type to *block_type*, rotation state to *rot_state* and other attributes to their base values'''
@@ -340,6 +520,7 @@ class Block:
         self.__row_offset = 0
         self.__col_offset = 3
         self.colour = Block.COLOURS[self.__block_type]
+        self.code = Block.CODES[self.__block_type]
     
     def __str__(self):
         '''str override '''
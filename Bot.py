@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import random
+from Match import Match
+
+class Bot:
+    ''' A computer player of a headless match. Each tick, the bot is asked for the actions its player performs before the match advances
+
+    Attributes:
+        - random : The random generator the bot must use for any randomness, so that seeded matches can be reproduced
+    '''
+
+    def __init__(self, seed=None):
+        '''Constructs a Bot object whose random generator is seeded with *seed*'''
+
+        self.random = random.Random(seed)
+
+    def getActions(self, match, player):
+        '''Returns the actions the bot performs this tick
+
+        Parameters:
+            - match : The match being played
+            - player : The index of the bot's grid in the match
+
+        Returns:
+            list : The names of the actions to perform, each one of Match.ACTIONS
+        '''
+
+        raise NotImplementedError
+
+    def __repr__(self):
+        '''repr override'''
+        return f'{type(self).__name__}()'
+
+class RandomBot(Bot):
+    ''' A bot pressing a random key every so often, used as a baseline to rank other bots against
+
+    Static Attributes:
+        - ACTION_CHANCE : The chance of the bot performing an action on any tick
+    '''
+
+    ACTION_CHANCE = 0.2
+
+    def getActions(self, match, player):
+        '''Returns a random action or, most of the time, no action'''
+
+        if self.random.random() < RandomBot.ACTION_CHANCE:
+            return [self.random.choice(Match.ACTIONS)]
+
+        return []
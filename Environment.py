@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import numpy as np
+from Block import Block
+from Grid import Grid
+from Match import Match
+from PlacementFinder import PlacementFinder
+
+def _buildPlacements(blocks, cols):
+    '''Lists every (rotational state, column offset) at which any block type fits between the grid's side walls
+
+    Parameters:
+        - blocks : The block types
+        - cols : The number of columns in a grid
+
+    Returns:
+        tuple : The sorted (rotational state, column offset) pairs
+    '''
+
+    placements = set()
+
+    for block_type in blocks:
+        for rot_state in range(Block.getRotationCount(block_type)):
+            shape = Block.getShape(block_type, rot_state)
+
+            for col_offset in range(-cols, cols):
+                if all(0 <= col + col_offset < cols for _, col in shape):
+                    placements.add((rot_state, col_offset))
+
+    return tuple(sorted(placements))
+
+class Environment:
+    ''' A reinforcement learning environment of a match, in the style of Gym, in which an agent plays the first grid. Each step performs one action and then advances the match by one tick. An action is either a key action, one of ACTIONS, or a placement, which performs every key press needed to drop the current block at a rotational state and column offset. The observation is a NumPy array allocated once and updated in place each step, only for the cells that changed, so it must be copied to be kept
+
+    Static Attributes:
+        - ACTIONS : The names of the key actions, the actions of Match.ACTIONS following "wait", which performs nothing
+        - PLACEMENTS : The (rotational state, column offset) of each placement, whose action is its index plus the quantity of key actions
+        - ACTION_COUNT : The quantity of actions
+        - PREVIEW : The quantity of upcoming blocks observed
+        - BOARD_SIZE : The quantity of cells in a grid
+        - OBSERVATION_SIZE : The length of an observation: the board, the current block's type, rotational state, row offset and column offset, the held block's type, the preview of upcoming block types and the lines received
+        - TYPE_CODES : A dictionary mapping each block type to its value in the observation, "?" being 0
+
+    Attributes:
+        - match : The match being played
+        - opponent : The bot playing the second grid, or None to let its blocks fall
+        - max_ticks : The quantity of ticks after which an episode is cut short, or None for no limit
+        - observation : The observation array, of OBSERVATION_SIZE 16-bit integers
+        - board : The (ROWS, COLS) view of the observation holding each cell's code, as in Block.CODES, not counting the current block unless the grid lost
+        - piece : The view of the observation holding the current block's type, rotational state, row offset and column offset
+        - preview : The view of the observation holding the types of the upcoming blocks
+        - action_mask : The boolean array of which actions are possible, filled in by getActionMask
+        - __finder : The placement finder used for placement actions
+        - __placements : A dictionary mapping the action of each placement the current block can reach from where it is to the key actions performing it
+        - __placements_key : The hash of the agent's grid, as returned by Grid.getHash, when __placements was found, or None
+        - __piece_cells : The cells of the current block as last observed
+        - __score : The agent's score when last observed
+        - __lines : The agent's quantity of lines cleared when last observed
+    '''
+
+    ACTIONS = ('wait',) + Match.ACTIONS
+    PLACEMENTS = _buildPlacements(Grid.BLOCKS, Grid.COLS)
+    ACTION_COUNT = len(ACTIONS) + len(PLACEMENTS)
+
+    PREVIEW = 5
+    BOARD_SIZE = Grid.ROWS * Grid.COLS
+    OBSERVATION_SIZE = BOARD_SIZE + 4 + 1 + PREVIEW + 1
+
+    TYPE_CODES = {block_type : code for code, block_type in enumerate(['?'] + Grid.BLOCKS)}
+
+    __PLACEMENT_INDICES = {placement : index for index, placement in enumerate(PLACEMENTS, len(ACTIONS))}
+
+    def __init__(self, seed=None, opponent=None, max_ticks=None, observation=None, finder=None):
+        '''Constructs an Environment object
+
+        Parameters:
+            - seed : The seed of the match, or None to pick one at random
+            - opponent : The bot class playing the second grid, seeded from *seed*, or None to let its blocks fall
+            - max_ticks : The quantity of ticks after which an episode is cut short, or None for no limit
+            - observation : The array of OBSERVATION_SIZE 16-bit integers to write observations into, such as a row of a batch's array, or None to allocate one
+            - finder : The placement finder to use, which may be shared between environments, or None for a new one
+        '''
+
+        self.match = Match(seed)
+        self.opponent = opponent(self.match.seed) if opponent is not None else None
+        self.max_ticks = max_ticks
+        self.observation = observation if observation is not None else np.zeros(Environment.OBSERVATION_SIZE, dtype=np.int16)
+        self.board = self.observation[:Environment.BOARD_SIZE].reshape(Grid.ROWS, Grid.COLS)
+        self.piece = self.observation[Environment.BOARD_SIZE:Environment.BOARD_SIZE + 4]
+        self.preview = self.observation[Environment.BOARD_SIZE + 5:Environment.BOARD_SIZE + 5 + Environment.PREVIEW]
+        self.action_mask = np.ones(Environment.ACTION_COUNT, dtype=bool)
+        self.__finder = finder if finder is not None else PlacementFinder()
+        self.__placements = {}
+        self.__placements_key = None
+        self.__piece_cells = ()
+        self.__score = 0
+        self.__lines = 0
+
+        self.match.grids[0].trackChanges()
+
+    def reset(self):
+        '''Starts a new episode, resetting the match but not its random generator
+
+        Returns:
+            numpy.ndarray : The observation array
+        '''
+
+        self.match.makeCurrent()
+        self.match.reset()
+
+        self.observation[:] = 0
+        self.__piece_cells = ()
+        self.__score = 0
+        self.__lines = 0
+
+        self.__observe()
+
+        return self.observation
+
+    def step(self, action):
+        '''Performs *action* and advances the match by one tick
+
+        Parameters:
+            - action : The index of the action, below ACTION_COUNT. Impossible placements perform nothing
+
+        Returns:
+            tuple : The observation array, the reward, which is the score gained, whether the episode is over, and a dictionary holding the lines cleared this step and whether the agent won
+        '''
+
+        match = self.match
+        grid = match.grids[0]
+
+        match.makeCurrent()
+
+        if action < len(Environment.ACTIONS):
+            if action:
+                match.act(0, Environment.ACTIONS[action])
+        else:
+            for key_action in self.__getPlacements().get(action, ()):
+                match.act(0, key_action)
+
+        if self.opponent is not None:
+            for opponent_action in self.opponent.getActions(match, 1):
+                match.act(1, opponent_action)
+
+        match.tick()
+
+        self.__observe()
+
+        reward = grid.score - self.__score
+        lines = grid.getLinesCleared() - self.__lines
+
+        self.__score = grid.score
+        self.__lines = grid.getLinesCleared()
+
+        done = match.isOver() or (self.max_ticks is not None and match.ticks >= self.max_ticks)
+
+        return self.observation, reward, done, {'lines' : lines, 'win' : grid.win}
+
+    def getActionMask(self):
+        '''Fills in action_mask with which actions are possible: every key action, and the placements the current block can reach from where it is
+
+        Returns:
+            numpy.ndarray : The action mask
+        '''
+
+        self.action_mask[len(Environment.ACTIONS):] = False
+
+        for action in self.__getPlacements():
+            self.action_mask[action] = True
+
+        return self.action_mask
+
+    def __getPlacements(self):
+        '''Returns the placements the current block can reach from where it is, as a dictionary mapping each placement's action to its key actions. They are only searched for again once the grid's hash changes, such as when a block spawns or moves, so masking the actions and then performing one searches once
+
+        Returns:
+            dict : The key actions of each reachable placement, by action
+        '''
+
+        grid = self.match.grids[0]
+        key = grid.getHash()
+
+        if key != self.__placements_key:
+            self.__placements = {}
+            self.__placements_key = key
+
+            # Keeping the first placement found at each rotational state and column offset, the one reached with the fewest actions
+            for rot_state, _, col_offset, actions in self.__finder.getGridPlacements(grid, from_current=True):
+                self.__placements.setdefault(Environment.__PLACEMENT_INDICES[rot_state, col_offset], actions)
+
+        return self.__placements
+
+    def __observe(self):
+        '''Updates the observation from the agent's grid: the board only at the cells that changed and those the current block moved from or to, followed by the current and held blocks, the preview and the lines received'''
+
+        grid = self.match.grids[0]
+        board = self.board
+        block_type, rot_state, row_offset, col_offset = grid.block.getState()
+
+        # A lost grid's last block overlaps the stack, so it is observed as cells
+        piece_cells = () if grid.lose else grid.block.getCoords()
+
+        for row, col in self.__piece_cells:
+            board[row, col] = grid.getCellCode(row, col)
+
+        for row, col in grid.dirty_cells:
+            board[row, col] = grid.getCellCode(row, col)
+
+        for row, col in piece_cells:
+            board[row, col] = 0
+
+        grid.dirty_cells.clear()
+        self.__piece_cells = piece_cells
+
+        observation = self.observation
+        index = Environment.BOARD_SIZE
+
+        observation[index:index + 4] = (Environment.TYPE_CODES[block_type], rot_state, row_offset, col_offset)
+        observation[index + 4] = Environment.TYPE_CODES[grid.hold.getBlockType()]
+
+        for i, upcoming in enumerate(self.match.queue.peek(0, Environment.PREVIEW)):
+            self.preview[i] = Environment.TYPE_CODES[upcoming]
+
+        observation[-1] = grid.lines_received
+
+    def __repr__(self):
+        '''repr override'''
+        return f'Environment(seed={self.match.seed}, opponent={self.opponent!r}, max_ticks={self.max_ticks})'
+
+class EnvironmentBatch:
+    ''' Many environments stepped together, whose observations are the rows of one preallocated array, so a whole batch is observed without copying. Environments whose episode ends are reset straight away, so their row holds the first observation of their next episode
+
+    Attributes:
+        - environments : The environments
+        - observations : The (size, OBSERVATION_SIZE) array of every environment's observation
+        - rewards : The reward of each environment on the last step
+        - dones : Whether each environment's episode ended on the last step
+    '''
+
+    def __init__(self, size, seed=0, opponent=None, max_ticks=None, observations=None, rewards=None, dones=None):
+        '''Constructs an EnvironmentBatch object of *size* environments seeded from *seed* onwards, whose other parameters are those of Environment. The observations, rewards and dones arrays can be given, such as views of shared memory, or are otherwise allocated'''
+
+        finder = PlacementFinder()
+
+        self.observations = observations if observations is not None else np.zeros((size, Environment.OBSERVATION_SIZE), dtype=np.int16)
+        self.rewards = rewards if rewards is not None else np.zeros(size, dtype=np.int64)
+        self.dones = dones if dones is not None else np.zeros(size, dtype=bool)
+        self.environments = [Environment(seed + i, opponent, max_ticks, self.observations[i], finder) for i in range(size)]
+
+    def reset(self):
+        '''Starts a new episode in every environment
+
+        Returns:
+            numpy.ndarray : The observations array
+        '''
+
+        for environment in self.environments:
+            environment.reset()
+
+        return self.observations
+
+    def stepMany(self, actions):
+        '''Steps each environment with its action in *actions*, resetting those whose episode ended
+
+        Returns:
+            tuple : The observations array, the rewards array, the dones array and a list of each environment's info dictionary
+        '''
+
+        infos = []
+
+        for i, (environment, action) in enumerate(zip(self.environments, actions)):
+            _, self.rewards[i], self.dones[i], info = environment.step(action)
+
+            if self.dones[i]:
+                environment.reset()
+
+            infos.append(info)
+
+        return self.observations, self.rewards, self.dones, infos
+
+    def __len__(self):
+        '''len override'''
+        return len(self.environments)
+
+    def __repr__(self):
+        '''repr override'''
+        return f'EnvironmentBatch({len(self.environments)})'
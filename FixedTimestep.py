@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import time
+
+class FixedTimestep:
+    ''' An accumulator turning the real time passed between frames into a whole number of fixed-length logic ticks, so that the game runs at the same speed however fast frames are drawn. Since the game logic only ever advances in whole ticks, a given input log always gives the same results
+
+    Attributes:
+        - rate : The quantity of ticks per second, or None to run uncapped
+        - max_ticks : The maximum quantity of ticks run per frame; when uncapped, exactly this many ticks are run per frame
+        - __clock : The function returning the current time in seconds
+        - __last_time : The time at which ticks were last counted
+        - __accumulator : The quantity of seconds passed that haven't been turned into ticks yet
+    '''
+
+    def __init__(self, rate=60, max_ticks=5, clock=time.perf_counter):
+        '''Constructs a FixedTimestep object running *rate* ticks per second, or uncapped if *rate* is None, and at most *max_ticks* ticks per frame, timed by *clock*'''
+
+        self.rate = rate
+        self.max_ticks = max_ticks
+        self.__clock = clock
+        self.__last_time = clock()
+        self.__accumulator = 0.0
+
+    def advance(self):
+        '''Returns the quantity of ticks to run this frame, which is the quantity of whole ticks that passed since the last call. Time that would run more than max_ticks ticks is dropped, slowing the game down rather than freezing it once it can't keep up
+
+        Returns:
+            int : The quantity of ticks to run
+        '''
+
+        now = self.__clock()
+
+        if self.rate is None:
+            self.__last_time = now
+            return self.max_ticks
+
+        step = 1 / self.rate
+
+        self.__accumulator = min(self.__accumulator + now - self.__last_time, step * (self.max_ticks + 1))
+        self.__last_time = now
+
+        ticks = min(int(self.__accumulator / step), self.max_ticks)
+        self.__accumulator -= ticks * step
+
+        return ticks
+
+    def isBehind(self):
+        '''Returns whether a whole tick is still due after the last call to advance, meaning the frames are taking longer than the ticks they run'''
+
+        return self.rate is not None and self.__accumulator * self.rate >= 1
+
+    def getAlpha(self):
+        '''Returns how far, from 0 to 1, the time is between the last tick run and the next one, for interpolating what is drawn'''
+
+        if self.rate is None:
+            return 0.0
+
+        return min(self.__accumulator * self.rate, 1.0)
+
+    def __repr__(self):
+        '''repr override'''
+        return f'FixedTimestep(rate={self.rate}, max_ticks={self.max_ticks})'
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import json
+import time
+from Block import Block
+
+class FrameProfiler:
+    ''' Times each phase of every frame of the game loop, keeping the most recent frames in a ring buffer so that stutters can be found while playing, through an on-screen overlay, or afterwards, through a dump to a file
+
+    Static Attributes:
+        - PHASES : The names of the phases of a frame, in the order they run
+        - OVERLAY_SIZE : The font size of the overlay
+
+    Attributes:
+        - budget : The quantity of seconds a frame may take before it is over budget
+        - frames : The quantity of frames recorded since construction
+        - over_budget : The quantity of frames recorded since construction that went over budget
+        - __capacity : The quantity of frames kept in the ring buffer
+        - __records : The ring buffer, holding the duration of each phase of each kept frame
+        - __current : The phase durations of the frame being recorded
+        - __phase : The index of the next phase to be marked
+        - __last_mark : The time at which the last phase ended
+    '''
+
+    PHASES = ('input', 'logic', 'draw', 'flip')
+    OVERLAY_SIZE = 18
+
+    def __init__(self, capacity=600, budget=1/60):
+        '''Constructs a FrameProfiler object keeping the last *capacity* frames, each with a budget of *budget* seconds'''
+
+        self.budget = budget
+        self.frames = 0
+        self.over_budget = 0
+        self.__capacity = capacity
+        self.__records = [None] * capacity
+        self.__current = [0.0] * len(FrameProfiler.PHASES)
+        self.__phase = 0
+        self.__last_mark = time.perf_counter()
+
+    def beginFrame(self):
+        '''Starts timing a new frame, whose first phase begins now'''
+
+        self.__phase = 0
+        self.__last_mark = time.perf_counter()
+
+    def mark(self):
+        '''Ends the current phase of the frame, which started when the last phase ended, and begins the next one'''
+
+        now = time.perf_counter()
+
+        self.__current[self.__phase] = now - self.__last_mark
+        self.__phase += 1
+        self.__last_mark = now
+
+    def endFrame(self):
+        '''Stores the phase durations of the current frame in the ring buffer, overwriting the oldest frame once it is full'''
+
+        record = tuple(self.__current)
+
+        self.__records[self.frames % self.__capacity] = record
+        self.frames += 1
+
+        if sum(record) > self.budget:
+            self.over_budget += 1
+
+    def getFrames(self):
+        '''Returns the phase durations, in seconds, of each frame kept in the ring buffer, from oldest to newest'''
+
+        if self.frames <= self.__capacity:
+            return self.__records[:self.frames]
+
+        start = self.frames % self.__capacity
+
+        return self.__records[start:] + self.__records[:start]
+
+    def getSummary(self):
+        '''Returns a dictionary of the frame counts and of the mean and maximum duration, in seconds, of each phase and of whole frames over the ring buffer'''
+
+        records = self.getFrames()
+        summary = {'frames' : self.frames, 'over_budget' : self.over_budget, 'budget' : self.budget}
+
+        if not records:
+            return summary
+
+        for index, phase in enumerate(FrameProfiler.PHASES + ('frame',)):
+            if phase == 'frame':
+                durations = [sum(record) for record in records]
+            else:
+                durations = [record[index] for record in records]
+
+            summary[phase] = {'mean' : sum(durations) / len(durations), 'max' : max(durations)}
+
+        return summary
+
+    def drawOverlay(self, surface, text_cache, x=5, y=5):
+        '''Draws the mean and maximum duration of each phase, in microseconds, and the quantity of frames over budget onto *surface*, blanking the area behind it first
+
+        Parameters:
+            - surface : The surface to draw on
+            - text_cache : The TextCache used to render the text
+            - x : The x coordinate of the overlay's top-left corner
+            - y : The y coordinate of the overlay's top-left corner
+
+        Returns:
+            pygame.Rect : The area of the surface drawn on
+        '''
+
+        summary = self.getSummary()
+        size = FrameProfiler.OVERLAY_SIZE
+        line_height = text_cache.getFont(size).get_linesize()
+
+        # Blanking the previous overlay, whose numbers may have been wider
+        rect = surface.fill(Block.BLACK, (x, y, 150, line_height * (len(FrameProfiler.PHASES) + 2)))
+
+        for phase in FrameProfiler.PHASES + ('frame',):
+            if phase in summary:
+                label = text_cache.render(phase, size, Block.WHITE)
+                surface.blit(label, (x, y))
+
+                text_cache.blitNumber(surface, round(summary[phase]['mean'] * 1e6), (x + 45, y), size, Block.WHITE)
+                text_cache.blitNumber(surface, round(summary[phase]['max'] * 1e6), (x + 95, y), size, Block.WHITE)
+
+            y += line_height
+
+        surface.blit(text_cache.render('slow', size, Block.WHITE), (x, y))
+        text_cache.blitNumber(surface, self.over_budget, (x + 45, y), size, Block.WHITE)
+
+        return rect
+
+    def dump(self, path):
+        '''Writes the summary and the phase durations of every frame in the ring buffer to the JSON file at *path*'''
+
+        with open(path, 'w') as file:
+            json.dump({
+                'phases' : FrameProfiler.PHASES,
+                'summary' : self.getSummary(),
+                'frames' : self.getFrames()
+            }, file)
+
+    def __repr__(self):
+        '''repr override'''
+        return f'FrameProfiler(capacity={self.__capacity}, budget={self.budget})'
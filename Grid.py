@@ -4,34 +4,65 @@
 # To create a multiplayer Tetris experience
 
 # import necessary modules
-import pygame
 from Block import Block
-from random import randint
+from PieceQueue import PieceQueue
+import random
+import struct
+
+def _buildZobristKeys(codes, block_types, rows, cols, seed):
+    '''Generates the random keys of the Zobrist hash of a grid, from a fixed seed so that hashes are the same every run
+
+    Parameters:
+        - codes : The quantity of codes a cell can have, 0 being that of an empty cell
+        - block_types : The block types, including "?"
+        - rows : The number of rows in a grid
+        - cols : The number of columns in a grid
+        - seed : The seed of the random keys
+
+    Returns:
+        dict : A dictionary holding "cells", listing for each code the key of each cell, indexed by row * cols + column, 0 for an empty cell; "types", "rotations", "row offsets" and "column offsets", keyed by the current block's type, rotational state, row offset plus 2 and column offset plus cols; "holds", the key of each held block type; "held", the key of having held a block; and "queue", an odd multiplier of the queue position
+    '''
+
+    rng = random.Random(seed)
+
+    def key():
+        return rng.getrandbits(64)
+
+    return {
+        'cells' : [[0 if code == 0 else key() for _ in range(rows * cols)] for code in range(codes)],
+        'types' : {block_type : key() for block_type in block_types},
+        'rotations' : [key() for _ in range(4)],
+        'row offsets' : [key() for _ in range(rows + 3)],
+        'column offsets' : [key() for _ in range(2 * cols)],
+        'holds' : {block_type : key() for block_type in block_types},
+        'held' : key(),
+        'queue' : key() | 1
+    }
 
 class Grid:
-    """ A coloured grid of square cells in which player interactions with the game are possible.
+    """ A coloured grid of square cells in which player interactions with the game are possible. Contains only the game logic, so it can be simulated without a display; see GridView for drawing it
 
     Static attributes:
         - COLS : The number of columns in the grid
         - ROWS : The number of rows in the grid
+        - FULL_ROW : The occupancy bitmask of a row with every cell filled
         - GRIDS : A list of each instance of Grid
         - BLOCKS : A list of the possible block types (e.g., I-block)
-        - NEXT_BLOCKS : The list used in the generation of  
-        - LEVEL : The game's current level
-        - SPEED : The game's current soft drop rate
+        - QUEUE : The queue of blocks shared by every grid, which a match replaces with its own
+        - RANDOM : The random generator used to generate blocks and garbage, which a match replaces with its own seeded generator so that it can be reproduced
+        - START_SPEED : The soft drop rate of a grid on level 0
+        - HASH_MASK : The mask keeping hashes to 64 bits
+        - SNAPSHOT_SIZE : The length in bytes of a snapshot
         - __SCORE : The scoring increment values based on the quantity of lines immediately cleared
+        - __ZOBRIST : The random keys of the Zobrist hash, as generated by _buildZobristKeys
+        - __CELL_KEYS : The Zobrist keys of the cells, kept apart from the other keys since setCell looks them up
+        - __SNAPSHOT : The struct format of a snapshot: the occupancy bitmasks of the rows and columns, the full rows, the highest filled row and the board's hash, which are stored so that they needn't be recomputed, the current block's type, rotational state, row offset and column offset, the held block's type, the timers, flags and statistics, the queue position and the cells
         
     Attributes:
-        - __x : The x-coordinate of grid in the surface
-        - __y : The y-coordinate of grid in the surface
-        - __width : The width of the grid in pixels
-        - __height : The height of the grid in pixels
-        - __cellLength : The length of each square cell in pixel
-        - __surface : The pygame surface that the grid will be drawn on
         - __grid_index : The index of this grid object in the static list GRIDS
+        - arena : The match or arena the grid is played in, whose sendLines method sends the lines this grid sends, or None to send them to the other of two grids
         - block : The controllable block of this grid
         - hold : The block type of the block being held
-        - __block_index : The The index of the current block in the static list NEXT_BLOCKS
         - timer_running : The boolean indicator of wether the timer is running
         - timer : The countdown timer for the block locking mechanism
         - drop_counter : A counter used to slow down the block's automatic drop rate
@@ -42,20 +73,44 @@ class Grid:
         - __lines_cleared : The quantity of lines cleared by the player
         - lines_received : The quantity of lines awaiting receival into the grid  
         - score : This player's current score
-        - __grid_colours : 
-        - __grid : A matrix of rectangles representing the grid
+        - level : This player's current level
+        - speed : This player's current soft drop rate, as the quantity of ticks between automatic drops
+        - __cells : The code of each cell, as in Block.CODES, row by row, so that rows can be removed and inserted as slices. Colours are only looked up from the codes when the grid is drawn
+        - __occupancy : A list of row bitmasks, kept in sync with __cells, in which bit c of row r is set if the cell at (r, c) is not black
+        - __column_bits : A list of column bitmasks, kept in sync with __occupancy, in which bit r of column c is set if the cell at (r, c) is not black
+        - __full_rows : A bitmask, kept in sync with __occupancy, in which bit r is set if every cell of row r is filled
+        - __top_row : The index of the highest row with any cell filled, kept in sync with __occupancy, or ROWS if the grid is empty
+        - __board_hash : The XOR of the Zobrist keys of the cells, kept in sync with __cells by setCell and recomputed when rows are moved
+        - __hold_key : The Zobrist key of the held block type, kept in sync by swapHold
+        - __queue_position : The quantity of blocks this grid has taken from the queue since it was last reset
+        - dirty_cells : The set of (row, column) cells whose colour changed since a view last drew them, or None if changes are not being tracked
     """
 
+    __slots__ = (
+        '__grid_index', 'arena', 'block', 'hold', 'timer_running', 'timer', 'drop_counter', 'flag', 'lose', 'win', '__is_held', '__lines_cleared', 'lines_received', 'score', 'level', 'speed',
+        '__cells', '__occupancy', '__column_bits', '__full_rows', '__top_row', '__board_hash', '__hold_key', '__queue_position', 'dirty_cells'
+    )
+
     COLS = 10
     ROWS = 20
+    FULL_ROW = (1 << COLS) - 1
     
     GRIDS = []
 
     BLOCKS = ['i', 'j', 'l', 's', 'z', 't', 'o']
-    NEXT_BLOCKS = []
 
-    LEVEL = 0
-    SPEED = 35
+    START_SPEED = 35
+
+    RANDOM = random.Random()
+    QUEUE = PieceQueue(BLOCKS, RANDOM)
+
+    HASH_MASK = (1 << 64) - 1
+
+    __ZOBRIST = _buildZobristKeys(len(Block.PALETTE), BLOCKS + ['?'], ROWS, COLS, 0x5A0B)
+    __CELL_KEYS = __ZOBRIST['cells']
+
+    __SNAPSHOT = struct.Struct(f'<{ROWS}H{COLS}IIBQcBbbc?II????IiQIII{ROWS * COLS}s')
+    SNAPSHOT_SIZE = __SNAPSHOT.size
 
     __SCORE = {
         0 : 0, # 0 score, just in case
@@ -65,40 +120,27 @@ class Grid:
         4 : 1200
     }
 
-    def __init__(self, x:int, y:int, height:int, surface):
-        '''The constructor/initialization method of the grid and its attributes
-
-        Parameters:
-            - x : The x-coordinate of where the grid's top-left corner should be drawn
-            - y : The y-coordinate of where the grid's top-left corner should be drawn
-            - height : The drawn grid's height in pixels
-            - surface : The surface to draw the grid on
-        '''
+    def __init__(self):
+        '''The constructor/initialization method of the grid and its attributes'''
 
-        self.__x = x
-        self.__y = y
-        self.__width = height // 2
-        self.__height = height
-        self.__cellLength = height // Grid.ROWS
-        self.__surface = surface
         self.__grid_index = len(Grid.GRIDS)
+        self.dirty_cells = None
+        self.arena = None
 
         Grid.GRIDS.append(self)
         
         # Temporary initialization
         self.block = Block('?', self)
         self.hold = Block('?', self)
-        self.__block_index = 0
 
         self.resetGrid()
     
     def resetGrid(self):
-        '''Resets the Grid attributes, excluding unchanged attributes, such as __surface'''
+        '''Resets the Grid attributes, excluding unchanged attributes, such as __grid_index'''
 
         # Temporarily reinitializing block 
         self.block.resetBlock('?')
         self.hold.resetBlock('?')
-        self.__block_index = 0
 
         # Resetting timers
         self.timer_running = False
@@ -115,78 +157,27 @@ class Grid:
         self.__lines_cleared = 0
         self.lines_received = 0
         self.score = 0
-
-        # Resetting grid cell colours
-        self.__grid_colours = [
-            [Block.BLACK for j in range(Grid.COLS)]
-            for i in range(Grid.ROWS)
-        ]
+        self.level = 0
+        self.speed = Grid.START_SPEED
 
         # Resetting grid cells
-        self.__grid = [
-            [
-                pygame.Rect(
-                    self.__x + j * self.__cellLength,
-                    self.__y + i * self.__cellLength,
-                    self.__cellLength,
-                    self.__cellLength
-                )
-                for j in range(10)
-            ]
-        for i in range(20)
-        ]
-
-        Grid.LEVEL = 0
-        Grid.SPEED = 35
-        
-        # Resetting drawn statistics
-        self.drawLevel()
-        self.drawHold()
-        self.drawScore()
-        self.drawLinesCleared()
-        
-        # Generating new block if there are none
-        if len(Grid.NEXT_BLOCKS) > len(Grid.GRIDS):
-            Grid.NEXT_BLOCKS = [Grid.BLOCKS[randint(0, len(Grid.BLOCKS) - 1)]]
+        self.__cells = bytearray(Grid.ROWS * Grid.COLS)
+        self.__occupancy = [0] * Grid.ROWS
+        self.__column_bits = [0] * Grid.COLS
+        self.__full_rows = 0
+        self.__top_row = Grid.ROWS
+        self.__board_hash = 0
+        self.__hold_key = Grid.__ZOBRIST['holds']['?']
+        self.__queue_position = 0
+
+        if self.dirty_cells is not None:
+            self.dirty_cells.update((i, j) for i in range(Grid.ROWS) for j in range(Grid.COLS))
+
+        # Starting this grid's blocks from the start of the queue, restarting the queue if the game is under way
+        Grid.QUEUE.restart(self.__grid_index, len(Grid.GRIDS))
         
         self.__getNextBlock()
 
-    def drawHold(self):
-        '''Draws text displaying the player's currently held block'''
-        
-        pygame.draw.rect(self.__surface, Block.BLACK, pygame.Rect(self.__x - 100, self.__y, 100, 100))
-        font = pygame.font.SysFont(None, 20)
-        hold_text = font.render(f'Holding {self.hold.getBlockType()}-block' if self.hold.getBlockType() != '?' else f'Holding nothing', False, Block.WHITE)
-        self.__surface.blit(hold_text, (self.__x - 100, self.__y))
-    
-    def drawLevel(self):
-        '''Draws text displaying the current level'''
-
-        pygame.draw.rect(self.__surface, Block.BLACK, pygame.Rect(self.__x - 100, self.__y + self.__height // 1.5, 100, 30))
-        font = pygame.font.SysFont(None, 20)
-        level_text = font.render(f'level {Grid.LEVEL + 1}', False, Block.WHITE)
-        self.__surface.blit(level_text, (self.__x - 100, self.__y + self.__height // 1.5))
-    
-    def drawLinesCleared(self):
-        '''Draws text displaying the player's current quantity of cleared lines'''
-
-        pygame.draw.rect(self.__surface, Block.BLACK, pygame.Rect(self.__x - 100, self.__y + self.__height - 40, 100, 30))
-        font = pygame.font.SysFont(None, 20)
-        lines_text = font.render('Lines:', False, Block.WHITE)
-        lines_value = font.render(str(self.__lines_cleared), False, Block.WHITE)
-        self.__surface.blit(lines_text, (self.__x - 100, self.__y + self.__height - 40))
-        self.__surface.blit(lines_value, (self.__x - 100, self.__y + self.__height - 20))
-    
-    def drawScore(self):
-        '''Draws text displaying the player's current score'''
-
-        pygame.draw.rect(self.__surface, Block.BLACK, pygame.Rect(self.__x - 100, self.__y + self.__height // 1.25, 100, 30))
-        font = pygame.font.SysFont(None, 20)
-        score_text = font.render('Score:', False, Block.WHITE)
-        score_value = font.render(str(self.score), False, Block.WHITE)
-        self.__surface.blit(score_text, (self.__x - 100, self.__y + self.__height // 1.25))
-        self.__surface.blit(score_value, (self.__x - 100, self.__y + self.__height // 1.25 + 20))
-
     def swapHold(self):
         '''Swaps the current block with the currently held block; a process called holding. Can only occur once before this player locks a block'''
 
@@ -195,6 +186,8 @@ class Grid:
 
             self.block.eraseBlock()
 
+            self.__hold_key = Grid.__ZOBRIST['holds'][self.block.getBlockType()]
+
             if self.hold.getBlockType() == '?':
                 self.flag = False
 
@@ -206,117 +199,258 @@ class Grid:
                 
                 self.hold.resetBlock(self.block.getBlockType())
                 self.block.resetBlock(temp)
-            
-            self.drawHold()
     
-    def getX(self):
-        '''Returns the grid's x cooridnate '''
+    def getLinesCleared(self):
+        '''Returns the quantity of lines cleared by the player'''
 
-        return self.__x
+        return self.__lines_cleared
 
-    def setX(self, x):
-        '''Sets the grid's x coordinate to *x* if x is within the bounds of the surface'''
-
-        if 0 <= x <= self.__surface.get_width() - self.__width:
-            self.__x = x
-    
-    def getY(self):
-        '''Returns the grid's y coordinate'''
-
-        return self.__y
-
-    def setY(self, y):
-        '''Sets the grid's y coordiante to *y* if y is within the bounds of the surface'''
-        if 0 <= y <= self.__surface.get_height() - self.__height:
-            self.__y = y
-    
-    def getWidth(self):
-        '''Returns the grid's width in pixels'''
-        return self.__width
-
-    def setWidth(self, width):
-        '''Sets the grid's width to *width* if it is within the bounds of the surface'''
-        if 0 <= width <= self.__surface.get_width():
-            self.__width = width
-            self.__height = width * 2
-            self.__cellLength = width // Grid.COLS
-    
-    def getHeight(self):
-        '''Returnes the grid's height in pixels'''
-        return self.__height
-
-    def setHeight(self, height):
-        '''Sets the grid's height to *height* if it is within the bounds of the surface'''
-        if 0 <= height <= self.__surface.get_height():
-            self.__height = height
-            self.__width = height // 2
-            self.__cellLength = height // Grid.ROWs
-
-    def drawGrid(self):
-        '''If the the player has not won or lost, it draws the matrice of rectangles called __grid and draws the grid lines. If the player has lost, draws a big red rectangle with a label on it saying "You Lose". If the player has won, draws a big green rectangle with a label on it saying "You Win". '''
-        
-        # Checking if the game is still in progress
-        if not self.lose and not self.win:
-            for row in range(len(self.__grid)):
-                for col in range(len(self.__grid[row])):
-                    pygame.draw.rect(self.__surface, self.__grid_colours[row][col], self.__grid[row][col])
-
-            for row in range(len(self.__grid) + 1):
-                pygame.draw.rect(self.__surface, Block.WHITE, pygame.Rect(self.__x, self.__y + row * self.__cellLength, self.__width, 1))
-
-            for col in range(len(self.__grid[0]) + 1):
-                pygame.draw.rect(self.__surface, Block.WHITE, pygame.Rect(int(self.__x + col * self.__cellLength), self.__y, 1, self.__height))
-        
-        # Checking if this player lost
-        elif self.lose:
-            pygame.draw.rect(self.__surface, Block.RED, pygame.Rect(self.__x, self.__y, self.__width, self.__height))
-            font = pygame.font.SysFont(None, 65)
-            loss_text = font.render('You Lose', True, Block.WHITE)
-            self.__surface.blit(loss_text, (self.__x , self.__y + self.__height // 2))
+    def getCell(self, row, col):
+        '''Returns the colour of the grid's indexed cell, looked up from its code, for drawing it
         
-        # Checking if this player won
-        elif self.win:
-            pygame.draw.rect(self.__surface, Block.GREEN, pygame.Rect(self.__x, self.__y, self.__width, self.__height))
-            font = pygame.font.SysFont(None, 65)
-            win_text = font.render('You Win', True, Block.WHITE)
-            self.__surface.blit(win_text, (self.__x , self.__y + self.__height // 2))
+        Parameters:
+            - row : The row index of the cell
+            - col : The column index of the cell
         
-        # Updating window
-        pygame.display.update()
+        Returns:
+            tuple : The colour of the grid's indexed cell
+        '''
+        return Block.PALETTE[self.__cells[row * Grid.COLS + col]]
 
-    def getCell(self, row, col):
-        '''Returns the grid's indexed cell and colour
+    def getCellCode(self, row, col):
+        '''Returns the code of the grid's indexed cell, as in Block.CODES, 0 being an empty cell
         
         Parameters:
             - row : The row index of the cell
             - col : The column index of the cell
         
         Returns:
-            tuple : The grid's indexed cell followed by its colour
+            int : The code of the grid's indexed cell
         '''
-        return self.__grid[row][col], self.__grid_colours[row][col]
+        return self.__cells[row * Grid.COLS + col]
+
+    def getCells(self):
+        '''Returns the code of every cell, row by row. The bytearray is kept up to date by setCell, so it must not be modified directly
+        
+        Returns:
+            bytearray : The code of each cell, that of (r, c) being at r * COLS + c
+        '''
+        return self.__cells
+
+    def getOccupancy(self):
+        '''Returns the occupancy bitmasks of the grid's rows, in which bit c of row r is set if the cell at (r, c) is not black. The list is kept up to date by setCell, so it must not be modified directly
+        
+        Returns:
+            list : The occupancy bitmask of each row
+        '''
+        return self.__occupancy
+
+    def getColumnBits(self):
+        '''Returns the occupancy bitmasks of the grid's columns, in which bit r of column c is set if the cell at (r, c) is not black. The list is kept up to date by setCell, so it must not be modified directly
+        
+        Returns:
+            list : The occupancy bitmask of each column
+        '''
+        return self.__column_bits
+
+    def getStackHeight(self):
+        '''Returns the quantity of rows from the bottom of the grid up to and including the highest row with any cell filled'''
+
+        return Grid.ROWS - self.__top_row
 
-    def setCell(self, row, col, colour):
-        '''Sets the grid's indexed cell colour to *colour*
+    def setCell(self, row, col, code):
+        '''Sets the grid's indexed cell to *code*
         
         Parameters:
             - row : The row index of the cell
             - col : The column index of the cell
-            - colour : The colour the cell is to be coloured
+            - code : The code the cell is to be set to, as in Block.CODES, or Block.EMPTY
+        '''
+
+        index = row * Grid.COLS + col
+        old_code = self.__cells[index]
+
+        # Setting a cell to its own code changes nothing that is kept in sync below
+        if old_code == code:
+            return
+
+        # Recording the change for views drawing only changed cells
+        if self.dirty_cells is not None:
+            self.dirty_cells.add((row, col))
+
+        self.__cells[index] = code
+
+        # Swapping the cell's old Zobrist key for its new one
+        self.__board_hash ^= Grid.__CELL_KEYS[old_code][index] ^ Grid.__CELL_KEYS[code][index]
+
+        # Keeping the occupancy bitmasks, full rows and stack height in sync, looking only at this row
+        if code == Block.EMPTY:
+            if self.__occupancy[row] >> col & 1:
+                self.__occupancy[row] &= ~(1 << col)
+                self.__column_bits[col] &= ~(1 << row)
+                self.__full_rows &= ~(1 << row)
+
+                # Finding the new highest filled row if this row was it and has emptied
+                if row == self.__top_row and not self.__occupancy[row]:
+                    while self.__top_row < Grid.ROWS and not self.__occupancy[self.__top_row]:
+                        self.__top_row += 1
+        else:
+            self.__occupancy[row] |= 1 << col
+            self.__column_bits[col] |= 1 << row
+
+            if self.__occupancy[row] == Grid.FULL_ROW:
+                self.__full_rows |= 1 << row
+
+            if row < self.__top_row:
+                self.__top_row = row
+
+    def getState(self):
+        '''Returns everything about the grid that changes while playing, which setState restores. The grid's share of the static attributes, such as QUEUE, is saved by Match.getState
+        
+        Returns:
+            tuple : The grid's cell codes, blocks, timers, flags and statistics
+        '''
+
+        return (
+            bytes(self.__cells),
+            self.block.getState(),
+            self.hold.getState(),
+            self.timer_running,
+            self.timer,
+            self.drop_counter,
+            self.flag,
+            self.lose,
+            self.win,
+            self.__is_held,
+            self.__lines_cleared,
+            self.lines_received,
+            self.score,
+            self.level,
+            self.speed,
+            self.__queue_position
+        )
+
+    def setState(self, state):
+        '''Restores the grid from *state*, as returned by getState, marking every cell whose colour changed as dirty'''
+
+        (cells, block, hold, self.timer_running, self.timer, self.drop_counter,
+            self.flag, self.lose, self.win, self.__is_held, self.__lines_cleared, self.lines_received, self.score, self.level, self.speed, self.__queue_position) = state
+
+        self.__markChanges(cells)
+        self.__cells[:] = cells
+
+        for row in range(Grid.ROWS):
+            self.__occupancy[row] = sum(1 << col for col in range(Grid.COLS) if cells[row * Grid.COLS + col])
+
+        self.__column_bits = Block.toColumnBits(self.__occupancy)
+        self.__full_rows = sum(1 << row for row in range(Grid.ROWS) if self.__occupancy[row] == Grid.FULL_ROW)
+        self.__top_row = next((row for row in range(Grid.ROWS) if self.__occupancy[row]), Grid.ROWS)
+        self.__rehashBoard()
+
+        self.block.setState(block)
+        self.hold.setState(hold)
+        self.__hold_key = Grid.__ZOBRIST['holds'][self.hold.getBlockType()]
+
+    def getSnapshot(self):
+        '''Returns the same state as getState, packed into one bytes object that setSnapshot restores. Taking and restoring a snapshot is quick enough for a search to restore every position it visits into one grid rather than copying grids. The grid's share of the static attributes, such as QUEUE, is saved by Match.getSnapshot
+
+        Returns:
+            bytes : The snapshot, of SNAPSHOT_SIZE bytes
+        '''
+
+        block_type, rot_state, row_offset, col_offset = self.block.getState()
+
+        return Grid.__SNAPSHOT.pack(
+            *self.__occupancy, *self.__column_bits, self.__full_rows, self.__top_row, self.__board_hash,
+            block_type.encode(), rot_state, row_offset, col_offset, self.hold.getBlockType().encode(),
+            self.timer_running, self.timer, self.drop_counter, self.flag, self.lose, self.win, self.__is_held,
+            self.__lines_cleared, self.lines_received, self.score, self.level, self.speed, self.__queue_position,
+            bytes(self.__cells)
+        )
+
+    def setSnapshot(self, snapshot):
+        '''Restores the grid from *snapshot*, as returned by getSnapshot, marking every cell whose colour changed as dirty'''
+
+        values = Grid.__SNAPSHOT.unpack(snapshot)
+
+        # Updating the bitmasks in place, since getOccupancy and getColumnBits hand out the lists themselves
+        self.__occupancy[:] = values[:Grid.ROWS]
+        self.__column_bits[:] = values[Grid.ROWS:Grid.ROWS + Grid.COLS]
+
+        (self.__full_rows, self.__top_row, self.__board_hash, block_type, rot_state, row_offset, col_offset, hold_type,
+            self.timer_running, self.timer, self.drop_counter, self.flag, self.lose, self.win, self.__is_held,
+            self.__lines_cleared, self.lines_received, self.score, self.level, self.speed, self.__queue_position, cells) = values[Grid.ROWS + Grid.COLS:]
+
+        self.__markChanges(cells)
+        self.__cells[:] = cells
+
+        self.block.setState((block_type.decode(), rot_state, row_offset, col_offset))
+        self.hold.resetBlock(hold_type.decode())
+        self.__hold_key = Grid.__ZOBRIST['holds'][self.hold.getBlockType()]
+
+    def trackChanges(self):
+        '''Starts recording the cells whose colour changes in dirty_cells, so that a view can redraw only those cells. Headless grids never need to call this'''
+
+        if self.dirty_cells is None:
+            self.dirty_cells = set()
+
+    def getHash(self):
+        '''Returns the Zobrist hash of the grid's position: its cells, not counting the current block whether or not it is drawn, the current block's type and pose, the held block, whether a block has been held since the last lock and the grid's position in the queue. The hash of the cells is kept up to date as cells change, so this costs only a few operations. Timers and statistics aren't hashed
+
+        Returns:
+            int : The 64-bit hash
         '''
 
-        self.__grid_colours[row][col] = colour
+        zobrist = Grid.__ZOBRIST
+        block_type, rot_state, row_offset, col_offset = self.block.getState()
+        board_hash = self.__board_hash
+
+        # Removing the current block's cells, if it is drawn
+        if not self.lose:
+            code = self.block.code
+
+            for row, col in self.block.getCoords():
+                if 0 <= row < Grid.ROWS and self.__cells[row * Grid.COLS + col] == code:
+                    board_hash ^= Grid.__CELL_KEYS[code][row * Grid.COLS + col]
+
+        board_hash ^= zobrist['types'][block_type] ^ zobrist['rotations'][rot_state] ^ zobrist['row offsets'][row_offset + 2] ^ zobrist['column offsets'][col_offset + Grid.COLS]
+        board_hash ^= self.__hold_key ^ (zobrist['held'] if self.__is_held else 0)
+
+        return board_hash ^ (self.__queue_position * zobrist['queue'] & Grid.HASH_MASK)
+
+    def getIndex(self):
+        '''Returns the index of this grid in the static list GRIDS, which is also its player index in QUEUE'''
+
+        return self.__grid_index
+
+    def tick(self):
+        '''Advances the grid by one tick: drops the block automatically once every speed ticks and continues the auto-lock timer, or starts it once the block is resting on something'''
+
+        self.drop_counter += 1
+
+        # Delaying block movements
+        if self.drop_counter >= self.speed:
+            self.drop_counter = 0
+
+            self.block.autoMoveDown()
+
+        # Continuing block auto-lock timer
+        if self.timer_running:
+            self.timer += 1
+
+        # Checking if block can move down
+        elif self.block.collisionDetect(r_off=-1):
+            self.timer_running = True
 
     def drawBlock(self):
         '''Draws the current block on the grid'''
 
-        for coords in self.block.getCoords():
-            self.setCell(coords[0], coords[1], self.block.colour)
+        self.block.fillBlock(self.block.code)
     
     def lock(self):
         '''Manages a timer for when the current block should be either moveable or unmoveable when on the ground. Generates a new block if this block is locked (i.e., made unmovable)'''
 
-        if self.timer >= Grid.SPEED * 3 and not self.block.collisionDetect(r_off=-1):
+        if self.timer >= self.speed * 3 and not self.block.collisionDetect(r_off=-1):
             
             # Clearing lines and generating block
             self.__getNextBlock()
@@ -344,81 +478,102 @@ class Grid:
     
     def __receiveLines(self):
         '''Detects and collects which rows in the grid will be moved and moves them up by the number of line sent. The empty space will be replaced by gray blocks which represent garbage lines. There will be a randomly selected column in which there will be no garbage lines to represent messiness. If the number of rows moved + the number of lines received exeeds or equals the number of rows on the grid, the player loses.'''
-        top_row = None
+        top_row = self.__top_row
 
-        for i in range(Grid.ROWS):
-            moveable = False
-            
-            for cell in self.__grid_colours[i]:
-                if cell != Block.BLACK:
-                    moveable = True
-                    break
-            
-            if moveable:
-                top_row = i
-                break
-        
-        if top_row is not None:
-            random_col = randint(0, Grid.COLS - 1)
+        if top_row < Grid.ROWS:
+            random_col = Grid.RANDOM.randint(0, Grid.COLS - 1)
             
             if self.lines_received > top_row:
                 self.lose = True
             else:
-                # Moving rows up
-                for row in range(top_row, Grid.ROWS):
-                    for col in range(Grid.COLS):
-                        self.setCell(row - self.lines_received, col, self.__grid_colours[row][col])
-                
-                # Filling in garbage rows
-                for row in range(Grid.ROWS - self.lines_received, Grid.ROWS):
-                    for col in range(Grid.COLS):
-                        self.setCell(row, col, Block.GRAY if col != random_col else Block.BLACK)
+                lines = self.lines_received
+
+                # Moving rows up by removing the empty rows at the top
+                del self.__cells[:lines * Grid.COLS]
+                del self.__occupancy[:lines]
+
+                # Adding garbage rows at the bottom
+                garbage = bytearray([Block.GARBAGE]) * Grid.COLS
+                garbage[random_col] = Block.EMPTY
+
+                self.__cells += garbage * lines
+                self.__occupancy.extend([Grid.FULL_ROW & ~(1 << random_col)] * lines)
+
+                self.__full_rows >>= lines
+                self.__top_row -= lines
+
+                self.__rehashBoard()
+
+                garbage_bits = ((1 << lines) - 1) << (Grid.ROWS - lines)
+
+                for col in range(Grid.COLS):
+                    self.__column_bits[col] >>= lines
+
+                    if col != random_col:
+                        self.__column_bits[col] |= garbage_bits
+
+                self.__markRows(self.__top_row, Grid.ROWS)
 
     def __clearLines(self):
-        '''Finds and stores the rows which can be cleared and clears them while moving the rows above them down by the number of rows cleared. If rows were cleared, the __lines_cleared, score, LEVEL, and SPEED increase and visually update accordingly. Finally, reduces the lines received by the number of lines cleared. If the lines received attribute becomes negative, it sends lines back to the other grid using the GRIDS static list. If the lines received are still positive, it calls the receiveLines method to receive the lines and resets the lines received attribute'''
+        '''Finds and stores the rows which can be cleared and clears them by removing them from the grid and adding as many empty rows at the top. If rows were cleared, the __lines_cleared, score, level, and speed increase accordingly. Finally, reduces the lines received by the number of lines cleared. If the lines received attribute becomes negative, it sends lines back through the arena, or to the other grid using the GRIDS static list if there is none. If the lines received are still positive, it calls the receiveLines method to receive the lines and resets the lines received attribute'''
+        # Checking which rows are clearable, which setCell has kept track of
         cleared_rows = []
-        
-        for i in range(Grid.ROWS):
-            clearable = True
+        full_rows = self.__full_rows
 
-            # Checking if row is clearable
-            for cell in self.__grid_colours[i]:
-                if cell == Block.BLACK:
-                    clearable = False
-            
-            if clearable:
-                cleared_rows.append(i)
+        while full_rows:
+            cleared_rows.append((full_rows & -full_rows).bit_length() - 1)
+            full_rows &= full_rows - 1
         
         if cleared_rows:
 
             # Changing scoring attributes
             self.__lines_cleared += len(cleared_rows)
-            Grid.LEVEL = self.__lines_cleared // 10
+            self.level = self.__lines_cleared // 10
 
             # len(cleared_rows) <= 4, but similarly to tetr.io, we're protected if not
             self.score += (len(cleared_rows) // 5) * Grid.__SCORE[4] + Grid.__SCORE[len(cleared_rows) % 5]
             
             # Changing speed; capped at 1 fps
-            if Grid.LEVEL <= 17:
-                Grid.SPEED = 35 - 2 * Grid.LEVEL
+            if self.level <= 17:
+                self.speed = Grid.START_SPEED - 2 * self.level
+
+            # Removing the cleared rows, from the bottom up so that indices stay valid, and adding empty rows at the top
+            for row in reversed(cleared_rows):
+                del self.__cells[row * Grid.COLS:(row + 1) * Grid.COLS]
+                del self.__occupancy[row]
 
-            if cleared_rows[0] > 0:
-                for row in range(cleared_rows[0] - 1, -1, -1):
-                    for col in range (Block.COLS):
-                        self.setCell(row + len(cleared_rows), col, self.__grid_colours[row][col])
-                        self.setCell(row, col, Block.BLACK)
+            self.__cells[:0] = bytes(len(cleared_rows) * Grid.COLS)
+            self.__occupancy[:0] = [0] * len(cleared_rows)
 
-            # Visually updating scoring attributes
-            self.drawLevel()
-            self.drawScore()
-            self.drawLinesCleared()
+            # Removing the cleared rows from each column, from the top down so that the lower rows' bits stay in place
+            for col in range(Grid.COLS):
+                bits = self.__column_bits[col]
+
+                for row in cleared_rows:
+                    below = bits >> (row + 1) << (row + 1)
+                    bits = below | (bits & ((1 << row) - 1)) << 1
+
+                self.__column_bits[col] = bits
+
+            # Every row above the old highest row, and the empty rows added, are empty
+            self.__full_rows = 0
+            self.__top_row = min(self.__top_row + len(cleared_rows), Grid.ROWS)
+
+            while self.__top_row < Grid.ROWS and not self.__occupancy[self.__top_row]:
+                self.__top_row += 1
+
+            self.__rehashBoard()
+            self.__markRows(0, cleared_rows[-1] + 1)
 
             # Reducing incoming lines
             self.lines_received -= len(cleared_rows)
 
             # Sending lines to other grid
             if self.lines_received < -1:
-                Grid.GRIDS[1 - self.__grid_index].lines_received -= self.lines_received # Lines received is negative, remember
+                if self.arena is not None:
+                    self.arena.sendLines(self, -self.lines_received) # Lines received is negative, remember
+                else:
+                    Grid.GRIDS[1 - self.__grid_index].lines_received -= self.lines_received
             
             self.lines_received = 0
 
@@ -426,8 +581,35 @@ class Grid:
             self.__receiveLines()
             self.lines_received = 0
 
+    def __markRows(self, first, last):
+        '''Marks every cell of the rows from *first* up to but excluding *last* as dirty, if changes are being tracked, after rows have been moved without setCell'''
+
+        if self.dirty_cells is not None:
+            self.dirty_cells.update((row, col) for row in range(first, last) for col in range(Grid.COLS))
+
+    def __markChanges(self, cells):
+        '''Marks every cell whose code differs in *cells* as dirty, before the grid's cells are replaced by *cells*'''
+
+        if self.dirty_cells is not None and self.__cells != cells:
+            self.dirty_cells.update(divmod(index, Grid.COLS) for index, (old_code, code) in enumerate(zip(self.__cells, cells)) if old_code != code)
+
+    def __rehashBoard(self):
+        '''Recomputes the board's hash from its filled cells, after rows have been moved'''
+
+        board_hash = 0
+
+        for row in range(self.__top_row, Grid.ROWS):
+            bits = self.__occupancy[row]
+
+            while bits:
+                index = row * Grid.COLS + (bits & -bits).bit_length() - 1
+                board_hash ^= Grid.__CELL_KEYS[self.__cells[index]][index]
+                bits &= bits - 1
+
+        self.__board_hash = board_hash
+
     def __getNextBlock(self):
-        '''Replaces the current block with next block in NEXT_BLOCKS static list. If there are no blocks ahead in queue generates no blocks using the generateBlock method. Increases the block index attribute by 1.
+        '''Replaces the current block with this grid's next block in the static QUEUE, which generates a block if there are none ahead in the queue
         '''
         
         if self.flag:
@@ -435,46 +617,17 @@ class Grid:
 
         self.flag = True
 
-        # Generating new block if necessary
-        if self.__block_index == len(Grid.NEXT_BLOCKS):
-            Grid.__generateBlock()
-
         # Setting block
-        self.block.resetBlock(Grid.NEXT_BLOCKS[self.__block_index])
-
-        for coords in self.block.getCoords():
-            if self.__grid_colours[coords[0]][coords[1]] != Block.BLACK:
-                self.lose = True
+        self.block.resetBlock(Grid.QUEUE.next(self.__grid_index))
+        self.__queue_position += 1
 
-        self.__block_index += 1
-    
-    def __generateBlock():
-        '''Based on certain conditions involving previously generated blocks, generates a new block and appends it to the static list BLOCKS'''
-        
-        blocks = Grid.BLOCKS.copy()
-
-        try:
-            
-            # Allowing no 5 same blocks to be queued consecutively
-            if len({Grid.NEXT_BLOCKS[i] for i in range(-4, 0)}) == 1:
-                blocks.remove(Grid.NEXT_BLOCKS[-1])
-            
-            # Forcing at least one I-block within 12 queues of one another
-            if [Grid.NEXT_BLOCKS[i] for i in range(-11, 0)].count('i') == 0:
-                blocks = ['i']
-            
-        except IndexError:
-
-            # Haven't generated enough blocks for these rules to apply yet
-            pass
-        
-        # Appending generated block to queue
-        Grid.NEXT_BLOCKS.append(blocks[randint(0, len(blocks) - 1)])
+        if not self.block.collisionDetect():
+            self.lose = True
     
     def __str__(self):
         '''str override'''
-        return f'Grid: ({self.__grid}), Grid colours: ({self.__gridColours}))'
+        return f'Grid cells: ({[list(self.__cells[row * Grid.COLS:(row + 1) * Grid.COLS]) for row in range(Grid.ROWS)]})'
 
     def __repr__(self):
         '''repr overide'''
-        return f'Grid({self.__x}, {self.__y}, {self.__height})'
+        return 'Grid()'
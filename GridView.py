@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import pygame
+from Block import Block
+from Grid import Grid
+from TextCache import TextCache
+
+class GridView:
+    """ The pygame frontend of a grid, responsible for drawing its cells and statistics onto a surface. The grid itself never draws anything, so this is the only place the game touches pygame's drawing functions.
+
+    Attributes:
+        - grid : The grid object being drawn
+        - __x : The x-coordinate of grid in the surface
+        - __y : The y-coordinate of grid in the surface
+        - __width : The width of the grid in pixels
+        - __height : The height of the grid in pixels
+        - __cellLength : The length of each square cell in pixel
+        - __surface : The pygame surface that the grid will be drawn on
+        - __text : The cache of fonts and rendered text used to draw the statistics and banners
+        - __background : A pre-rendered surface of the empty grid and its grid lines
+        - __atlas : A pre-rendered surface of one cell tile, including its top and left grid lines, per block colour
+        - __tiles : A dictionary mapping each block colour to the area of its tile in __atlas
+        - __sprite_length : The cell length the background and atlas were rendered at
+        - __stats : The statistics (level, score, lines cleared and held block) last drawn, used to only redraw changed text
+        - __drawn : A matrix of the cell colours last drawn, or None if the whole grid must be redrawn
+        - __drawn_state : The (lose, win) flags of the grid when it was last drawn
+    """
+
+    def __init__(self, grid, x:int, y:int, height:int, surface, text_cache=None):
+        '''The constructor/initialization method of the view and its attributes
+
+        Parameters:
+            - grid : The grid to draw
+            - x : The x-coordinate of where the grid's top-left corner should be drawn
+            - y : The y-coordinate of where the grid's top-left corner should be drawn
+            - height : The drawn grid's height in pixels
+            - surface : The surface to draw the grid on
+            - text_cache : The cache of rendered text to share with other views, or None to use a new one
+        '''
+
+        self.grid = grid
+        self.__x = x
+        self.__y = y
+        self.__width = height // 2
+        self.__height = height
+        self.__cellLength = height // Grid.ROWS
+        self.__surface = surface
+        self.__text = text_cache if text_cache is not None else TextCache()
+        self.__stats = None
+        self.__drawn = None
+        self.__drawn_state = None
+        self.__sprite_length = None
+
+        self.grid.trackChanges()
+
+        self.__resetCells()
+
+    def __resetCells(self):
+        '''Re-renders the background and atlas if the cell length changed, and forces every cell to be redrawn at the grid's current position'''
+
+        if self.__sprite_length != self.__cellLength:
+            self.__renderSprites()
+
+        # Forcing statistics and cells to be redrawn at their new position
+        self.__stats = None
+        self.__drawn = None
+
+    def __renderSprites(self):
+        '''Pre-renders the empty grid with its grid lines into __background, and one tile per block colour into __atlas, at the current cell length'''
+
+        length = self.__cellLength
+
+        # Rendering the empty grid
+        self.__background = pygame.Surface((self.__width + 1, self.__height + 1))
+        self.__background.fill(Block.BLACK)
+
+        for row in range(Grid.ROWS + 1):
+            pygame.draw.rect(self.__background, Block.WHITE, pygame.Rect(0, row * length, self.__width, 1))
+
+        for col in range(Grid.COLS + 1):
+            pygame.draw.rect(self.__background, Block.WHITE, pygame.Rect(col * length, 0, 1, self.__height))
+
+        # Rendering a tile per colour side by side
+        colours = list(dict.fromkeys(Block.COLOURS.values()))
+        self.__atlas = pygame.Surface((length * len(colours), length))
+        self.__tiles = {}
+
+        for i, colour in enumerate(colours):
+            tile = pygame.Rect(i * length, 0, length, length)
+
+            pygame.draw.rect(self.__atlas, colour, tile)
+            pygame.draw.rect(self.__atlas, Block.WHITE, pygame.Rect(tile.x, 0, length, 1))
+            pygame.draw.rect(self.__atlas, Block.WHITE, pygame.Rect(tile.x, 0, 1, length))
+
+            self.__tiles[colour] = tile
+
+        # Matching the display's pixel format for faster blitting
+        if pygame.display.get_surface() is not None:
+            self.__background = self.__background.convert()
+            self.__atlas = self.__atlas.convert()
+
+        self.__sprite_length = length
+
+    def __blitCell(self, row, col, colour):
+        '''Draws the cell at *row* and *col* in *colour*, by blitting either its tile from the atlas or, if it is black, its part of the background
+
+        Returns:
+            pygame.Rect : The area of the surface drawn on
+        '''
+
+        length = self.__cellLength
+        x = col * length
+        y = row * length
+
+        if colour == Block.BLACK:
+            return self.__surface.blit(self.__background, (self.__x + x, self.__y + y), (x, y, length, length))
+
+        return self.__surface.blit(self.__atlas, (self.__x + x, self.__y + y), self.__tiles[colour])
+
+    def drawHold(self):
+        '''Draws text displaying the player's currently held block
+
+        Returns:
+            pygame.Rect : The area of the surface drawn on
+        '''
+
+        pygame.draw.rect(self.__surface, Block.BLACK, pygame.Rect(self.__x - 100, self.__y, 100, 100))
+        hold_text = self.__text.render(f'Holding {self.grid.hold.getBlockType()}-block' if self.grid.hold.getBlockType() != '?' else f'Holding nothing', 20, Block.WHITE)
+        self.__surface.blit(hold_text, (self.__x - 100, self.__y))
+
+        return pygame.Rect(self.__x - 100, self.__y, 100, 100)
+
+    def drawLevel(self):
+        '''Draws text displaying the current level
+
+        Returns:
+            pygame.Rect : The area of the surface drawn on
+        '''
+
+        pygame.draw.rect(self.__surface, Block.BLACK, pygame.Rect(self.__x - 100, self.__y + self.__height // 1.5, 100, 30))
+        level_text = self.__text.render(f'level {self.grid.level + 1}', 20, Block.WHITE)
+        self.__surface.blit(level_text, (self.__x - 100, self.__y + self.__height // 1.5))
+
+        return pygame.Rect(self.__x - 100, self.__y + self.__height // 1.5, 100, 30)
+
+    def drawLinesCleared(self):
+        '''Draws text displaying the player's current quantity of cleared lines
+
+        Returns:
+            pygame.Rect : The area of the surface drawn on
+        '''
+
+        pygame.draw.rect(self.__surface, Block.BLACK, pygame.Rect(self.__x - 100, self.__y + self.__height - 40, 100, 30))
+        lines_text = self.__text.render('Lines:', 20, Block.WHITE)
+        self.__surface.blit(lines_text, (self.__x - 100, self.__y + self.__height - 40))
+        self.__text.blitNumber(self.__surface, self.grid.getLinesCleared(), (self.__x - 100, self.__y + self.__height - 20), 20, Block.WHITE)
+
+        return pygame.Rect(self.__x - 100, self.__y + self.__height - 40, 100, 40)
+
+    def drawScore(self):
+        '''Draws text displaying the player's current score
+
+        Returns:
+            pygame.Rect : The area of the surface drawn on
+        '''
+
+        pygame.draw.rect(self.__surface, Block.BLACK, pygame.Rect(self.__x - 100, self.__y + self.__height // 1.25, 100, 30))
+        score_text = self.__text.render('Score:', 20, Block.WHITE)
+        self.__surface.blit(score_text, (self.__x - 100, self.__y + self.__height // 1.25))
+        self.__text.blitNumber(self.__surface, self.grid.score, (self.__x - 100, self.__y + self.__height // 1.25 + 20), 20, Block.WHITE)
+
+        return pygame.Rect(self.__x - 100, self.__y + self.__height // 1.25, 100, 40)
+
+    def drawStats(self):
+        '''Redraws the level, score, lines cleared and held block text, but only those which changed since they were last drawn
+
+        Returns:
+            list : The areas of the surface drawn on
+        '''
+
+        stats = (self.grid.level, self.grid.score, self.grid.getLinesCleared(), self.grid.hold.getBlockType())
+        old_stats = self.__stats or (None, None, None, None)
+        rects = []
+
+        if stats[0] != old_stats[0]:
+            rects.append(self.drawLevel())
+
+        if stats[1] != old_stats[1]:
+            rects.append(self.drawScore())
+
+        if stats[2] != old_stats[2]:
+            rects.append(self.drawLinesCleared())
+
+        if stats[3] != old_stats[3]:
+            rects.append(self.drawHold())
+
+        self.__stats = stats
+
+        return rects
+
+    def getX(self):
+        '''Returns the grid's x cooridnate '''
+
+        return self.__x
+
+    def setX(self, x):
+        '''Sets the grid's x coordinate to *x* if x is within the bounds of the surface'''
+
+        if 0 <= x <= self.__surface.get_width() - self.__width:
+            self.__x = x
+            self.__resetCells()
+
+    def getY(self):
+        '''Returns the grid's y coordinate'''
+
+        return self.__y
+
+    def setY(self, y):
+        '''Sets the grid's y coordiante to *y* if y is within the bounds of the surface'''
+        if 0 <= y <= self.__surface.get_height() - self.__height:
+            self.__y = y
+            self.__resetCells()
+
+    def getWidth(self):
+        '''Returns the grid's width in pixels'''
+        return self.__width
+
+    def setWidth(self, width):
+        '''Sets the grid's width to *width* if it is within the bounds of the surface'''
+        if 0 <= width <= self.__surface.get_width():
+            self.__width = width
+            self.__height = width * 2
+            self.__cellLength = width // Grid.COLS
+            self.__resetCells()
+
+    def getHeight(self):
+        '''Returnes the grid's height in pixels'''
+        return self.__height
+
+    def setHeight(self, height):
+        '''Sets the grid's height to *height* if it is within the bounds of the surface'''
+        if 0 <= height <= self.__surface.get_height():
+            self.__height = height
+            self.__width = height // 2
+            self.__cellLength = height // Grid.ROWS
+            self.__resetCells()
+
+    def getCell(self, row, col):
+        '''Returns the rectangle the grid's indexed cell is drawn in, computed from the grid's position and cell length
+
+        Parameters:
+            - row : The row index of the cell
+            - col : The column index of the cell
+
+        Returns:
+            pygame.Rect : The rectangle of the grid's indexed cell
+        '''
+        return pygame.Rect(self.__x + col * self.__cellLength, self.__y + row * self.__cellLength, self.__cellLength, self.__cellLength)
+
+    def drawGrid(self):
+        '''Redraws any changed statistics, then redraws the grid. If the player has not won or lost, only the cells whose colour changed since they were last drawn are redrawn, by blitting their pre-rendered tiles; the whole grid is only redrawn, as its pre-rendered background plus the tiles of filled cells, after a reset or a move. If the player has lost, draws a big red rectangle with a label on it saying "You Lose". If the player has won, draws a big green rectangle with a label on it saying "You Win". The display is not updated, so that the caller can update every view's areas at once
+
+        Returns:
+            list : The areas of the surface drawn on, to be passed to pygame.display.update
+        '''
+
+        rects = self.drawStats()
+
+        dirty_cells = self.grid.dirty_cells
+        state = (self.grid.lose, self.grid.win)
+
+        # Checking if the game is still in progress, with the grid already drawn
+        if not (self.grid.lose or self.grid.win) and self.__drawn is not None and state == self.__drawn_state:
+            for row, col in dirty_cells:
+                colour = self.grid.getCell(row, col)
+
+                # Skipping cells changed back to the colour they were drawn in, such as a block being erased and redrawn
+                if colour == self.__drawn[row][col]:
+                    continue
+
+                self.__drawn[row][col] = colour
+
+                rects.append(self.__blitCell(row, col, colour))
+
+        # Checking if the game is still in progress
+        elif not self.grid.lose and not self.grid.win:
+            self.__drawn = [[self.grid.getCell(row, col) for col in range(Grid.COLS)] for row in range(Grid.ROWS)]
+
+            rects.append(self.__surface.blit(self.__background, (self.__x, self.__y)))
+
+            for row in range(Grid.ROWS):
+                for col in range(Grid.COLS):
+                    if self.__drawn[row][col] != Block.BLACK:
+                        self.__blitCell(row, col, self.__drawn[row][col])
+
+        # Checking if this player just lost
+        elif self.grid.lose and state != self.__drawn_state:
+            pygame.draw.rect(self.__surface, Block.RED, pygame.Rect(self.__x, self.__y, self.__width, self.__height))
+            loss_text = self.__text.render('You Lose', 65, Block.WHITE, antialias=True)
+            self.__surface.blit(loss_text, (self.__x , self.__y + self.__height // 2))
+
+            rects.append(pygame.Rect(self.__x, self.__y, self.__width + 1, self.__height + 1))
+
+        # Checking if this player just won
+        elif self.grid.win and state != self.__drawn_state:
+            pygame.draw.rect(self.__surface, Block.GREEN, pygame.Rect(self.__x, self.__y, self.__width, self.__height))
+            win_text = self.__text.render('You Win', 65, Block.WHITE, antialias=True)
+            self.__surface.blit(win_text, (self.__x , self.__y + self.__height // 2))
+
+            rects.append(pygame.Rect(self.__x, self.__y, self.__width + 1, self.__height + 1))
+
+        dirty_cells.clear()
+        self.__drawn_state = state
+
+        return rects
+
+    def __repr__(self):
+        '''repr overide'''
+        return f'GridView({self.grid!r}, {self.__x}, {self.__y}, {self.__height})'
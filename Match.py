@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import random
+import struct
+from array import array
+from Grid import Grid
+from PieceQueue import PieceQueue
+
+class Match:
+    ''' A game of Tetris between two grids, responsible for the countdown timers of auto dropping and automatically locking the blocks and for deciding the winner. It never draws anything, so it can be simulated headlessly; the pygame frontend in Tetris.startGame is just one consumer of it
+
+    Static Attributes:
+        - ACTIONS : The names of the actions a player can perform on their grid
+        - __SNAPSHOT_HEADER : The struct format of the start of a snapshot: the ticks and the version and Gaussian of the random generator, followed by the random generator's internal state, each grid's snapshot and the queue's snapshot
+        - __RANDOM_SIZE : The length in bytes of the random generator's internal state
+
+    Attributes:
+        - grids : The grid of each player, indexed by player
+        - ticks : The number of ticks simulated since the match was last reset
+        - seed : The seed of the match's random generator
+        - queue : The queue of blocks shared by the match's grids
+        - random : The random generator of the match, used by its grids to generate blocks and garbage. It isn't reseeded when the match is reset, so a sequence of games played from the same seed with the same actions is always the same
+        - __actions : A list, indexed by player, of dictionaries mapping each action name to the method performing it
+    '''
+
+    ACTIONS = ('rotCW', 'moveDown', 'moveLeft', 'moveRight', 'rotFull', 'rotCCW', 'hardDrop', 'swapHold')
+
+    __SNAPSHOT_HEADER = struct.Struct('<IB?d')
+    __RANDOM_SIZE = len(random.Random(0).getstate()[1]) * array('I').itemsize
+
+    def __init__(self, seed=None):
+        '''Constructs a Match object with two fresh grids, discarding the grids and block queue of any previous match from Grid's static attributes
+
+        Parameters:
+            - seed : The seed of the match's random generator, or None to pick one at random
+        '''
+
+        if seed is None:
+            seed = random.getrandbits(64)
+
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        Grid.GRIDS = []
+        Grid.RANDOM = self.random
+        Grid.QUEUE = self.queue = PieceQueue(Grid.BLOCKS, self.random)
+
+        self.grids = [Grid(), Grid()]
+
+        for g in self.grids:
+            g.arena = self
+
+        self.ticks = 0
+
+        self.__actions = [
+            {action : getattr(grid, action) if action == 'swapHold' else getattr(grid.block, action) for action in Match.ACTIONS}
+            for grid in self.grids
+        ]
+
+    def act(self, player, action):
+        '''Performs the action named *action* on the grid of *player*, unless the match is over
+
+        Parameters:
+            - player : The index of the player performing the action
+            - action : The name of the action, one of ACTIONS
+        '''
+
+        if not self.isOver():
+            self.__actions[player][action]()
+
+    def tick(self):
+        '''Advances the match by one tick: continues the auto-drop and auto-lock timers of each grid, draws each block onto its grid and decides whether a player has won'''
+
+        if not self.isOver():
+            for g in self.grids:
+                g.tick()
+
+        for g in self.grids:
+            g.drawBlock()
+
+        # The opponent of the first player to lose wins
+        for g in self.grids:
+            if g.lose:
+                for other in self.grids:
+                    if other is not g:
+                        other.win = True
+
+                break
+
+        self.ticks += 1
+
+    def sendLines(self, grid, lines):
+        '''Sends *lines* lines from *grid* to its opponent, as called by Grid when it clears enough lines'''
+
+        for g in self.grids:
+            if g is not grid:
+                g.lines_received += lines
+
+    def isOver(self):
+        '''Returns whether a player has won the match
+
+        Returns:
+            bool : True if the match is over, False otherwise
+        '''
+
+        return any(g.win for g in self.grids)
+
+    def getState(self):
+        '''Returns everything about the match that changes while playing, including its random generator and the static attributes of Grid, which setState restores
+
+        Returns:
+            tuple : The state of the match
+        '''
+
+        return (
+            self.ticks,
+            self.random.getstate(),
+            self.queue.getState(),
+            tuple(g.getState() for g in self.grids)
+        )
+
+    def setState(self, state):
+        '''Restores the match from *state*, as returned by getState on this or any match with the same number of grids, making its grids the ones Grid's static attributes refer to'''
+
+        self.ticks, random_state, queue_state, grid_states = state
+
+        self.random.setstate(random_state)
+        self.makeCurrent()
+
+        self.queue.setState(queue_state)
+
+        for g, grid_state in zip(self.grids, grid_states):
+            g.setState(grid_state)
+
+    def getSnapshot(self):
+        '''Returns the same state as getState, packed into one bytes object that setSnapshot restores, which is quicker to restore and far smaller to keep than the state
+
+        Returns:
+            bytes : The snapshot
+        '''
+
+        version, internal, gauss = self.random.getstate()
+
+        return b''.join([
+            Match.__SNAPSHOT_HEADER.pack(self.ticks, version, gauss is not None, gauss or 0.0),
+            array('I', internal).tobytes(),
+            *(g.getSnapshot() for g in self.grids),
+            self.queue.getSnapshot()
+        ])
+
+    def setSnapshot(self, snapshot):
+        '''Restores the match from *snapshot*, as returned by getSnapshot on this or any match with the same number of grids, making its grids the ones Grid's static attributes refer to'''
+
+        self.ticks, version, has_gauss, gauss = Match.__SNAPSHOT_HEADER.unpack_from(snapshot)
+
+        offset = Match.__SNAPSHOT_HEADER.size
+        internal = array('I', snapshot[offset:offset + Match.__RANDOM_SIZE])
+        offset += Match.__RANDOM_SIZE
+
+        self.random.setstate((version, tuple(internal), gauss if has_gauss else None))
+        self.makeCurrent()
+
+        for g in self.grids:
+            g.setSnapshot(snapshot[offset:offset + Grid.SNAPSHOT_SIZE])
+            offset += Grid.SNAPSHOT_SIZE
+
+        self.queue.setSnapshot(snapshot[offset:])
+
+    def makeCurrent(self):
+        '''Makes the match's grids, random generator and block queue the ones Grid's static attributes refer to. Only the most recently constructed match is current, so whatever runs several matches at once must call this before acting on, ticking or resetting a match'''
+
+        Grid.GRIDS = list(self.grids)
+        Grid.RANDOM = self.random
+        Grid.QUEUE = self.queue
+
+    def reset(self):
+        '''Resets every grid so that a new match can begin'''
+
+        for g in self.grids:
+            g.resetGrid()
+
+        self.ticks = 0
+
+    def __repr__(self):
+        '''repr override'''
+        return f'Match(seed={self.seed})'
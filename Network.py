@@ -0,0 +1,671 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# Plays matches over the network
+
+# import necessary modules
+import argparse
+import asyncio
+import collections
+import random
+import struct
+import time
+from Block import Block
+from Grid import Grid
+from Match import Match
+from FixedTimestep import FixedTimestep
+
+# Message types, the first two sent by clients and the last two by the server
+JOIN = 0
+INPUT = 1
+START = 2
+DELTA = 3
+
+# Action code of restarting a match once it is over, following the codes of the actions in Match.ACTIONS
+RESET = len(Match.ACTIONS)
+
+# Block types, indexed by their code
+TYPES = tuple(Grid.BLOCKS) + ('?',)
+TYPE_CODES = {block_type : code for code, block_type in enumerate(TYPES)}
+
+# Bits of a grid's flags
+LOSE = 1
+WIN = 2
+HAS_PIECE = 4
+
+# Bytes a client may fall behind on receiving before the server drops it
+MAX_BACKLOG = 1 << 16
+
+# Struct formats: every message's header (payload length, message type), an input (sequence number, action code), the start of a match (match id, player, player count, seed, tick rate), the tick and acknowledged input of a delta and each grid of a delta (flags, piece type, rotational state, row offset, column offset, held type, lines received, level, score, lines cleared, quantity of changed cells)
+HEADER = struct.Struct('<HB')
+INPUT_FORMAT = struct.Struct('<IB')
+START_FORMAT = struct.Struct('<IBBQH')
+COUNTER_FORMAT = struct.Struct('<I')
+GRID_FORMAT = struct.Struct('<BBBbbBHBIHB')
+
+def packMessage(message_type, payload=b''):
+    '''Returns the message of type *message_type* carrying *payload*, framed by its header'''
+
+    return HEADER.pack(len(payload), message_type) + payload
+
+async def readMessage(reader):
+    '''Reads the next message from the stream *reader*, raising asyncio.IncompleteReadError if the stream ends first
+
+    Returns:
+        tuple : The type and payload of the message
+    '''
+
+    length, message_type = HEADER.unpack(await reader.readexactly(HEADER.size))
+
+    return message_type, await reader.readexactly(length)
+
+class Room:
+    ''' A match played on a MatchServer and the players connected to it. Inputs are queued as they arrive and performed just before the next tick, and after each batch of ticks the players are sent a delta of the match: for each grid, the cells that changed since the last delta, not counting the falling piece, followed by the piece's pose and the grid's statistics and garbage count. Every player is sent the same bytes
+
+    Attributes:
+        - id : The id of the room on its server
+        - match : The match being played
+        - writers : The stream writer of each player, indexed by player, or None for players who have left
+        - acked : The sequence number of the last input performed of each player, indexed by player
+        - __inputs : The (player, sequence number, action code) of each input received since the last tick
+        - __boards : The codes of each grid's cells, as in Block.CODES, as last sent, indexed by player and then by row * COLS + column
+        - __pieces : The cells, as row * COLS + column, of each grid's falling piece as last sent, indexed by player
+        - __last_sent : The acknowledged inputs and grid statistics last sent, so that nothing is sent while nothing changes
+    '''
+
+    def __init__(self, room_id, match, writers, tick_rate):
+        '''Constructs a Room object of *match*, given the id *room_id*, played by the players whose stream writers are *writers* at *tick_rate* ticks per second, and tells the players the match started'''
+
+        self.id = room_id
+        self.match = match
+        self.writers = list(writers)
+        self.acked = [0] * len(writers)
+        self.__inputs = []
+        self.__boards = [bytearray(Grid.ROWS * Grid.COLS) for _ in match.grids]
+        self.__pieces = [frozenset() for _ in match.grids]
+        self.__last_sent = None
+
+        for g in match.grids:
+            g.trackChanges()
+
+        for player, writer in enumerate(self.writers):
+            writer.write(packMessage(START, START_FORMAT.pack(room_id, player, len(self.writers), match.seed, tick_rate)))
+
+    def queue(self, player, sequence, code):
+        '''Queues the input numbered *sequence* of *player*, whose action is coded *code*, to be performed before the next tick'''
+
+        self.__inputs.append((player, sequence, code))
+
+    def leave(self, player):
+        '''Disconnects *player*, who loses the match if it isn't over'''
+
+        self.writers[player] = None
+
+        if not self.match.isOver():
+            self.match.grids[player].lose = True
+
+    def isEmpty(self):
+        '''Returns whether every player has left'''
+
+        return all(writer is None for writer in self.writers)
+
+    def advance(self, ticks):
+        '''Performs the queued inputs and advances the match by *ticks* ticks, then sends the players a delta if anything changed. Resetting is only allowed once the match is over and only while every player is still connected'''
+
+        if not ticks:
+            return
+
+        self.match.makeCurrent()
+
+        for _ in range(ticks):
+            for player, sequence, code in self.__inputs:
+                if code == RESET:
+                    if self.match.isOver() and not any(writer is None for writer in self.writers):
+                        self.match.reset()
+                else:
+                    self.match.act(player, Match.ACTIONS[code])
+
+                self.acked[player] = sequence
+
+            self.__inputs.clear()
+            self.match.tick()
+
+        delta = self.__delta()
+
+        if delta is not None:
+            self.broadcast(delta)
+
+    def broadcast(self, data):
+        '''Sends *data* to every player still connected, dropping the players who have fallen too far behind on receiving'''
+
+        for writer in self.writers:
+            if writer is None or writer.is_closing():
+                continue
+
+            if writer.transport.get_write_buffer_size() > MAX_BACKLOG:
+                writer.close()
+            else:
+                writer.write(data)
+
+    def __delta(self):
+        '''Returns the delta message of the changes since the last delta, or None if nothing changed. Only the cells changed on the grids, along with the cells the pieces moved from and to, are compared against what was last sent'''
+
+        stats = [tuple(self.acked)]
+        grids = []
+        changed = False
+
+        for player, g in enumerate(self.match.grids):
+            board = self.__boards[player]
+            block_type, rot_state, row_offset, col_offset = g.block.getState()
+
+            flags = (LOSE if g.lose else 0) | (WIN if g.win else 0)
+
+            # A lost grid's last piece overlaps the stack, so it is sent as cells
+            if g.lose:
+                piece = frozenset()
+            else:
+                piece = frozenset(row * Grid.COLS + col for row, col in g.block.getCoords())
+                flags |= HAS_PIECE
+
+            indices = set(row * Grid.COLS + col for row, col in g.dirty_cells)
+            indices.update(self.__pieces[player], piece)
+            g.dirty_cells.clear()
+
+            cells = bytearray()
+
+            for index in sorted(indices):
+                code = Block.EMPTY if index in piece else g.getCellCode(index // Grid.COLS, index % Grid.COLS)
+
+                if board[index] != code:
+                    board[index] = code
+                    cells += bytes((index, code))
+
+            self.__pieces[player] = piece
+
+            grid_stats = (flags, TYPE_CODES[block_type], rot_state, row_offset, col_offset, TYPE_CODES[g.hold.getBlockType()], g.lines_received, g.level, g.score, g.getLinesCleared())
+            stats.append(grid_stats)
+            grids.append(GRID_FORMAT.pack(*grid_stats, len(cells) // 2) + cells)
+            changed = changed or bool(cells)
+
+        if not changed and stats == self.__last_sent:
+            return None
+
+        self.__last_sent = stats
+
+        acked = b''.join(COUNTER_FORMAT.pack(sequence) for sequence in self.acked)
+
+        return packMessage(DELTA, COUNTER_FORMAT.pack(self.match.ticks) + acked + b''.join(grids))
+
+    def __repr__(self):
+        '''repr override'''
+        return f'Room({self.id}, {self.match!r})'
+
+class MatchServer:
+    ''' An authoritative server running any number of two-player matches in one process. Clients only send their inputs; the server alone runs the game logic, ticking every match at a fixed rate from a single loop, and sends each match's players deltas of its state. Clients are paired into matches in the order they join
+
+    Attributes:
+        - tick_rate : The quantity of ticks per second every match runs at
+        - rooms : A dictionary mapping the id of each room being played to the room
+        - __random : The random generator of the seeds of the matches
+        - __waiting : The stream writer and future of the client waiting for an opponent, or None
+        - __next_id : The id of the next room
+        - __server : The asyncio server accepting connections, or None until started
+        - __runner : The task running the matches, or None until started
+        - __writers : The stream writers of every connected client
+        - __handlers : The tasks serving every connected client
+    '''
+
+    def __init__(self, tick_rate=60, seed=None):
+        '''Constructs a MatchServer object running its matches at *tick_rate* ticks per second, whose matches' seeds are generated from *seed*'''
+
+        self.tick_rate = tick_rate
+        self.rooms = {}
+        self.__random = random.Random(seed)
+        self.__waiting = None
+        self.__next_id = 0
+        self.__server = None
+        self.__runner = None
+        self.__writers = set()
+        self.__handlers = set()
+
+    async def start(self, host='127.0.0.1', port=0):
+        '''Starts accepting clients at *host* on *port*, or on a free port if *port* is 0, and starts running the matches
+
+        Returns:
+            int : The port the server is listening on
+        '''
+
+        self.__server = await asyncio.start_server(self.__handle, host, port)
+        self.__runner = asyncio.create_task(self.__run())
+
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        '''Stops the server, disconnecting every client and waiting for their handlers to finish'''
+
+        self.__runner.cancel()
+        self.__server.close()
+
+        # Disconnecting every client ends its handler's reads, and the client waiting for an opponent stops waiting
+        for writer in self.__writers:
+            writer.close()
+
+        if self.__waiting is not None and not self.__waiting[1].done():
+            self.__waiting[1].set_exception(ConnectionError('The server closed'))
+
+        if self.__handlers:
+            await asyncio.wait(self.__handlers)
+
+        await self.__server.wait_closed()
+
+    async def __run(self):
+        '''Runs every match at the tick rate, sleeping until the next tick is due'''
+
+        timestep = FixedTimestep(self.tick_rate)
+
+        while True:
+            ticks = timestep.advance()
+
+            for room in list(self.rooms.values()):
+                room.advance(ticks)
+
+            await asyncio.sleep((1 - timestep.getAlpha()) / self.tick_rate)
+
+    async def __handle(self, reader, writer):
+        '''Serves a client: pairs it into a match once it joins, then queues its inputs until it disconnects'''
+
+        room = None
+
+        self.__writers.add(writer)
+        self.__handlers.add(asyncio.current_task())
+
+        try:
+            message_type, _ = await readMessage(reader)
+
+            if message_type != JOIN:
+                return
+
+            room, player = await self.__join(writer)
+
+            while True:
+                message_type, payload = await readMessage(reader)
+
+                if message_type == INPUT:
+                    sequence, code = INPUT_FORMAT.unpack(payload)
+
+                    if code <= RESET:
+                        room.queue(player, sequence, code)
+
+        # Cancellation isn't caught, so that the server can still cancel the handler once it has cleaned up
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error):
+            pass
+
+        finally:
+            if self.__waiting is not None and self.__waiting[0] is writer:
+                self.__waiting = None
+
+            if room is not None:
+                room.leave(player)
+
+                if room.isEmpty():
+                    self.rooms.pop(room.id, None)
+
+            writer.close()
+
+            self.__writers.discard(writer)
+            self.__handlers.discard(asyncio.current_task())
+
+    async def __join(self, writer):
+        '''Waits for an opponent for the client writing to *writer*, or pairs it with the client already waiting, in a new match
+
+        Returns:
+            tuple : The room of the match and the client's player index in it
+        '''
+
+        if self.__waiting is None:
+            future = asyncio.get_running_loop().create_future()
+            self.__waiting = (writer, future)
+
+            return await future
+
+        opponent, future = self.__waiting
+        self.__waiting = None
+
+        room = Room(self.__next_id, Match(self.__random.getrandbits(64)), (opponent, writer), self.tick_rate)
+        self.rooms[room.id] = room
+        self.__next_id += 1
+
+        future.set_result((room, 0))
+
+        return room, 1
+
+    def __repr__(self):
+        '''repr override'''
+        return f'MatchServer(tick_rate={self.tick_rate})'
+
+class RemoteGrid:
+    ''' A copy of a grid played on a server, kept up to date from the server's deltas. It has the attributes and methods of Grid that GridView draws, so a remote grid is drawn like a local one
+
+    Attributes:
+        - lose : The boolean value signifying the defeat of the player in control of this grid
+        - win : A boolean indicator of whether the player has won or not
+        - lines_received : The quantity of lines awaiting receival into the grid
+        - score : This player's current score
+        - level : This player's current level
+        - hold : A block of the type being held
+        - block : A block in the pose of the falling piece
+        - dirty_cells : The set of (row, column) cells whose colour changed since a view last drew them, or None if changes are not being tracked
+        - __lines_cleared : The quantity of lines cleared by the player
+        - __board : The codes of the cells, as in Block.CODES, not counting the falling piece, indexed by row * COLS + column
+        - __piece : The cells, as row * COLS + column, of the falling piece
+    '''
+
+    def __init__(self):
+        '''The constructor/initialization method of the remote grid and its attributes, starting empty'''
+
+        self.lose = False
+        self.win = False
+        self.lines_received = 0
+        self.score = 0
+        self.level = 0
+        self.hold = Block('?', None)
+        self.block = Block('?', None)
+        self.dirty_cells = None
+        self.__lines_cleared = 0
+        self.__board = bytearray(Grid.ROWS * Grid.COLS)
+        self.__piece = frozenset()
+
+    def getCell(self, row, col):
+        '''Returns the colour of the cell at (*row*, *col*), including the falling piece'''
+
+        index = row * Grid.COLS + col
+
+        if index in self.__piece:
+            return self.block.colour
+
+        return Block.PALETTE[self.__board[index]]
+
+    def getLinesCleared(self):
+        '''Returns the number of lines cleared'''
+
+        return self.__lines_cleared
+
+    def trackChanges(self):
+        '''Starts recording the cells whose colour changes in dirty_cells, as Grid.trackChanges'''
+
+        if self.dirty_cells is None:
+            self.dirty_cells = set()
+
+    def update(self, stats, cells):
+        '''Applies the part of a delta about this grid
+
+        Parameters:
+            - stats : The grid's flags, piece type, rotational state, row offset, column offset, held type, lines received, level, score and lines cleared
+            - cells : The changed cells, as pairs of bytes holding row * COLS + column and the cell's code, as in Block.CODES
+        '''
+
+        flags, type_code, rot_state, row_offset, col_offset, hold_code, self.lines_received, self.level, self.score, self.__lines_cleared = stats
+
+        self.lose = bool(flags & LOSE)
+        self.win = bool(flags & WIN)
+        self.hold.resetBlock(TYPES[hold_code])
+
+        old_piece = self.__piece
+        old_colour = self.block.colour
+
+        self.block.setState((TYPES[type_code], rot_state, row_offset, col_offset))
+
+        if flags & HAS_PIECE:
+            self.__piece = frozenset((row + row_offset) * Grid.COLS + col + col_offset for row, col in Block.getShape(TYPES[type_code], rot_state))
+        else:
+            self.__piece = frozenset()
+
+        for i in range(0, len(cells), 2):
+            self.__board[cells[i]] = cells[i + 1]
+
+        if self.dirty_cells is not None:
+            moved = old_piece ^ self.__piece if old_colour == self.block.colour else old_piece | self.__piece
+
+            self.dirty_cells.update(divmod(index, Grid.COLS) for index in moved)
+            self.dirty_cells.update(divmod(cells[i], Grid.COLS) for i in range(0, len(cells), 2))
+
+    def __repr__(self):
+        '''repr override'''
+        return 'RemoteGrid()'
+
+class MatchClient:
+    ''' A player of a match on a MatchServer, sending their inputs and keeping a remote copy of every grid of the match
+
+    Attributes:
+        - match_id : The id of the match on the server
+        - player : The player's index in the match
+        - seed : The seed of the match
+        - tick_rate : The quantity of ticks per second the match runs at
+        - ticks : The tick of the last delta received
+        - grids : The remote copy of each grid, indexed by player
+        - latencies : The seconds between sending each input and receiving the first delta in which it was performed
+        - inputs : The quantity of inputs sent
+        - deltas : The quantity of deltas received
+        - bytes_received : The quantity of bytes received
+        - __reader : The stream reader of the connection
+        - __writer : The stream writer of the connection
+        - __sequence : The sequence number of the last input sent
+        - __sent : The (sequence number, time sent) of each input not yet performed, in the order they were sent
+    '''
+
+    def __init__(self):
+        '''Constructs an unconnected MatchClient object'''
+
+        self.match_id = None
+        self.player = None
+        self.seed = None
+        self.tick_rate = None
+        self.ticks = 0
+        self.grids = []
+        self.latencies = []
+        self.inputs = 0
+        self.deltas = 0
+        self.bytes_received = 0
+        self.__reader = None
+        self.__writer = None
+        self.__sequence = 0
+        self.__sent = collections.deque()
+
+    async def connect(self, host, port):
+        '''Connects to the server at *host* on *port*'''
+
+        self.__reader, self.__writer = await asyncio.open_connection(host, port)
+
+    async def join(self):
+        '''Asks to play and waits for the server to start a match against an opponent'''
+
+        self.__writer.write(packMessage(JOIN))
+
+        message_type, payload = await readMessage(self.__reader)
+
+        if message_type != START:
+            raise ValueError('expected the start of a match')
+
+        self.match_id, self.player, player_count, self.seed, self.tick_rate = START_FORMAT.unpack(payload)
+        self.grids = [RemoteGrid() for _ in range(player_count)]
+
+    def act(self, action):
+        '''Sends the action named *action*, one of Match.ACTIONS or "reset", to the server'''
+
+        self.__sequence += 1
+        self.__sent.append((self.__sequence, time.perf_counter()))
+        self.inputs += 1
+
+        self.__writer.write(packMessage(INPUT, INPUT_FORMAT.pack(self.__sequence, RESET if action == 'reset' else Match.ACTIONS.index(action))))
+
+    async def receive(self):
+        '''Waits for the next delta and applies it to the remote grids, raising asyncio.IncompleteReadError once the server disconnects'''
+
+        message_type, payload = await readMessage(self.__reader)
+        now = time.perf_counter()
+
+        self.bytes_received += HEADER.size + len(payload)
+
+        if message_type != DELTA:
+            return
+
+        self.deltas += 1
+        self.ticks, = COUNTER_FORMAT.unpack_from(payload)
+        index = COUNTER_FORMAT.size
+
+        acked, = COUNTER_FORMAT.unpack_from(payload, index + self.player * COUNTER_FORMAT.size)
+        index += len(self.grids) * COUNTER_FORMAT.size
+
+        while self.__sent and self.__sent[0][0] <= acked:
+            self.latencies.append(now - self.__sent.popleft()[1])
+
+        for grid in self.grids:
+            *stats, count = GRID_FORMAT.unpack_from(payload, index)
+            index += GRID_FORMAT.size
+
+            grid.update(stats, payload[index:index + 2 * count])
+            index += 2 * count
+
+    async def receiveAll(self):
+        '''Applies deltas as they arrive until the server disconnects'''
+
+        try:
+            while True:
+                await self.receive()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def isOver(self):
+        '''Returns whether a player has won the match'''
+
+        return any(grid.win for grid in self.grids)
+
+    async def close(self):
+        '''Disconnects from the server'''
+
+        self.__writer.close()
+
+        try:
+            await self.__writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    def __repr__(self):
+        '''repr override'''
+        return f'MatchClient(match_id={self.match_id}, player={self.player})'
+
+async def simulateClient(host, port, duration, action_rate, seed):
+    '''Plays as a simulated client for *duration* seconds, performing a random action *action_rate* times a second on average and restarting its match whenever it is over
+
+    Returns:
+        MatchClient : The client, or None if it never found an opponent
+    '''
+
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + duration
+    client = MatchClient()
+
+    await client.connect(host, port)
+
+    try:
+        await asyncio.wait_for(client.join(), duration)
+    except asyncio.TimeoutError:
+        await client.close()
+        return None
+
+    receiver = asyncio.create_task(client.receiveAll())
+
+    while time.perf_counter() < deadline and not receiver.done():
+        await asyncio.sleep(min(rng.expovariate(action_rate), max(0, deadline - time.perf_counter())))
+
+        client.act('reset' if client.isOver() else rng.choice(Match.ACTIONS))
+
+    await client.close()
+    receiver.cancel()
+
+    return client
+
+async def loadTest(clients=20, duration=5.0, action_rate=10.0, seed=0, host='127.0.0.1', port=None):
+    '''Plays *clients* simulated clients against the server at *host* on *port*, or against a server started in this process if *port* is None, and measures how the server keeps up
+
+    Returns:
+        dict : The quantity of clients and matches played, the inputs sent, deltas received and kilobytes received per second across every client, and the 50th, 90th and 99th percentile input latencies in milliseconds
+    '''
+
+    server = None
+
+    if port is None:
+        server = MatchServer(seed=seed)
+        port = await server.start(host)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(simulateClient(host, port, duration, action_rate, seed + i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        await server.close()
+
+    played = [client for client in results if client is not None]
+    latencies = sorted(latency for client in played for latency in client.latencies)
+
+    def percentile(p):
+        if not latencies:
+            return None
+
+        return 1000 * latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+    return {
+        'clients' : len(played),
+        'matches' : len({client.match_id for client in played}),
+        'inputs_per_sec' : sum(client.inputs for client in played) / elapsed,
+        'deltas_per_sec' : sum(client.deltas for client in played) / elapsed,
+        'kbytes_per_sec' : sum(client.bytes_received for client in played) / elapsed / 1000,
+        'p50_ms' : percentile(50),
+        'p90_ms' : percentile(90),
+        'p99_ms' : percentile(99)
+    }
+
+async def serve(host, port, seed):
+    '''Runs a MatchServer at *host* on *port* until interrupted'''
+
+    server = MatchServer(seed=seed)
+    port = await server.start(host, port)
+
+    print(f'serving matches on {host}:{port}')
+
+    await asyncio.Event().wait()
+
+if __name__ == '__main__':
+    '''Runs a match server, or plays simulated clients against one and reports how it kept up'''
+
+    parser = argparse.ArgumentParser(description='Runs and load tests the network match server')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='run a match server')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='the address to listen on')
+    serve_parser.add_argument('--port', type=int, default=7777, help='the port to listen on')
+    serve_parser.add_argument('--seed', type=int, help='the seed of the seeds of the matches')
+
+    test_parser = commands.add_parser('loadtest', help='play simulated clients against a server')
+    test_parser.add_argument('--clients', type=int, default=20, help='the quantity of simulated clients, two per match')
+    test_parser.add_argument('--duration', type=float, default=5.0, help='the seconds to play for')
+    test_parser.add_argument('--rate', type=float, default=10.0, help='the average inputs per second of each client')
+    test_parser.add_argument('--seed', type=int, default=0, help='the seed of the clients and the local server')
+    test_parser.add_argument('--host', default='127.0.0.1', help='the address of the server')
+    test_parser.add_argument('--port', type=int, help='the port of the server, or none to start one locally')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args.host, args.port, args.seed))
+        except KeyboardInterrupt:
+            pass
+
+    else:
+        report = asyncio.run(loadTest(args.clients, args.duration, args.rate, args.seed, args.host, args.port))
+
+        print(f"{report['clients']} clients in {report['matches']} matches: {report['inputs_per_sec']:.0f} inputs/s, {report['deltas_per_sec']:.0f} deltas/s, {report['kbytes_per_sec']:.1f} kB/s")
+
+        if report['p50_ms'] is not None:
+            print(f"input latency p50 {report['p50_ms']:.2f}ms  p90 {report['p90_ms']:.2f}ms  p99 {report['p99_ms']:.2f}ms")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import random
+import struct
+
+class PieceQueue:
+    ''' The sequence of blocks shared by every player of a match, each player reading it through their own cursor. Blocks are kept in a ring buffer, from which the blocks every player has passed are dropped, so the queue only ever holds the blocks between the slowest and the fastest player. The generation rules are checked against running counters rather than the history of blocks
+
+    Static Attributes:
+        - RUN_LIMIT : The quantity of identical blocks in a row after which that block can't be generated again
+        - I_LIMIT : The quantity of blocks without an I-block after which an I-block must be generated
+        - NO_CURSOR : The cursor stored in snapshots for players who have stopped reading the queue
+        - __SNAPSHOT_HEADER : The struct format of the start of a snapshot: the start, length, run length, blocks since the last I-block, quantity of cursors and quantity of blocks kept, followed by the cursors and then each block kept as one character
+
+    Attributes:
+        - __blocks : The block types that can be generated
+        - __without : A dictionary mapping each block type to the block types that can be generated, less it
+        - __random : The random generator used to generate blocks
+        - __buffer : The ring buffer of blocks, the block of index i being at i modulo its length
+        - __start : The index of the oldest block kept
+        - __length : The quantity of blocks generated since the queue was last restarted
+        - __cursors : A list, indexed by player, of the index of the next block of each player, or None for players who have stopped reading the queue
+        - __run_length : The quantity of identical blocks at the end of the queue
+        - __since_i : The quantity of blocks since the last I-block at the end of the queue
+    '''
+
+    RUN_LIMIT = 4
+    I_LIMIT = 11
+
+    NO_CURSOR = 0xFFFFFFFF
+
+    __SNAPSHOT_HEADER = struct.Struct('<IIIIBH')
+
+    def __init__(self, blocks, rng=None, capacity=16):
+        '''Constructs an empty PieceQueue object generating the block types *blocks* with the random generator *rng*, initially keeping up to *capacity* blocks before it has to grow'''
+
+        self.__blocks = tuple(blocks)
+        self.__without = {block : tuple(other for other in self.__blocks if other != block) for block in self.__blocks}
+        self.__random = rng if rng is not None else random.Random()
+        self.__buffer = [None] * capacity
+        self.__start = 0
+        self.__length = 0
+        self.__cursors = []
+        self.__run_length = 0
+        self.__since_i = 0
+
+    def next(self, player):
+        '''Returns the next block of *player* and moves their cursor past it, generating a block if they are the first to reach the end of the queue
+
+        Parameters:
+            - player : The index of the player
+        '''
+
+        cursor = self.__cursors[player]
+
+        if cursor == self.__length:
+            self.generate()
+
+        block = self.__buffer[cursor % len(self.__buffer)]
+        self.__cursors[player] = cursor + 1
+
+        # Dropping the blocks every player has passed, keeping the first blocks, which restart may send players back to, until there are more than players
+        if cursor == self.__start and self.__length > len(self.__cursors):
+            self.__start = min(cursor for cursor in self.__cursors if cursor is not None)
+
+        return block
+
+    def peek(self, player, count):
+        '''Returns the next *count* blocks of *player* without moving their cursor, generating any that haven't been yet. Generating blocks early draws from the random generator earlier than playing would, so a match whose queue is peeked at is only reproduced by peeking at it the same way
+
+        Parameters:
+            - player : The index of the player
+            - count : The quantity of blocks to return
+        '''
+
+        cursor = self.__cursors[player]
+
+        while self.__length < cursor + count:
+            self.generate()
+
+        return tuple(self.__buffer[i % len(self.__buffer)] for i in range(cursor, cursor + count))
+
+    def generate(self):
+        '''Based on certain conditions involving previously generated blocks, generates a new block and appends it to the queue. No block may be generated 5 times in a row and an I-block must be generated at least once every 12 blocks, once enough blocks have been generated for the rules to apply'''
+
+        blocks = self.__blocks
+
+        # Allowing no 5 same blocks to be queued consecutively
+        if self.__length >= PieceQueue.RUN_LIMIT and self.__run_length >= PieceQueue.RUN_LIMIT:
+            blocks = self.__without[self.__buffer[(self.__length - 1) % len(self.__buffer)]]
+
+        # Forcing at least one I-block within 12 queues of one another
+        if self.__length >= PieceQueue.I_LIMIT and self.__since_i >= PieceQueue.I_LIMIT:
+            blocks = ('i',)
+
+        self.__append(blocks[self.__random.randint(0, len(blocks) - 1)])
+
+    def restart(self, player, player_count):
+        '''Moves the cursor of *player* back to the start of the queue, first replacing the queue by a single random block if it holds more blocks than there are players, as happens when a match is reset
+
+        Parameters:
+            - player : The index of the player
+            - player_count : The quantity of players reading the queue
+        '''
+
+        while len(self.__cursors) <= player:
+            self.__cursors.append(0)
+
+        if self.__length > player_count:
+            self.__start = 0
+            self.__length = 0
+            self.__since_i = 0
+            self.__cursors = [None if cursor is None else 0 for cursor in self.__cursors]
+
+            self.__append(self.__blocks[self.__random.randint(0, len(self.__blocks) - 1)])
+
+        self.__cursors[player] = 0
+
+    def removePlayer(self, player):
+        '''Stops *player* reading the queue, such as when they are eliminated, so that the blocks only they hadn't reached yet can be dropped. Restarting the player adds them back
+
+        Parameters:
+            - player : The index of the player
+        '''
+
+        self.__cursors[player] = None
+
+        cursors = [cursor for cursor in self.__cursors if cursor is not None]
+
+        if cursors and self.__length > len(self.__cursors):
+            self.__start = min(cursors)
+
+    def getState(self):
+        '''Returns the blocks kept, the cursors and the counters of the queue, which setState restores
+
+        Returns:
+            tuple : The state of the queue
+        '''
+
+        kept = tuple(self.__buffer[i % len(self.__buffer)] for i in range(self.__start, self.__length))
+
+        return (kept, self.__start, self.__length, tuple(self.__cursors), self.__run_length, self.__since_i)
+
+    def setState(self, state):
+        '''Restores the queue from *state*, as returned by getState'''
+
+        kept, self.__start, self.__length, cursors, self.__run_length, self.__since_i = state
+
+        self.__cursors = list(cursors)
+        self.__buffer = [None] * max(len(self.__buffer), 2 * len(kept))
+
+        for i, block in enumerate(kept, self.__start):
+            self.__buffer[i % len(self.__buffer)] = block
+
+    def getSnapshot(self):
+        '''Returns the same state as getState, packed into one bytes object that setSnapshot restores
+
+        Returns:
+            bytes : The snapshot
+        '''
+
+        kept = ''.join(self.__buffer[i % len(self.__buffer)] for i in range(self.__start, self.__length))
+        cursors = [PieceQueue.NO_CURSOR if cursor is None else cursor for cursor in self.__cursors]
+
+        return b''.join([
+            PieceQueue.__SNAPSHOT_HEADER.pack(self.__start, self.__length, self.__run_length, self.__since_i, len(cursors), len(kept)),
+            struct.pack(f'<{len(cursors)}I', *cursors),
+            kept.encode()
+        ])
+
+    def setSnapshot(self, snapshot):
+        '''Restores the queue from *snapshot*, as returned by getSnapshot'''
+
+        self.__start, self.__length, self.__run_length, self.__since_i, cursor_count, kept_count = PieceQueue.__SNAPSHOT_HEADER.unpack_from(snapshot)
+
+        offset = PieceQueue.__SNAPSHOT_HEADER.size
+        cursors = struct.unpack_from(f'<{cursor_count}I', snapshot, offset)
+        kept = snapshot[offset + 4 * cursor_count:offset + 4 * cursor_count + kept_count].decode()
+
+        self.__cursors = [None if cursor == PieceQueue.NO_CURSOR else cursor for cursor in cursors]
+        self.__buffer = [None] * max(len(self.__buffer), 2 * len(kept))
+
+        for i, block in enumerate(kept, self.__start):
+            self.__buffer[i % len(self.__buffer)] = block
+
+    def __append(self, block):
+        '''Appends *block* to the end of the queue, growing the ring buffer if it is full, and updates the counters'''
+
+        if self.__length - self.__start == len(self.__buffer):
+            kept = [self.__buffer[i % len(self.__buffer)] for i in range(self.__start, self.__length)]
+
+            self.__buffer = [None] * (2 * len(self.__buffer))
+
+            for i, kept_block in enumerate(kept, self.__start):
+                self.__buffer[i % len(self.__buffer)] = kept_block
+
+        if self.__length and self.__buffer[(self.__length - 1) % len(self.__buffer)] == block:
+            self.__run_length += 1
+        else:
+            self.__run_length = 1
+
+        self.__since_i = 0 if block == 'i' else self.__since_i + 1
+
+        self.__buffer[self.__length % len(self.__buffer)] = block
+        self.__length += 1
+
+    def __len__(self):
+        '''len override'''
+        return self.__length - self.__start
+
+    def __repr__(self):
+        '''repr override'''
+        return f'PieceQueue({list(self.__blocks)})'
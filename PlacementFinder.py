@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+from collections import OrderedDict, deque
+from Block import Block
+
+class PlacementFinder:
+    ''' Finds every final resting position a block can reach from its spawn position, including those needing rotation offsets or soft-drop tucks, with the same move and rotate rules as Block. Results are cached per board and block type, so repeated queries on the same stack cost nothing
+
+    Static Attributes:
+        - SPAWN : The (rotational state, row offset, column offset) a block spawns at
+        - __ROW_BASE : How far above the grid, in rows, the row offsets in fit bitmasks start, since kicks can lift a block above the grid
+        - __MOVES : The (action, column change, row change) of each move considered
+        - __ROTATIONS : The (action, rotational state change) of each rotation considered
+
+    Attributes:
+        - __max_size : The maximum quantity of boards kept in the cache, after which the least recently used board is discarded
+        - __cache : An ordered dictionary mapping each (occupancy, block type, start) to its placements, from least to most recently used
+    '''
+
+    SPAWN = (0, 0, 3)
+
+    __ROW_BASE = 4
+
+    __MOVES = (
+        ('moveLeft', -1, 0),
+        ('moveRight', 1, 0),
+        ('moveDown', 0, 1)
+    )
+
+    __ROTATIONS = (
+        ('rotCW', 1),
+        ('rotCCW', 3),
+        ('rotFull', 2)
+    )
+
+    def __init__(self, max_size=4096):
+        '''Constructs a PlacementFinder object caching the placements of at most *max_size* boards'''
+
+        self.__max_size = max_size
+        self.__cache = OrderedDict()
+
+    def getPlacements(self, occupancy, block_type, start=SPAWN):
+        '''Returns every final resting position a block of type *block_type* can reach from *start* on a board with the row occupancy bitmasks *occupancy*
+
+        Parameters:
+            - occupancy : The occupancy bitmask of each row, as returned by Grid.getOccupancy, without the block itself
+            - block_type : The type of the block to place
+            - start : The (rotational state, row offset, column offset) the block starts at, its spawn position by default
+
+        Returns:
+            list : The (rotational state, row offset, column offset, actions) of each placement, where actions is the shortest list of action names, each one of Match.ACTIONS, that places the block there from *start*. Placements covering the same cells are only listed once
+        '''
+
+        key = (tuple(occupancy), block_type, tuple(start))
+        placements = self.__cache.get(key)
+
+        if placements is not None:
+            self.__cache.move_to_end(key)
+            return placements
+
+        placements = self.__cache[key] = PlacementFinder.__search(key[0], block_type, key[2])
+
+        # Discarding the least recently used board
+        if len(self.__cache) > self.__max_size:
+            self.__cache.popitem(last=False)
+
+        return placements
+
+    def getGridPlacements(self, grid, from_current=False):
+        '''Returns every final resting position the current block of *grid* can reach from its spawn position, or from where it is now if *from_current*, as returned by getPlacements'''
+
+        occupancy = list(grid.getOccupancy())
+
+        # Removing the current block, in case it is drawn on the grid
+        for row, col in grid.block.getCoords():
+            occupancy[row] &= ~(1 << col)
+
+        block_type, rot_state, row_offset, col_offset = grid.block.getState()
+
+        return self.getPlacements(occupancy, block_type, (rot_state, row_offset, col_offset) if from_current else PlacementFinder.SPAWN)
+
+    def __search(occupancy, block_type, start):
+        '''Breadth-first searches the (rotational state, row offset, column offset) states a block of type *block_type* can reach from *start*, returning the resting position each state hard drops to along with the shortest action sequence reaching it'''
+
+        if not Block.fits(occupancy, block_type, *start):
+            return []
+
+        rot_count = Block.getRotationCount(block_type)
+        fits = PlacementFinder.__getFits(Block.toColumnBits(occupancy), block_type)
+        base = PlacementFinder.__ROW_BASE
+
+        # Looking up each rotational state's cells and each rotation's offsets once, rather than once per state searched
+        shapes = [Block.getShape(block_type, rot_state) for rot_state in range(rot_count)]
+        rotations = [
+            [(action, (rot_state + rot_change) % rot_count, Block.getKicks(block_type, rot_state, (rot_state + rot_change) % rot_count)) for action, rot_change in PlacementFinder.__ROTATIONS]
+            for rot_state in range(rot_count)
+        ]
+
+        paths = {start : ()}
+        queue = deque([start])
+        placements = []
+        landings = set()
+        placed_cells = set()
+
+        while queue:
+            state = queue.popleft()
+            rot_state, row_offset, col_offset = state
+            path = paths[state]
+
+            # Hard dropping from this state, to just above the first row offset below at which the block doesn't fit
+            blocked = ~fits[rot_state][col_offset] >> (row_offset + base)
+            landing = row_offset + (blocked & -blocked).bit_length() - 2
+
+            # Comparing cells only the first time a landing is reached, since every state above it in the same column lands there too
+            if (rot_state, landing, col_offset) not in landings:
+                landings.add((rot_state, landing, col_offset))
+
+                cells = frozenset((row + landing, col + col_offset) for row, col in shapes[rot_state])
+
+                if cells not in placed_cells:
+                    placed_cells.add(cells)
+                    placements.append((rot_state, landing, col_offset, list(path) + ['hardDrop']))
+
+            neighbours = []
+
+            for action, col_change, row_change in PlacementFinder.__MOVES:
+                if fits[rot_state].get(col_offset + col_change, 0) >> (row_offset + row_change + base) & 1:
+                    neighbours.append((action, (rot_state, row_offset + row_change, col_offset + col_change)))
+
+            # Trying each rotation offset in order, like Block.__rotate
+            for action, new_state, kicks in rotations[rot_state]:
+                for col_kick, row_kick in kicks:
+                    if row_offset - row_kick + base >= 0 and fits[new_state].get(col_offset + col_kick, 0) >> (row_offset - row_kick + base) & 1:
+                        neighbours.append((action, (new_state, row_offset - row_kick, col_offset + col_kick)))
+                        break
+
+            for action, neighbour in neighbours:
+                if neighbour not in paths:
+                    paths[neighbour] = path + (action,)
+                    queue.append(neighbour)
+
+        return placements
+
+    def __getFits(column_bits, block_type):
+        '''Returns, for each rotational state of a block of type *block_type*, a dictionary mapping each column offset at which it is within the side walls to the bitmask of the row offsets, plus __ROW_BASE, at which it fits on a board with the column occupancy bitmasks *column_bits*. A search then checks whether a state fits with one shift rather than a call to Block.fits'''
+
+        base = PlacementFinder.__ROW_BASE
+        empty = [~bits & ((1 << Block.ROWS) - 1) for bits in column_bits]
+        fits = []
+
+        for rot_state in range(Block.getRotationCount(block_type)):
+            shape = Block.getShape(block_type, rot_state)
+            by_col = {}
+
+            for col_offset in range(-Block.COLS, Block.COLS):
+                if not all(0 <= col + col_offset < Block.COLS for _, col in shape):
+                    continue
+
+                fit = -1
+
+                # A cell at row r of the shape is empty at row offset o if bit o + r of its column is empty
+                for row, col in shape:
+                    fit &= empty[col + col_offset] << base >> row
+
+                by_col[col_offset] = fit
+
+            fits.append(by_col)
+
+        return fits
+
+    def __len__(self):
+        '''len override'''
+        return len(self.__cache)
+
+    def __repr__(self):
+        '''repr override'''
+        return f'PlacementFinder(max_size={self.__max_size})'
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# Records matches and replays them headlessly
+
+# import necessary modules
+import argparse
+import bisect
+import struct
+import time
+from Match import Match
+
+class Keyframes:
+    ''' Snapshots of the state of a match taken every so many ticks while it is recorded or replayed, so that seeking to a tick only re-simulates the ticks since the nearest snapshot. Once there are too many snapshots, every other one is discarded and the interval doubles, so memory stays bounded however long the match lasts
+
+    Attributes:
+        - interval : The quantity of ticks between snapshots
+        - max_count : The maximum quantity of snapshots kept
+        - __ticks : The sorted ticks at which snapshots were taken
+        - __frames : The (event index, match snapshot) of each snapshot, in the order of __ticks, where event index is the index of the first event not yet performed
+    '''
+
+    def __init__(self, interval=600, max_count=256):
+        '''Constructs an empty Keyframes object taking a snapshot every *interval* ticks and keeping at most *max_count* snapshots'''
+
+        self.interval = interval
+        self.max_count = max_count
+        self.__ticks = []
+        self.__frames = []
+
+    def isDue(self, tick):
+        '''Returns whether a snapshot should be taken at *tick* and hasn't been already'''
+
+        if tick % self.interval:
+            return False
+
+        index = bisect.bisect_left(self.__ticks, tick)
+
+        return index == len(self.__ticks) or self.__ticks[index] != tick
+
+    def add(self, tick, event_index, state):
+        '''Stores the snapshot *state*, as returned by Match.getSnapshot, taken at *tick* before the event at *event_index* was performed, thinning the snapshots if there are too many'''
+
+        index = bisect.bisect_left(self.__ticks, tick)
+
+        self.__ticks.insert(index, tick)
+        self.__frames.insert(index, (event_index, state))
+
+        while len(self.__ticks) > self.max_count:
+            self.interval *= 2
+
+            kept = [index for index, kept_tick in enumerate(self.__ticks) if kept_tick % self.interval == 0]
+
+            self.__ticks = [self.__ticks[index] for index in kept]
+            self.__frames = [self.__frames[index] for index in kept]
+
+    def nearest(self, tick):
+        '''Returns the (tick, event index, state) of the latest snapshot taken at or before *tick*, or None if there is none'''
+
+        index = bisect.bisect_right(self.__ticks, tick) - 1
+
+        if index < 0:
+            return None
+
+        return (self.__ticks[index],) + self.__frames[index]
+
+    def __len__(self):
+        '''len override'''
+        return len(self.__ticks)
+
+    def __repr__(self):
+        '''repr override'''
+        return f'Keyframes(interval={self.interval}, max_count={self.max_count})'
+
+class Replay:
+    ''' The seed of a match and every action performed on it, which is all that is needed to play the match again exactly, since the match's random generator is seeded. Replays are stored in a compact binary format: a header holding the seed and length of the match followed by, for each event, the quantity of ticks since the last event as a variable length integer and a byte holding the player and action, which is 2 bytes for most events
+
+    Static Attributes:
+        - MAGIC : The bytes each replay file starts with
+        - VERSION : The version of the replay format
+        - RESET : The action code of resetting the match, which follows the codes of the actions in Match.ACTIONS
+        - __HEADER : The struct format of the header: the magic bytes, the version, the seed and the quantity of ticks
+
+    Attributes:
+        - seed : The seed of the match
+        - ticks : The quantity of ticks the match was played for
+        - events : A list of the (tick, player, action) of each event, in the order they happened, where action is one of Match.ACTIONS or "reset"
+        - keyframes : The snapshots of the match taken while recording and replaying it, which aren't saved with the replay
+    '''
+
+    MAGIC = b'BTRP'
+    VERSION = 1
+    RESET = len(Match.ACTIONS)
+
+    __HEADER = struct.Struct('<4sBQI')
+
+    def __init__(self, seed, ticks=0, events=None, keyframes=None):
+        '''Constructs a Replay object of a match seeded with *seed* lasting *ticks* ticks, with the (tick, player, action) events *events* and the snapshots *keyframes*'''
+
+        self.seed = seed
+        self.ticks = ticks
+        self.events = events if events is not None else []
+        self.keyframes = keyframes if keyframes is not None else Keyframes()
+
+    def toBytes(self):
+        '''Returns the replay encoded in the binary replay format'''
+
+        data = bytearray(Replay.__HEADER.pack(Replay.MAGIC, Replay.VERSION, self.seed, self.ticks))
+        last_tick = 0
+
+        for tick, player, action in self.events:
+            delta = tick - last_tick
+            last_tick = tick
+
+            # Writing the tick delta 7 bits at a time, least significant first
+            while delta >= 0x80:
+                data.append(delta & 0x7f | 0x80)
+                delta >>= 7
+
+            data.append(delta)
+            data.append(player << 4 | (Replay.RESET if action == 'reset' else Match.ACTIONS.index(action)))
+
+        return bytes(data)
+
+    @staticmethod
+    def fromBytes(data):
+        '''Returns the replay encoded in *data*, raising ValueError if it isn't a replay'''
+
+        try:
+            magic, version, seed, ticks = Replay.__HEADER.unpack_from(data)
+        except struct.error:
+            raise ValueError('replay is truncated') from None
+
+        if magic != Replay.MAGIC or version != Replay.VERSION:
+            raise ValueError('not a replay of a supported version')
+
+        events = []
+        tick = 0
+        index = Replay.__HEADER.size
+
+        try:
+            while index < len(data):
+                delta = shift = 0
+
+                while data[index] & 0x80:
+                    delta |= (data[index] & 0x7f) << shift
+                    shift += 7
+                    index += 1
+
+                tick += delta | data[index] << shift
+                code = data[index + 1]
+                index += 2
+
+                events.append((tick, code >> 4, 'reset' if code & 0xf == Replay.RESET else Match.ACTIONS[code & 0xf]))
+
+        except IndexError:
+            raise ValueError('replay is truncated') from None
+
+        return Replay(seed, ticks, events)
+
+    def save(self, path):
+        '''Writes the replay to the file at *path*'''
+
+        with open(path, 'wb') as file:
+            file.write(self.toBytes())
+
+    @staticmethod
+    def load(path):
+        '''Returns the replay stored in the file at *path*'''
+
+        with open(path, 'rb') as file:
+            return Replay.fromBytes(file.read())
+
+    def play(self):
+        '''Plays the whole match again headlessly, as fast as possible
+
+        Returns:
+            Match : The match in the state it was in when recording stopped
+        '''
+
+        match = self.seek(self.ticks)
+
+        # Performing the events recorded after the last tick
+        index = bisect.bisect_left(self.events, self.ticks, key=lambda event: event[0])
+
+        for _, player, action in self.events[index:]:
+            if action == 'reset':
+                match.reset()
+            else:
+                match.act(player, action)
+
+        return match
+
+    def seek(self, tick, match=None):
+        '''Restores the nearest snapshot taken at or before *tick* and plays the match from there until *tick* ticks have passed, performing each event before the tick it was recorded on and taking snapshots along the way
+
+        Parameters:
+            - tick : The quantity of ticks played from the start of the replay
+            - match : The match to restore the state into, or None for a new match
+
+        Returns:
+            Match : The match in the state it was in after *tick* ticks
+        '''
+
+        if match is None:
+            match = Match(self.seed)
+
+        if not self.keyframes:
+            self.keyframes.add(0, 0, Match(self.seed).getSnapshot())
+
+        start, event_index, state = self.keyframes.nearest(tick)
+        match.setSnapshot(state)
+
+        for current in range(start, tick):
+            while event_index < len(self.events) and self.events[event_index][0] == current:
+                _, player, action = self.events[event_index]
+
+                if action == 'reset':
+                    match.reset()
+                else:
+                    match.act(player, action)
+
+                event_index += 1
+
+            match.tick()
+
+            if self.keyframes.isDue(current + 1):
+                self.keyframes.add(current + 1, event_index, match.getSnapshot())
+
+        return match
+
+    def __len__(self):
+        '''len override'''
+        return len(self.events)
+
+    def __repr__(self):
+        '''repr override'''
+        return f'Replay(seed={self.seed}, ticks={self.ticks}, events={len(self.events)})'
+
+class ReplayRecorder:
+    ''' Stands in for a match, forwarding its actions, ticks and resets to the match while recording them in a replay
+
+    Attributes:
+        - match : The match being recorded
+        - replay : The replay being recorded, whose ticks count every tick since recording began, across resets
+    '''
+
+    def __init__(self, match, interval=600, max_keyframes=256):
+        '''Constructs a ReplayRecorder object recording *match* from its current state, which must be freshly constructed for the replay to play back the same, taking a snapshot every *interval* ticks and keeping at most *max_keyframes* of them'''
+
+        self.match = match
+        self.replay = Replay(match.seed, keyframes=Keyframes(interval, max_keyframes))
+        self.replay.keyframes.add(0, 0, match.getSnapshot())
+
+    def act(self, player, action):
+        '''Performs and records the action named *action* on the grid of *player*, as Match.act. Actions ignored because the match is over aren't recorded'''
+
+        if not self.match.isOver():
+            self.replay.events.append((self.replay.ticks, player, action))
+            self.match.act(player, action)
+
+    def tick(self):
+        '''Advances the match by one tick, as Match.tick, taking a snapshot if one is due'''
+
+        self.match.tick()
+        self.replay.ticks += 1
+
+        if self.replay.keyframes.isDue(self.replay.ticks):
+            self.replay.keyframes.add(self.replay.ticks, len(self.replay.events), self.match.getSnapshot())
+
+    def reset(self):
+        '''Resets and records resetting the match, as Match.reset'''
+
+        self.replay.events.append((self.replay.ticks, 0, 'reset'))
+        self.match.reset()
+
+    def __repr__(self):
+        '''repr override'''
+        return f'ReplayRecorder({self.match!r})'
+
+if __name__ == '__main__':
+    '''Plays each given replay headlessly, printing the final state of its match and how quickly it was played'''
+
+    parser = argparse.ArgumentParser(description='Plays replays headlessly at full speed')
+    parser.add_argument('replays', nargs='+', help='the replay files to play')
+    args = parser.parse_args()
+
+    for path in args.replays:
+        replay = Replay.load(path)
+
+        start = time.perf_counter()
+        match = replay.play()
+        duration = time.perf_counter() - start
+
+        print(f'{path}: {replay!r}')
+        print(f'    scores {[grid.score for grid in match.grids]}, lines {[grid.getLinesCleared() for grid in match.grids]}, winner {next((player for player, grid in enumerate(match.grids) if grid.win), None)}')
+        print(f'    {duration:.3f}s, {replay.ticks / duration:.0f} ticks/s')
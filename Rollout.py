@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# Runs headless games in parallel for training
+
+# import necessary modules
+import argparse
+import multiprocessing
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from Environment import Environment, EnvironmentBatch
+
+# Commands the learner gives the workers through the control array
+STEP = 0
+RESET = 1
+STOP = 2
+
+def _attach(name, shape, dtype):
+    '''Attaches to the shared memory block called *name*, returning it and the array of *shape* and *dtype* it holds'''
+
+    memory = shared_memory.SharedMemory(name=name)
+
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+def _runWorker(worker, envs, seed, opponent, max_ticks, layout, barrier):
+    '''Runs the *envs* environments of *worker*, seeded from *seed*, on its slice of the shared arrays described by *layout*, stepping, resetting or stopping whenever the learner passes the barrier'''
+
+    memories = {}
+    arrays = {}
+
+    for key, description in layout.items():
+        memories[key], arrays[key] = _attach(*description)
+
+    start, stop = worker * envs, (worker + 1) * envs
+
+    batch = EnvironmentBatch(envs, seed + start, opponent, max_ticks, arrays['observations'][start:stop], arrays['rewards'][start:stop], arrays['dones'][start:stop])
+    actions = arrays['actions'][start:stop]
+    control = arrays['control']
+
+    try:
+        while True:
+            barrier.wait()
+
+            if control[0] == STOP:
+                break
+
+            if control[0] == RESET:
+                batch.reset()
+            else:
+                batch.stepMany(actions)
+
+            barrier.wait()
+
+    finally:
+        # Dropping the views before closing the memory they point into
+        del batch, actions, control, arrays
+
+        for memory in memories.values():
+            memory.close()
+
+class RolloutPool:
+    ''' Worker processes each stepping a batch of environments, writing their observations, rewards and done flags straight into shared memory arrays that the learner reads without anything being pickled. The learner writes the actions of a step into the shared actions array, and the workers and the learner meet at a barrier before and after each step, so a step costs two barrier waits however many environments there are. A watchdog thread aborts the barrier if a worker dies, so the learner gets an error rather than waiting forever
+
+    Attributes:
+        - workers : The quantity of worker processes
+        - envs : The quantity of environments per worker
+        - observations : The shared (workers * envs, OBSERVATION_SIZE) array of every environment's observation
+        - rewards : The shared array of every environment's reward on the last step
+        - dones : The shared array of whether every environment's episode ended on the last step; those environments have already been reset
+        - actions : The shared array of the action of every environment on the next step
+        - __control : The shared array holding the command of the next step
+        - __memories : The shared memory blocks of the arrays
+        - __barrier : The barrier of the workers and the learner
+        - __processes : The worker processes
+        - __closing : The event set once the pool starts closing, which stops the watchdog
+        - __watchdog : The thread aborting the barrier if a worker dies
+    '''
+
+    def __init__(self, workers, envs, seed=0, opponent=None, max_ticks=None, timeout=60):
+        '''Starts *workers* worker processes each stepping *envs* environments, seeded from *seed* onwards, whose other parameters are those of Environment. If a worker hasn't reached the barrier after *timeout* seconds, such as because it hangs, the barrier breaks rather than letting the learner wait forever'''
+
+        self.workers = workers
+        self.envs = envs
+
+        size = workers * envs
+        shapes = {
+            'observations' : ((size, Environment.OBSERVATION_SIZE), np.int16),
+            'rewards' : ((size,), np.int64),
+            'dones' : ((size,), np.bool_),
+            'actions' : ((size,), np.int64),
+            'control' : ((1,), np.int64)
+        }
+
+        self.__memories = {}
+        layout = {}
+        arrays = {}
+
+        for key, (shape, dtype) in shapes.items():
+            memory = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            arrays[key] = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+            arrays[key][...] = 0
+
+            self.__memories[key] = memory
+            layout[key] = (memory.name, shape, dtype)
+
+        self.observations = arrays['observations']
+        self.rewards = arrays['rewards']
+        self.dones = arrays['dones']
+        self.actions = arrays['actions']
+        self.__control = arrays['control']
+
+        self.__barrier = multiprocessing.Barrier(workers + 1, timeout=timeout)
+        self.__processes = [
+            multiprocessing.Process(target=_runWorker, args=(worker, envs, seed, opponent, max_ticks, layout, self.__barrier), daemon=True)
+            for worker in range(workers)
+        ]
+
+        for process in self.__processes:
+            process.start()
+
+        self.__closing = threading.Event()
+        self.__watchdog = threading.Thread(target=self.__watch, daemon=True)
+        self.__watchdog.start()
+
+    def reset(self):
+        '''Starts a new episode in every environment
+
+        Returns:
+            numpy.ndarray : The shared observations array
+        '''
+
+        self.__command(RESET)
+
+        return self.observations
+
+    def step(self, actions=None):
+        '''Steps every environment with its action in *actions*, or with the actions already written into the shared actions array if None
+
+        Returns:
+            tuple : The shared observations, rewards and dones arrays
+        '''
+
+        if actions is not None:
+            self.actions[:] = actions
+
+        self.__command(STEP)
+
+        return self.observations, self.rewards, self.dones
+
+    def close(self):
+        '''Stops the workers and frees the shared memory'''
+
+        self.__closing.set()
+
+        try:
+            if self.__processes:
+                self.__control[0] = STOP
+
+                # Letting the workers through to stop, unless one has died and they can't all meet
+                if all(process.is_alive() for process in self.__processes):
+                    try:
+                        self.__barrier.wait()
+                    except threading.BrokenBarrierError:
+                        pass
+                else:
+                    self.__barrier.abort()
+
+                for process in self.__processes:
+                    process.join(5)
+
+                    if process.is_alive():
+                        process.terminate()
+
+                self.__processes = []
+
+        finally:
+            # Dropping the arrays before freeing the memory they point into
+            self.observations = self.rewards = self.dones = self.actions = self.__control = None
+
+            for memory in self.__memories.values():
+                memory.close()
+                memory.unlink()
+
+            self.__memories = {}
+
+    def __watch(self):
+        '''Polls the workers until the pool closes, aborting the barrier as soon as one has died, so that nobody waits at it for a worker that will never come'''
+
+        while not self.__closing.wait(0.1):
+            if not all(process.is_alive() for process in self.__processes):
+                self.__barrier.abort()
+                return
+
+    def __command(self, command):
+        '''Has every worker perform *command* and waits for them to finish'''
+
+        self.__control[0] = command
+
+        # Releasing the workers, then waiting for them to finish
+        try:
+            self.__barrier.wait()
+            self.__barrier.wait()
+
+        except threading.BrokenBarrierError as error:
+            for worker, process in enumerate(self.__processes):
+                if not process.is_alive():
+                    raise RuntimeError(f'Rollout worker {worker} exited with code {process.exitcode}') from error
+
+            raise
+
+    def __len__(self):
+        '''len override'''
+        return self.workers * self.envs
+
+    def __repr__(self):
+        '''repr override'''
+        return f'RolloutPool({self.workers}, {self.envs})'
+
+def measureThroughput(workers, envs, steps, seed=0):
+    '''Steps a pool of *workers* workers of *envs* environments *steps* times with random actions
+
+    Returns:
+        float : The quantity of environment steps per second
+    '''
+
+    rng = np.random.default_rng(seed)
+    pool = RolloutPool(workers, envs, seed)
+
+    try:
+        pool.reset()
+
+        start = time.perf_counter()
+
+        for _ in range(steps):
+            pool.step(rng.integers(0, Environment.ACTION_COUNT, len(pool)))
+
+        return steps * len(pool) / (time.perf_counter() - start)
+
+    finally:
+        pool.close()
+
+if __name__ == '__main__':
+    '''Measures how rollout throughput scales with the quantity of workers'''
+
+    parser = argparse.ArgumentParser(description='Measures the throughput of the rollout workers')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help='the largest quantity of workers to measure')
+    parser.add_argument('--envs', type=int, default=32, help='the quantity of environments per worker')
+    parser.add_argument('--steps', type=int, default=300, help='the quantity of steps to measure')
+    args = parser.parse_args()
+
+    # Doubling the workers up to the largest quantity
+    counts = [1 << i for i in range(args.workers.bit_length()) if 1 << i < args.workers] + [args.workers]
+    single = None
+
+    for workers in counts:
+        rate = measureThroughput(workers, args.envs, args.steps)
+        single = single or rate
+
+        print(f'{workers:>3} workers {rate:>10.0f} steps/s  {rate / single:>5.2f}x')
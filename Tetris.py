@@ -4,109 +4,436 @@
 # Creates a multiplayer Tetris experience
 
 # import necessary modules
+import asyncio
+import time
 import pygame
-from Grid import Grid
+from Match import Match
+from Arena import Arena
+from Bot import RandomBot
+from GridView import GridView
+from ThumbnailView import ThumbnailView
+from TextCache import TextCache
 from Block import Block
+from Grid import Grid
+from FrameProfiler import FrameProfiler
+from Replay import ReplayRecorder
+from FixedTimestep import FixedTimestep
+from Network import MatchClient
+
+# Frames between refreshes of the profiling overlay, so that drawing it barely shows up in its own numbers
+OVERLAY_INTERVAL = 30
+
+# Logic ticks per second, which the auto dropping and locking timers count in
+TICK_RATE = 60
+
+# Frames per second drawn, when not uncapped
+FRAME_RATE = 60
+
+# Frames in a row that may go undrawn while the logic catches up
+MAX_SKIPPED_FRAMES = 4
+
+# Area of the display, as (x, y, width, height), that the opponents' thumbnails are laid out in during an arena
+THUMBNAIL_AREA = (500, 20, 580, 560)
 
-def startGame(display):
-    '''Is responsible for: parsing key inputs and redirecting them to controls within the game; for drawing and refreshing the display and grid; for checking whether a player has lost or not and prompting the respective message for such an event and; for the countdown timers of auto dropping and automatically locking the blocks to their respective grids'''
-    
-    frame_counter = 0
+# Pixels between neighbouring thumbnails
+THUMBNAIL_GAP = 4
 
-    grid_1 = Grid(100, 100, 400, display)
-    grid_2 = Grid(500, 100, 400, display)
+def startGame(display, profile_path=None, replay_path=None, seed=None, uncapped=False):
+    '''Is responsible for: parsing key inputs and redirecting them to controls within the match; for drawing and refreshing the display and grids and; for prompting a restart once a player has lost. The game logic itself, such as the auto dropping and locking timers, is run by the headless Match. Every frame is timed by a FrameProfiler, whose overlay is toggled with F3 and whose recorded frames are written to *profile_path*, if given, when the game exits. Every action is recorded, along with the match's *seed*, and the replay is written to *replay_path*, if given, when the game exits. The logic runs at a fixed TICK_RATE ticks per second, however many frames are drawn, or as fast as possible if *uncapped*; frames are skipped while the logic is behind'''
+
+    match = Match(seed)
+    recorder = ReplayRecorder(match)
+    text_cache = TextCache()
+    profiler = FrameProfiler()
+    overlay_rect = None
+
+    views = [
+        GridView(match.grids[0], 100, 100, 400, display, text_cache=text_cache),
+        GridView(match.grids[1], 500, 100, 400, display, text_cache=text_cache)
+    ]
 
     keyPressedActions = {
 
         # Player 1 controls
-        pygame.K_w     : grid_1.block.rotCW,
-        pygame.K_a     : grid_1.block.moveLeft,
-        pygame.K_s     : grid_1.block.moveDown,
-        pygame.K_d     : grid_1.block.moveRight,
-        pygame.K_t     : grid_1.block.rotFull,
-        pygame.K_f     : grid_1.block.rotCCW,
-        pygame.K_g     : grid_1.block.hardDrop,
-        pygame.K_h     : grid_1.swapHold,
+        pygame.K_w     : (0, 'rotCW'),
+        pygame.K_a     : (0, 'moveLeft'),
+        pygame.K_s     : (0, 'moveDown'),
+        pygame.K_d     : (0, 'moveRight'),
+        pygame.K_t     : (0, 'rotFull'),
+        pygame.K_f     : (0, 'rotCCW'),
+        pygame.K_g     : (0, 'hardDrop'),
+        pygame.K_h     : (0, 'swapHold'),
 
         # Player 2 controls
-        pygame.K_KP8   : grid_2.block.rotCW,
-        pygame.K_KP5   : grid_2.block.moveDown,
-        pygame.K_KP4   : grid_2.block.moveLeft,
-        pygame.K_KP6   : grid_2.block.moveRight,
-        pygame.K_i     : grid_2.block.rotFull,
-        pygame.K_j     : grid_2.block.rotCCW,
-        pygame.K_k     : grid_2.block.hardDrop,
-        pygame.K_l     : grid_2.swapHold
+        pygame.K_KP8   : (1, 'rotCW'),
+        pygame.K_KP5   : (1, 'moveDown'),
+        pygame.K_KP4   : (1, 'moveLeft'),
+        pygame.K_KP6   : (1, 'moveRight'),
+        pygame.K_i     : (1, 'rotFull'),
+        pygame.K_j     : (1, 'rotCCW'),
+        pygame.K_k     : (1, 'hardDrop'),
+        pygame.K_l     : (1, 'swapHold')
+
+    }
+
+    # Tracking in-game time
+    clock = pygame.time.Clock()
+    timestep = FixedTimestep(None if uncapped else TICK_RATE)
+    skipped_frames = 0
+
+    # Areas of the display drawn since the display was last refreshed
+    rects = []
+
+    try:
+        # Printing current event until display is exited
+        while True:
+            profiler.beginFrame()
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    raise SystemExit
+
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+
+                    # Toggling the profiling overlay, blanking it when hidden
+                    if overlay_rect is None:
+                        overlay_rect = profiler.drawOverlay(display, text_cache)
+                        rects.append(overlay_rect)
+                    else:
+                        rects.append(display.fill(Block.BLACK, overlay_rect))
+                        overlay_rect = None
+
+                elif not match.isOver():
+
+                    # Performing key press incurred operations
+                    if event.type == pygame.KEYDOWN:
+                        if event.key in keyPressedActions:
+                            recorder.act(*keyPressedActions[event.key])
+
+                        else:
+                            # Unknown key pressed
+                            pass
+
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_SPACE:
+                        rects.append(pygame.draw.rect(display, Block.BLACK, pygame.Rect(display.get_width()/2.75, 50, 600, 50)))
+
+                        recorder.reset()
+
+            profiler.mark()
+
+            # Advancing game logic by however many ticks are due
+            for _ in range(timestep.advance()):
+                recorder.tick()
+
+            profiler.mark()
 
+            # Skipping drawing while the logic is behind, though never for long
+            if timestep.isBehind() and skipped_frames < MAX_SKIPPED_FRAMES:
+                skipped_frames += 1
+
+                profiler.mark()
+                profiler.mark()
+                profiler.endFrame()
+
+                continue
+
+            skipped_frames = 0
+
+            if match.isOver():
+                new_game_text = text_cache.render("Press Space To Restart", 30, Block.WHITE)
+
+                rects.append(display.blit(new_game_text, (display.get_width() / 2.75, 50)))
+
+            # Repainting changed parts of grids
+            for view in views:
+                rects += view.drawGrid()
+
+            if overlay_rect is not None and profiler.frames % OVERLAY_INTERVAL == 0:
+                overlay_rect = profiler.drawOverlay(display, text_cache)
+                rects.append(overlay_rect)
+
+            profiler.mark()
+
+            # Refreshing only the drawn areas of the display
+            pygame.display.update(rects)
+            rects = []
+
+            profiler.mark()
+            profiler.endFrame()
+
+            # Waiting out the rest of the frame, unless uncapped
+            if not uncapped:
+                clock.tick(FRAME_RATE)
+
+    finally:
+        if profile_path is not None:
+            profiler.dump(profile_path)
+
+        if replay_path is not None:
+            recorder.replay.save(replay_path)
+
+def layoutThumbnails(count, area=THUMBNAIL_AREA, gap=THUMBNAIL_GAP):
+    '''Returns the position of each of *count* thumbnails laid out in rows across *area*, choosing the quantity of columns that gives the largest cells
+
+    Returns:
+        tuple : The cell length of the thumbnails and a list of the (x, y) of each thumbnail
+    '''
+
+    x, y, width, height = area
+    best_length, best_cols = 1, count
+
+    for cols in range(1, count + 1):
+        rows = -(-count // cols)
+        length = min((width - gap * (cols - 1)) // (cols * Grid.COLS), (height - gap * (rows - 1)) // (rows * Grid.ROWS))
+
+        if length > best_length:
+            best_length, best_cols = length, cols
+
+    positions = [
+        (x + i % best_cols * (best_length * Grid.COLS + gap), y + i // best_cols * (best_length * Grid.ROWS + gap))
+        for i in range(count)
+    ]
+
+    return best_length, positions
+
+def startArena(display, size, seed=None, bot=RandomBot, targeting='random', profile_path=None):
+    '''Runs an arena of *size* players, the first of whom plays with the player 1 controls on a full view while the others are played by instances of the bot class *bot*, seeded from *seed*, and drawn as thumbnails. The lines sent are routed by the targeting named *targeting*, one of Arena.TARGETINGS. Like startGame, the logic runs at a fixed TICK_RATE ticks per second, frames are timed by a FrameProfiler whose overlay is toggled with F3, and space restarts the arena once it is over'''
+
+    arena = Arena(size, seed, Arena.TARGETINGS[targeting]())
+    bots = [None] + [bot(arena.seed + player) for player in range(1, size)]
+    text_cache = TextCache()
+    profiler = FrameProfiler()
+    overlay_rect = None
+
+    cell_length, positions = layoutThumbnails(size - 1)
+
+    views = [GridView(arena.grids[0], 100, 100, 400, display, text_cache=text_cache)]
+    views += [ThumbnailView(grid, x, y, cell_length, display) for grid, (x, y) in zip(arena.grids[1:], positions)]
+
+    keyPressedActions = {
+        pygame.K_w     : 'rotCW',
+        pygame.K_a     : 'moveLeft',
+        pygame.K_s     : 'moveDown',
+        pygame.K_d     : 'moveRight',
+        pygame.K_t     : 'rotFull',
+        pygame.K_f     : 'rotCCW',
+        pygame.K_g     : 'hardDrop',
+        pygame.K_h     : 'swapHold'
     }
 
     # Tracking in-game time
     clock = pygame.time.Clock()
+    timestep = FixedTimestep(TICK_RATE)
+    skipped_frames = 0
+
+    # Areas of the display drawn since the display was last refreshed
+    rects = []
+
+    try:
+        while True:
+            profiler.beginFrame()
 
-    # Printing current event until display is exited
-    while True:
-        frame_counter += 1
-
-        if grid_1.lose:
-            grid_2.win = True
-            font = pygame.font.SysFont(None, 30)
-            new_game_text = font.render("Press Space To Restart", False, Block.WHITE)
-            
-            display.blit(new_game_text, (display.get_width() / 2.75, 50))
-            
-        elif grid_2.lose:
-            grid_1.win = True
-            font = pygame.font.SysFont(None, 30)
-            new_game_text = font.render("Press Space To Restart", False, Block.WHITE)
-            
-            display.blit(new_game_text, (display.get_width() / 2.75, 50))
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    raise SystemExit
 
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+
+                    # Toggling the profiling overlay, blanking it when hidden
+                    if overlay_rect is None:
+                        overlay_rect = profiler.drawOverlay(display, text_cache)
+                        rects.append(overlay_rect)
+                    else:
+                        rects.append(display.fill(Block.BLACK, overlay_rect))
+                        overlay_rect = None
+
+                elif event.type == pygame.KEYDOWN:
+                    if not arena.isOver():
+                        if event.key in keyPressedActions:
+                            arena.act(0, keyPressedActions[event.key])
+
+                    elif event.key == pygame.K_SPACE:
+                        rects.append(display.fill(Block.BLACK, (100, 50, 400, 50)))
+
+                        arena.reset()
+
+            profiler.mark()
+
+            # Advancing game logic by however many ticks are due, letting the bots still playing act before each tick
+            for _ in range(timestep.advance()):
+                for player in range(1, size):
+                    if arena.isAlive(arena.grids[player]):
+                        for action in bots[player].getActions(arena, player):
+                            arena.act(player, action)
+
+                arena.tick()
+
+            profiler.mark()
+
+            # Skipping drawing while the logic is behind, though never for long
+            if timestep.isBehind() and skipped_frames < MAX_SKIPPED_FRAMES:
+                skipped_frames += 1
+
+                profiler.mark()
+                profiler.mark()
+                profiler.endFrame()
+
+                continue
+
+            skipped_frames = 0
+
+            if arena.isOver():
+                new_game_text = text_cache.render("Press Space To Restart", 30, Block.WHITE)
+
+                rects.append(display.blit(new_game_text, (100, 50)))
+
+            # Repainting changed parts of grids, thumbnails being copied only if they changed
+            for view in views:
+                rects += view.drawGrid()
+
+            if overlay_rect is not None and profiler.frames % OVERLAY_INTERVAL == 0:
+                overlay_rect = profiler.drawOverlay(display, text_cache)
+                rects.append(overlay_rect)
+
+            profiler.mark()
+
+            # Refreshing only the drawn areas of the display
+            pygame.display.update(rects)
+            rects = []
+
+            profiler.mark()
+            profiler.endFrame()
+
+            clock.tick(FRAME_RATE)
+
+    finally:
+        if profile_path is not None:
+            profiler.dump(profile_path)
+
+def startOnline(display, host, port, profile_path=None):
+    '''Plays a match on the MatchServer at *host* on *port* with the player 1 controls. The server runs the game logic, so the key presses are only sent to it, and the grids drawn are remote copies kept up to date from the deltas it sends. Frames are timed by a FrameProfiler, whose overlay is toggled with F3, and space asks the server to restart the match once it is over'''
+
+    asyncio.run(playOnline(display, host, port, profile_path))
+
+async def playOnline(display, host, port, profile_path=None):
+    '''Runs startOnline inside an event loop, drawing a frame and then giving the connection the rest of the frame's time'''
+
+    client = MatchClient()
+    text_cache = TextCache()
+    profiler = FrameProfiler()
+    overlay_rect = None
+
+    await client.connect(host, port)
+
+    # Waiting for an opponent, still answering the window
+    joining = asyncio.create_task(client.join())
+    waiting_rect = display.blit(text_cache.render("Waiting For An Opponent", 30, Block.WHITE), (display.get_width() / 2.75, 50))
+
+    pygame.display.update(waiting_rect)
+
+    while not joining.done():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                joining.cancel()
+                await client.close()
                 raise SystemExit
 
-            elif not (grid_1.win or grid_2.win):
-                
-                # Performing key press incurred operations
-                if event.type == pygame.KEYDOWN:
-                    if event.key in keyPressedActions:
-                        keyPressedActions[event.key]()
+        await asyncio.sleep(1 / FRAME_RATE)
+
+    joining.result()
+
+    views = [
+        GridView(client.grids[0], 100, 100, 400, display, text_cache=text_cache),
+        GridView(client.grids[1], 500, 100, 400, display, text_cache=text_cache)
+    ]
+
+    keyPressedActions = {
+        pygame.K_w     : 'rotCW',
+        pygame.K_a     : 'moveLeft',
+        pygame.K_s     : 'moveDown',
+        pygame.K_d     : 'moveRight',
+        pygame.K_t     : 'rotFull',
+        pygame.K_f     : 'rotCCW',
+        pygame.K_g     : 'hardDrop',
+        pygame.K_h     : 'swapHold'
+    }
+
+    receiver = asyncio.create_task(client.receiveAll())
+    restart_rect = None
+
+    # Areas of the display drawn since the display was last refreshed
+    rects = [display.fill(Block.BLACK, waiting_rect)]
+
+    try:
+        # Drawing frames until the display is exited or the server disconnects
+        while not receiver.done():
+            frame_start = time.perf_counter()
+            profiler.beginFrame()
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    raise SystemExit
 
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+
+                    # Toggling the profiling overlay, blanking it when hidden
+                    if overlay_rect is None:
+                        overlay_rect = profiler.drawOverlay(display, text_cache)
+                        rects.append(overlay_rect)
                     else:
-                        # Unknown key pressed
-                        pass
-            
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    pygame.draw.rect(display, Block.BLACK, pygame.Rect(display.get_width()/2.75, 50, 600, 50))
-
-                    grid_1.resetGrid()
-                    grid_2.resetGrid()
-        
-        if not (grid_1.win or grid_2.win):
-            for g in Grid.GRIDS:
-                g.drop_counter += 1
-
-                # Delaying block movements
-                if g.drop_counter >= Grid.SPEED:
-                    g.drop_counter = 0
-
-                    g.block.autoMoveDown()
-                    g.drawLevel()
-
-                # Continuing block auto-lock timer
-                if g.timer_running:
-                    g.timer += 1
-                
-                # Checking if block can move down
-                elif g.block.collisionDetect(r_off=-1):
-                    g.timer_running = True
-        
-        # Repainting grids
-        for g in Grid.GRIDS:
-            g.drawBlock()
-            g.drawGrid()
-        
-        # Refreshing display at 60fps
-        pygame.display.update()
-        clock.tick(60)
+                        rects.append(display.fill(Block.BLACK, overlay_rect))
+                        overlay_rect = None
+
+                elif event.type == pygame.KEYDOWN:
+                    if not client.isOver():
+                        if event.key in keyPressedActions:
+                            client.act(keyPressedActions[event.key])
+
+                    elif event.key == pygame.K_SPACE:
+                        client.act('reset')
+
+            profiler.mark()
+
+            # Letting the connection send the inputs and apply the deltas received, the game logic running on the server
+            await asyncio.sleep(0)
+
+            profiler.mark()
+
+            # Showing the restart prompt while the match is over, which only ends once the server restarts it
+            if client.isOver() and restart_rect is None:
+                new_game_text = text_cache.render("Press Space To Restart", 30, Block.WHITE)
+
+                restart_rect = display.blit(new_game_text, (display.get_width() / 2.75, 50))
+                rects.append(restart_rect)
+
+            elif not client.isOver() and restart_rect is not None:
+                rects.append(display.fill(Block.BLACK, restart_rect))
+                restart_rect = None
+
+            # Repainting changed parts of grids
+            for view in views:
+                rects += view.drawGrid()
+
+            if overlay_rect is not None and profiler.frames % OVERLAY_INTERVAL == 0:
+                overlay_rect = profiler.drawOverlay(display, text_cache)
+                rects.append(overlay_rect)
+
+            profiler.mark()
+
+            # Refreshing only the drawn areas of the display
+            pygame.display.update(rects)
+            rects = []
+
+            profiler.mark()
+            profiler.endFrame()
+
+            # Waiting out the rest of the frame while receiving
+            await asyncio.sleep(max(0, 1 / FRAME_RATE - (time.perf_counter() - frame_start)))
+
+    finally:
+        receiver.cancel()
+        await client.close()
+
+        if profile_path is not None:
+            profiler.dump(profile_path)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import pygame
+from collections import OrderedDict
+
+class TextCache:
+    ''' A bounded cache of fonts and rendered text, so that drawing the same text again never re-resolves a system font or re-rasterizes the text. Numbers are drawn by compositing cached glyphs of their digits, so a changing score never renders a new surface
+
+    Attributes:
+        - __max_size : The maximum quantity of rendered texts kept, after which the least recently used text is discarded
+        - __fonts : A dictionary mapping each font size to its font
+        - __texts : An ordered dictionary mapping each (font size, text, colour, antialias) to its rendered surface, from least to most recently used
+        - __glyphs : A dictionary mapping each (font size, character, colour) to its rendered surface, used to draw numbers
+    '''
+
+    def __init__(self, max_size=256):
+        '''Constructs a TextCache object keeping at most *max_size* rendered texts'''
+
+        self.__max_size = max_size
+        self.__fonts = {}
+        self.__texts = OrderedDict()
+        self.__glyphs = {}
+
+    def getFont(self, size):
+        '''Returns the default system font of size *size*, loading it on first use
+
+        Parameters:
+            - size : The size of the font
+        '''
+
+        font = self.__fonts.get(size)
+
+        if font is None:
+            font = self.__fonts[size] = pygame.font.SysFont(None, size)
+
+        return font
+
+    def render(self, text, size, colour, antialias=False):
+        '''Returns a surface of *text* rendered in the default system font of size *size* and in *colour*, rendering it only if it isn't cached
+
+        Parameters:
+            - text : The text to render
+            - size : The size of the font
+            - colour : The colour of the text
+            - antialias : Whether to render the text with smooth edges
+        '''
+
+        key = (size, text, colour, antialias)
+        surface = self.__texts.get(key)
+
+        if surface is not None:
+            self.__texts.move_to_end(key)
+            return surface
+
+        surface = self.__texts[key] = self.getFont(size).render(text, antialias, colour)
+
+        # Discarding the least recently used text
+        if len(self.__texts) > self.__max_size:
+            self.__texts.popitem(last=False)
+
+        return surface
+
+    def blitNumber(self, surface, number, pos, size, colour):
+        '''Draws *number* onto *surface* at *pos* by drawing the cached glyph of each of its digits side by side
+
+        Parameters:
+            - surface : The surface to draw on
+            - number : The integer to draw
+            - pos : The (x, y) coordinates of the number's top-left corner
+            - size : The size of the font
+            - colour : The colour of the number
+
+        Returns:
+            pygame.Rect : The area of the surface drawn on
+        '''
+
+        x, y = pos
+        rect = pygame.Rect(x, y, 0, 0)
+
+        for char in str(number):
+            glyph = self.__glyphs.get((size, char, colour))
+
+            if glyph is None:
+                glyph = self.__glyphs[size, char, colour] = self.getFont(size).render(char, False, colour)
+
+            rect.union_ip(surface.blit(glyph, (x, y)))
+            x += glyph.get_width()
+
+        return rect
+
+    def __len__(self):
+        '''len override'''
+        return len(self.__texts)
+
+    def __repr__(self):
+        '''repr override'''
+        return f'TextCache(max_size={self.__max_size})'
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+import pygame
+from Block import Block
+from Grid import Grid
+
+class ThumbnailView:
+    """ A small frontend of a grid, drawing it as a thumbnail of plain coloured cells without grid lines or statistics, so that many opponents fit on one display. The thumbnail is kept in its own surface, updated from the grid's changed cells, and only copied onto the display when it changed
+
+    Attributes:
+        - grid : The grid object being drawn
+        - __x : The x-coordinate of the thumbnail in the surface
+        - __y : The y-coordinate of the thumbnail in the surface
+        - __cell_length : The length of each square cell in pixels
+        - __surface : The pygame surface that the thumbnail will be drawn on
+        - __thumbnail : The cached surface of the thumbnail
+        - __drawn : A matrix of the cell colours last drawn onto the thumbnail, or None if the whole thumbnail must be redrawn
+        - __drawn_state : The (lose, win) flags of the grid when it was last drawn
+    """
+
+    def __init__(self, grid, x:int, y:int, cell_length:int, surface):
+        '''The constructor/initialization method of the view and its attributes
+
+        Parameters:
+            - grid : The grid to draw
+            - x : The x-coordinate of where the thumbnail's top-left corner should be drawn
+            - y : The y-coordinate of where the thumbnail's top-left corner should be drawn
+            - cell_length : The length of each cell in pixels
+            - surface : The surface to draw the thumbnail on
+        '''
+
+        self.grid = grid
+        self.__x = x
+        self.__y = y
+        self.__cell_length = cell_length
+        self.__surface = surface
+        self.__thumbnail = pygame.Surface((Grid.COLS * cell_length, Grid.ROWS * cell_length))
+        self.__drawn = None
+        self.__drawn_state = None
+
+        if pygame.display.get_surface() is not None:
+            self.__thumbnail = self.__thumbnail.convert()
+
+        self.grid.trackChanges()
+
+    def getRect(self):
+        '''Returns the area of the surface the thumbnail covers'''
+
+        return pygame.Rect(self.__x, self.__y, Grid.COLS * self.__cell_length, Grid.ROWS * self.__cell_length)
+
+    def drawGrid(self):
+        '''Redraws the cells whose colour changed onto the cached thumbnail, or the whole thumbnail after a reset, tints it red or green once the player has lost or won, and copies it onto the surface if anything changed. The display is not updated, so that the caller can update every view's areas at once
+
+        Returns:
+            list : The areas of the surface drawn on, to be passed to pygame.display.update
+        '''
+
+        dirty_cells = self.grid.dirty_cells
+        state = (self.grid.lose, self.grid.win)
+        length = self.__cell_length
+        changed = state != self.__drawn_state
+
+        if not (self.grid.lose or self.grid.win):
+            if self.__drawn is None or changed:
+                self.__drawn = [[None] * Grid.COLS for _ in range(Grid.ROWS)]
+                dirty_cells = [(row, col) for row in range(Grid.ROWS) for col in range(Grid.COLS)]
+
+            for row, col in dirty_cells:
+                colour = self.grid.getCell(row, col)
+
+                # Skipping cells changed back to the colour they were drawn in
+                if colour == self.__drawn[row][col]:
+                    continue
+
+                self.__drawn[row][col] = colour
+                self.__thumbnail.fill(colour, (col * length, row * length, length, length))
+                changed = True
+
+        elif changed:
+            self.__thumbnail.fill(Block.RED if self.grid.lose else Block.GREEN, special_flags=pygame.BLEND_RGB_MULT)
+            self.__drawn = None
+
+        self.grid.dirty_cells.clear()
+        self.__drawn_state = state
+
+        if not changed:
+            return []
+
+        return [self.__surface.blit(self.__thumbnail, (self.__x, self.__y))]
+
+    def __repr__(self):
+        '''repr overide'''
+        return f'ThumbnailView({self.grid!r}, {self.__x}, {self.__y}, {self.__cell_length})'
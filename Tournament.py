@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# Plays headless bot-vs-bot matches in parallel across every core
+
+# import necessary modules
+import argparse
+import importlib
+import itertools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from Match import Match
+
+# Seconds past its timeout after which a match's worker is presumed hung, such as inside a bot's getActions, and is killed
+GRACE = 1.0
+
+def loadBot(spec):
+    '''Returns the bot class named by *spec*, given in the form "module:Class"'''
+
+    module_name, class_name = spec.split(':')
+
+    return getattr(importlib.import_module(module_name), class_name)
+
+def botName(bot):
+    '''Returns the name of the bot class *bot*, in the form "module:Class" accepted by loadBot'''
+
+    return f'{bot.__module__}:{bot.__qualname__}'
+
+def playMatch(bots, seed, max_ticks=100000, timeout=None):
+    '''Plays a headless match between two bots, seeding the game and each bot from *seed*, until a player wins, *max_ticks* ticks pass or *timeout* seconds pass
+
+    Parameters:
+        - bots : The two bot classes, in player order
+        - seed : The seed of the match
+        - max_ticks : The maximum quantity of ticks to play
+        - timeout : The maximum quantity of seconds to play for, or None for no limit
+
+    Returns:
+        dict : The result of the match, with its bots, seed, status ("finished", "tick limit" or "timeout"), winner (the winning player's index, or None), ticks, scores, lines cleared and duration
+    '''
+
+    start = time.monotonic()
+
+    match = Match(seed)
+    players = [bot(seed * len(bots) + player) for player, bot in enumerate(bots)]
+
+    status = 'tick limit'
+
+    while match.ticks < max_ticks:
+        for player, bot in enumerate(players):
+            for action in bot.getActions(match, player):
+                match.act(player, action)
+
+        match.tick()
+
+        if match.isOver():
+            status = 'finished'
+            break
+
+        if timeout is not None and time.monotonic() - start > timeout:
+            status = 'timeout'
+            break
+
+    return {
+        'bots' : [botName(bot) for bot in bots],
+        'seed' : seed,
+        'status' : status,
+        'winner' : next((player for player, grid in enumerate(match.grids) if grid.win), None),
+        'ticks' : match.ticks,
+        'scores' : [grid.score for grid in match.grids],
+        'lines' : [grid.getLinesCleared() for grid in match.grids],
+        'duration' : time.monotonic() - start
+    }
+
+def _terminatePool(pool):
+    '''Shuts down the process pool *pool* without waiting for its matches, killing its workers in case one is hung'''
+
+    # Python 3.14 can kill the workers itself; before it, they're only reachable through the pool's private attribute
+    if hasattr(pool, 'terminate_workers'):
+        pool.terminate_workers()
+        return
+
+    processes = list((pool._processes or {}).values())
+
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    for process in processes:
+        process.terminate()
+
+def roundRobin(bots, rounds=1, seed=0):
+    '''Returns the matchups of every bot against every other bot, in both seats, for *rounds* rounds, each round played with its own seed
+
+    Parameters:
+        - bots : The bot classes taking part
+        - rounds : The quantity of times each matchup is played
+        - seed : The seed of the first round
+
+    Returns:
+        list : The (bots, seed) pairs of each matchup
+    '''
+
+    return [(pair, seed + round_index) for round_index in range(rounds) for pair in itertools.permutations(bots, 2)]
+
+def runTournament(matchups, workers=None, max_ticks=100000, timeout=None):
+    '''Plays every matchup in a pool of *workers* processes, yielding each result as soon as its match finishes, in whatever order they finish. A match normally times out between ticks, but one still running GRACE seconds past *timeout*, such as because a bot hangs inside getActions, is recorded as timed out and the pool is replaced, restarting the other matches it was playing
+
+    Parameters:
+        - matchups : The (bots, seed) pairs of each match to play
+        - workers : The quantity of worker processes, or None for one per core
+        - max_ticks : The maximum quantity of ticks of each match
+        - timeout : The maximum quantity of seconds of each match, or None for no limit
+
+    Yields:
+        dict : The result of each match, as returned by playMatch, along with its index in *matchups*. Matches that raised an exception have the status "error", and hung matches have the status "timeout" without their statistics
+    '''
+
+    workers = workers or os.cpu_count() or 1
+    queued = deque(enumerate(matchups))
+    running = {}
+    pool = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        while queued or running:
+            # Only submitting a match once a worker is free, so that it starts when submitted and its deadline is fair
+            while queued and len(running) < workers:
+                index, (bots, seed) = queued.popleft()
+                deadline = time.monotonic() + timeout + GRACE if timeout is not None else None
+
+                running[pool.submit(playMatch, bots, seed, max_ticks, timeout)] = (index, bots, seed, deadline)
+
+            if timeout is None:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+            else:
+                earliest = min(deadline for _, _, _, deadline in running.values())
+                done, _ = wait(running, timeout=max(0, earliest - time.monotonic()), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index, bots, seed, _ = running.pop(future)
+
+                try:
+                    result = future.result()
+
+                except Exception as error:
+                    result = {'bots' : [botName(bot) for bot in bots], 'seed' : seed, 'status' : 'error', 'winner' : None, 'error' : repr(error)}
+
+                result['matchup'] = index
+
+                yield result
+
+            if done or timeout is None:
+                continue
+
+            # Recording the hung matches, then replacing the pool, restarting the matches it was still playing
+            now = time.monotonic()
+            expired = [future for future, (_, _, _, deadline) in running.items() if deadline <= now]
+
+            # Waiting again if wait returned just before the earliest deadline
+            if not expired:
+                continue
+
+            for future in expired:
+                index, bots, seed, _ = running.pop(future)
+
+                yield {'bots' : [botName(bot) for bot in bots], 'seed' : seed, 'status' : 'timeout', 'winner' : None, 'duration' : timeout + GRACE, 'matchup' : index}
+
+            for index, bots, seed, _ in sorted(running.values(), reverse=True):
+                queued.appendleft((index, (bots, seed)))
+
+            running = {}
+
+            _terminatePool(pool)
+            pool = ProcessPoolExecutor(max_workers=workers)
+
+    finally:
+        _terminatePool(pool)
+
+if __name__ == '__main__':
+    '''Plays a round robin between the given bots, printing each result as a line of JSON as it finishes, followed by the standings'''
+
+    parser = argparse.ArgumentParser(description='Plays a round robin tournament between bots')
+    parser.add_argument('bots', nargs='+', help='the bots taking part, in the form "module:Class"')
+    parser.add_argument('--rounds', type=int, default=1, help='the quantity of times each matchup is played')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the first round')
+    parser.add_argument('--workers', type=int, default=None, help='the quantity of worker processes (default: one per core)')
+    parser.add_argument('--max-ticks', type=int, default=100000, help='the maximum quantity of ticks of each match')
+    parser.add_argument('--timeout', type=float, default=None, help='the maximum quantity of seconds of each match')
+    args = parser.parse_args()
+
+    bots = [loadBot(spec) for spec in args.bots]
+    wins = {botName(bot) : 0 for bot in bots}
+
+    for result in runTournament(roundRobin(bots, args.rounds, args.seed), args.workers, args.max_ticks, args.timeout):
+        print(json.dumps(result), flush=True)
+
+        if result['winner'] is not None:
+            wins[result['bots'][result['winner']]] += 1
+
+    for rank, (name, count) in enumerate(sorted(wins.items(), key=lambda item: -item[1]), start=1):
+        print(f'{rank}. {name}: {count} wins')
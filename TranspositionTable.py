@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# Andy Luo and Matthew Simpson
+# Bootleg Tetris
+# To create a multiplayer Tetris experience
+
+# import necessary modules
+from collections import OrderedDict
+
+class TranspositionTable:
+    ''' A bounded cache of evaluations keyed by position hashes, such as those of Grid.getHash, so that a search reaching the same position through different move orders evaluates it once. Each evaluation is stored with the depth it was searched to, and is only returned to searches needing no deeper a result. Once full, the least recently used position is discarded
+
+    Attributes:
+        - max_size : The maximum quantity of positions kept
+        - hits : The quantity of lookups that found a usable evaluation
+        - misses : The quantity of lookups that didn't
+        - __entries : An ordered dictionary mapping each hash to its (depth, evaluation), from least to most recently used
+    '''
+
+    def __init__(self, max_size=1 << 20):
+        '''Constructs an empty TranspositionTable object keeping at most *max_size* positions'''
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+
+    def lookup(self, key, depth=0):
+        '''Returns the evaluation stored for the position hashed *key* if it was searched at least *depth* deep, or None otherwise'''
+
+        entry = self.__entries.get(key)
+
+        if entry is None or entry[0] < depth:
+            self.misses += 1
+            return None
+
+        self.__entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[1]
+
+    def store(self, key, evaluation, depth=0):
+        '''Stores *evaluation* of the position hashed *key*, searched *depth* deep, unless a deeper evaluation of it is already stored'''
+
+        entry = self.__entries.get(key)
+
+        if entry is not None:
+            self.__entries.move_to_end(key)
+
+            if entry[0] > depth:
+                return
+
+        self.__entries[key] = (depth, evaluation)
+
+        # Discarding the least recently used position
+        if len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+
+    def clear(self):
+        '''Discards every position and resets the counters'''
+
+        self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        '''in override'''
+        return key in self.__entries
+
+    def __len__(self):
+        '''len override'''
+        return len(self.__entries)
+
+    def __repr__(self):
+        '''repr override'''
+        return f'TranspositionTable(max_size={self.max_size})'
@@ -23,13 +23,24 @@
 # K     : make block go brr to ground
 # L     : hold block for later
 
+# F3    : show or hide frame timings
+# Setting TETRIS_PROFILE to a path writes the frame timings there on exit
+# Setting TETRIS_REPLAY to a path writes a replay of the session there on exit, which Replay.py plays back
+# Setting TETRIS_SEED to an integer plays the same block and garbage sequence every time
+# Setting TETRIS_UNCAPPED to 1 runs the game as fast as possible
+# Setting TETRIS_ARENA to a number of players plays an arena against that many less one bots, using the player 1 controls
+# Setting TETRIS_BOT to a bot class, such as Bot:RandomBot, picks the arena's bots
+# Setting TETRIS_TARGETING to random, attackers or most-lines picks where the arena's sent lines go
+# Setting TETRIS_SERVER to host:port plays online, using the player 1 controls, against whoever else joins the match server there, which Network.py runs
+
 # Hiding pygame support message
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
 
 # import necessary modules
 import pygame
-from Tetris import startGame
+from Tetris import startGame, startArena, startOnline
+from Tournament import loadBot
 
 if __name__ == '__main__':
     '''Runs the game of Tetris as well as initializing Pygame and the game display'''
@@ -38,9 +49,35 @@ if __name__ == '__main__':
     pygame.init()
     pygame.font.init()
 
-    # Setting up display (750 x 500px)
-    display = pygame.display.set_mode((750, 500))
-    pygame.display.set_caption('Tetris')
+    seed = os.environ.get('TETRIS_SEED')
+    arena_size = os.environ.get('TETRIS_ARENA')
+    server = os.environ.get('TETRIS_SERVER')
+
+    if arena_size:
+
+        # Setting up display (1100 x 600px), leaving room for the opponents' thumbnails
+        display = pygame.display.set_mode((1100, 600))
+        pygame.display.set_caption('Tetris Arena')
+
+        # Running the arena
+        startArena(display, int(arena_size), int(seed) if seed else None, loadBot(os.environ.get('TETRIS_BOT', 'Bot:RandomBot')), os.environ.get('TETRIS_TARGETING', 'random'), os.environ.get('TETRIS_PROFILE'))
+
+    elif server:
+
+        # Setting up display (750 x 500px)
+        display = pygame.display.set_mode((750, 500))
+        pygame.display.set_caption('Tetris Online')
+
+        # Playing on the server
+        host, port = server.rsplit(':', 1)
+
+        startOnline(display, host, int(port), os.environ.get('TETRIS_PROFILE'))
+
+    else:
+
+        # Setting up display (750 x 500px)
+        display = pygame.display.set_mode((750, 500))
+        pygame.display.set_caption('Tetris')
 
-    # Running the game
-    startGame(display)
+        # Running the game
+        startGame(display, os.environ.get('TETRIS_PROFILE'), os.environ.get('TETRIS_REPLAY'), int(seed) if seed else None, os.environ.get('TETRIS_UNCAPPED') == '1')